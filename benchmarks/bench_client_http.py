@@ -0,0 +1,111 @@
+"""
+Request latency against a local stub HTTP server.
+
+Compares a new `httpx.AsyncClient` per request (how the local backends used
+to talk to their apis) against the keep-alive pool clients now share
+through `HTTPPool`, and per-chunk against batched token accounting while
+a response is streamed.
+"""
+
+import asyncio
+
+import httpx
+
+from common import measure, report
+
+from talemate.client.base import ClientBase, RequestInformation
+from talemate.client.http import HTTPPool
+
+BODY = b'{"result": "koboldcpp/stub-model"}'
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    # minimal HTTP/1.1 server, keeps the connection open until the client
+    # closes it
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            if length:
+                await reader.readexactly(length)
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: application/json\r\n"
+                b"Content-Length: " + str(len(BODY)).encode() + b"\r\n\r\n" + BODY
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+
+async def fresh_client(url: str, requests: int):
+    for _ in range(requests):
+        async with httpx.AsyncClient() as client:
+            (await client.get(f"{url}/api/v1/model", timeout=2)).json()
+
+
+async def pooled_client(pool: HTTPPool, url: str, requests: int):
+    for _ in range(requests):
+        client = pool.client(url)
+        (await client.get(f"{url}/api/v1/model", timeout=2)).json()
+
+
+async def stream_tokens(tokens: int):
+    for i in range(tokens):
+        yield " caravan" if i % 2 else " moves"
+
+
+async def per_chunk_count(client: ClientBase, tokens: int) -> str:
+    response = ""
+    async for chunk in stream_tokens(tokens):
+        response += chunk
+        client.update_request_tokens(client.count_tokens(chunk))
+    return response
+
+
+def main():
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(handle, "127.0.0.1", 0))
+    port = server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}"
+    pool = HTTPPool()
+
+    rows = []
+    for requests in (1, 10, 100):
+        fresh = measure(lambda: loop.run_until_complete(fresh_client(url, requests)))
+        pooled = measure(
+            lambda: loop.run_until_complete(pooled_client(pool, url, requests))
+        )
+        rows.append((requests, f"{fresh:.2f}", f"{pooled:.2f}"))
+
+    report("Sequential GET requests (ms)", rows, ("requests", "fresh", "pooled"))
+
+    client = ClientBase()
+    client.request_information = RequestInformation()
+    rows = []
+    for tokens in (100, 1000, 4000):
+        per_chunk = measure(
+            lambda: loop.run_until_complete(per_chunk_count(client, tokens))
+        )
+        batched = measure(
+            lambda: loop.run_until_complete(
+                client.collect_stream(stream_tokens(tokens))
+            )
+        )
+        rows.append((tokens, f"{per_chunk:.2f}", f"{batched:.2f}"))
+
+    report("Streamed token accounting (ms)", rows, ("chunks", "per chunk", "batched"))
+
+    loop.run_until_complete(pool.aclose())
+    server.close()
+    loop.run_until_complete(server.wait_closed())
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Prompt-build latency of `Scene.context_history` against history length.
+"""
+
+import isodate
+
+from talemate.scene_message import CharacterMessage, NarratorMessage
+
+from common import bootstrap_scene, measure, report
+
+LINE = (
+    'Elara: "The caravan will not wait for us past sundown, and the pass is '
+    'already thick with snow." She tightens the straps on her pack.'
+)
+NARRATION = (
+    "The wind howls across the ridge as the last light fades behind the peaks, "
+    "painting the valley below in shades of violet and ash."
+)
+
+
+def populate(scene, num_messages: int, num_archive: int):
+    scene.history = []
+    scene.archived_history = []
+    scene.layered_history = []
+    for i in range(num_messages):
+        if i % 3 == 2:
+            scene.history.append(NarratorMessage(NARRATION))
+        else:
+            scene.history.append(CharacterMessage(LINE))
+
+    step = max(1, num_messages // max(1, num_archive))
+    for i in range(num_archive):
+        scene.archived_history.append(
+            {
+                "text": f"Entry {i}: {NARRATION}",
+                "ts": isodate.duration_isoformat(isodate.Duration(hours=i)),
+                "start": i * step,
+                "end": min((i + 1) * step, num_messages) - 1,
+            }
+        )
+    scene.ts = isodate.duration_isoformat(isodate.Duration(hours=num_archive + 1))
+
+
+def main():
+    scene = bootstrap_scene()
+    rows = []
+    for num_messages, num_archive in [
+        (100, 10),
+        (1000, 100),
+        (5000, 500),
+        (10000, 1000),
+    ]:
+        populate(scene, num_messages, num_archive)
+        for budget in (4096, 16384):
+            ms = measure(lambda: scene.context_history(budget=budget))
+            rows.append((num_messages, num_archive, budget, f"{ms:.2f}"))
+
+    report(
+        "Scene.context_history",
+        rows,
+        ("messages", "archive", "budget", "median ms"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+`dedupe_string` and repetition detection latency against input size.
+
+Compares the indexed `dedupe_string` against the brute force line by line
+comparison it replaced, and `batch_similarity_matches` against scoring one
+sentence pair at a time.
+"""
+
+import random
+
+from thefuzz import fuzz
+
+from common import measure, report
+
+from talemate.util.dedupe import (
+    batch_similarity_matches,
+    compile_text_to_sentences,
+    dedupe_string,
+)
+
+WORDS = (
+    "the caravan moves slowly across frozen pass at dusk while Elara watches "
+    "wind ridge lantern snow valley old road guards whisper about storm"
+).split()
+
+
+def dedupe_string_brute_force(
+    s: str, min_length: int = 32, similarity_threshold: int = 95
+) -> str:
+    deduped = []
+    current_in_codeblock = False
+    for line in reversed(s.split("\n")):
+        stripped_line = line.strip()
+        if stripped_line.startswith("```"):
+            current_in_codeblock = not current_in_codeblock
+            deduped.append(line)
+            continue
+        if current_in_codeblock or len(stripped_line) <= min_length:
+            deduped.append(line)
+            continue
+        existing_in_codeblock = False
+        similar_found = False
+        for existing_line in deduped:
+            if existing_line.strip().startswith("```"):
+                existing_in_codeblock = not existing_in_codeblock
+                continue
+            if existing_in_codeblock:
+                continue
+            if fuzz.ratio(stripped_line, existing_line.strip()) >= similarity_threshold:
+                similar_found = True
+                break
+        if not similar_found:
+            deduped.append(line)
+    return "\n".join(reversed(deduped))
+
+
+def similarity_matches_pairwise(
+    text_a: str, texts_b: list[str], similarity_threshold: int = 95
+) -> list[tuple[str, str]]:
+    matches = []
+    sentences_a = compile_text_to_sentences(text_a)
+    for text_b in texts_b:
+        sentences_b = compile_text_to_sentences(text_b)
+        for sentence_a, prepared_a in sentences_a:
+            for sentence_b, prepared_b in sentences_b:
+                if fuzz.ratio(prepared_a, prepared_b) >= similarity_threshold:
+                    matches.append((sentence_a, sentence_b))
+                    break
+                for comma_a in sentence_a.split(","):
+                    for comma_b in sentence_b.split(","):
+                        similarity = fuzz.ratio(comma_a.strip(), comma_b.strip())
+                        if similarity >= similarity_threshold:
+                            matches.append((comma_a, comma_b))
+                            break
+    return matches
+
+
+def make_message(rng: random.Random, sentences: list[str]) -> str:
+    return " ".join(rng.choice(sentences) for _ in range(rng.randint(3, 8)))
+
+
+def make_prompt(num_lines: int, rng: random.Random) -> str:
+    lines = []
+    for _ in range(num_lines):
+        if rng.random() < 0.1 and lines:
+            # repeated content, e.g. the same character sheet line twice
+            lines.append(rng.choice(lines))
+        elif rng.random() < 0.2:
+            lines.append("")
+        else:
+            lines.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 40))))
+    return "\n".join(lines)
+
+
+def main():
+    rng = random.Random(0)
+    rows = []
+    for num_lines in (100, 500, 1000, 2000):
+        text = make_prompt(num_lines, rng)
+        assert dedupe_string(text) == dedupe_string_brute_force(text)
+        brute = measure(lambda: dedupe_string_brute_force(text), repeat=3)
+        indexed = measure(lambda: dedupe_string(text), repeat=3)
+        rows.append((num_lines, len(text), f"{brute:.1f}", f"{indexed:.1f}"))
+
+    report(
+        "dedupe_string (ms)",
+        rows,
+        ("lines", "chars", "brute force", "indexed"),
+    )
+
+    sentences = [
+        ", ".join(
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 8)))
+            for _ in range(rng.randint(1, 3))
+        ).capitalize()
+        + "."
+        for _ in range(200)
+    ]
+    text = make_message(rng, sentences)
+    rows = []
+    for num_messages in (10, 50, 200):
+        texts = [make_message(rng, sentences) for _ in range(num_messages)]
+        assert similarity_matches_pairwise(text, texts) == [
+            (match.original, match.matched)
+            for match in batch_similarity_matches(text, texts, split_on_comma=True)
+        ]
+        pairwise = measure(lambda: similarity_matches_pairwise(text, texts))
+        batched = measure(
+            lambda: batch_similarity_matches(text, texts, split_on_comma=True)
+        )
+        rows.append((num_messages, f"{pairwise:.1f}", f"{batched:.1f}"))
+
+    report(
+        "similarity matches against previous messages (ms)",
+        rows,
+        ("messages", "pairwise", "batched"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Event loop stall while embeddings are computed.
+
+Runs a ticker on the event loop next to repeated embedding requests (the
+shape of semantic repetition detection on a generated message) and reports
+the longest and total time the ticker was held up. Compares embedding on
+the loop itself (how compare_string_lists used to work) against the
+embedding worker thread. The embedding function simulates a small local
+model.
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+from talemate.agents.memory.embeddings import EmbeddingCache, EmbeddingWorker
+
+from common import report
+
+# simulated model cost
+CALL_OVERHEAD = 0.02
+PER_TEXT = 0.002
+TICK = 0.001
+
+
+def embed_fn(texts: list[str]) -> list[np.ndarray]:
+    time.sleep(CALL_OVERHEAD + PER_TEXT * len(texts))
+    return list(np.random.default_rng(len(texts)).random((len(texts), 384)))
+
+
+def sentences(num: int) -> list[str]:
+    # unique per call so the embedding cache never hits
+    salt = uuid.uuid4().hex[:8]
+    return [f"{salt} Sentence {i} of the generated message." for i in range(num)]
+
+
+async def ticker(stop: asyncio.Event, stalls: list[float]):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(TICK)
+        stalls.append(max(0.0, time.perf_counter() - t0 - TICK))
+
+
+async def run(embed, requests: int) -> tuple[float, float]:
+    stop = asyncio.Event()
+    stalls = []
+    task = asyncio.create_task(ticker(stop, stalls))
+    await asyncio.sleep(TICK)
+    for _ in range(requests):
+        await embed(sentences(20))
+    stop.set()
+    await task
+    return max(stalls) * 1000, sum(stalls) * 1000
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    cache = EmbeddingCache(os.path.join(tmp, "inline.sqlite3"))
+    worker = EmbeddingWorker(EmbeddingCache(os.path.join(tmp, "worker.sqlite3")))
+
+    async def inline(texts):
+        return cache.embed("simulated", texts, embed_fn)
+
+    async def threaded(texts):
+        return await worker.embed("simulated", texts, embed_fn)
+
+    rows = []
+    for name, embed in (("on loop", inline), ("worker", threaded)):
+        longest, total = asyncio.run(run(embed, 20))
+        rows.append((name, f"{longest:.1f}", f"{total:.1f}"))
+
+    report("Event loop stall (ms)", rows, ("embedding", "longest", "total"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Time to import archived history into the memory database.
+
+Compares one `archive_add` per entry (how history used to be imported on
+load and memory resets) against the bulk `archive_add_many` path, using an
+in-memory chromadb client and a stand-in embedding function that simulates
+the per-call and per-text cost of a small local model.
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+
+import chromadb
+import numpy as np
+from chromadb.config import Settings
+from chromadb.utils.embedding_functions import EmbeddingFunction
+
+import talemate.instance as instance
+from talemate.agents.memory.embeddings import EMBEDDING_CACHE
+from talemate.history import ArchiveEntry, emit_archive_add, emit_archive_add_many
+
+from common import bootstrap_scene, report
+
+# simulated model cost
+CALL_OVERHEAD = 0.005
+PER_TEXT = 0.0002
+
+
+class SimulatedEmbeddingFunction(EmbeddingFunction):
+    def __init__(self):
+        pass
+
+    def __call__(self, input):
+        time.sleep(CALL_OVERHEAD + PER_TEXT * len(input))
+        rng = np.random.default_rng(len(input))
+        return list(rng.random((len(input), 384), dtype=np.float32))
+
+    @staticmethod
+    def name() -> str:
+        return "simulated"
+
+    def get_config(self) -> dict:
+        return {}
+
+    @staticmethod
+    def build_from_config(config: dict) -> "SimulatedEmbeddingFunction":
+        return SimulatedEmbeddingFunction()
+
+
+def entries(num: int) -> list[ArchiveEntry]:
+    # unique per run so the embedding cache never hits
+    salt = uuid.uuid4().hex[:8]
+    return [
+        ArchiveEntry(text=f"{salt} Entry {i}: the caravan crosses the pass.", id=f"{i}")
+        for i in range(num)
+    ]
+
+
+def setup(scene, db_client):
+    memory = instance.get_agent("memory")
+    memory.db_client = db_client
+    memory.db = db_client.get_or_create_collection(
+        uuid.uuid4().hex, embedding_function=SimulatedEmbeddingFunction()
+    )
+    memory._ready_to_add = True
+    memory.connect(scene)
+    return memory
+
+
+async def per_entry(scene, archive: list[ArchiveEntry]):
+    for entry in archive:
+        await emit_archive_add(scene, entry)
+
+
+async def bulk(scene, archive: list[ArchiveEntry]):
+    await emit_archive_add_many(scene, archive)
+
+
+def main():
+    scene = bootstrap_scene()
+    db_client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+    EMBEDDING_CACHE.path = os.path.join(tempfile.mkdtemp(), "embedding_cache.sqlite3")
+    loop = asyncio.new_event_loop()
+
+    rows = []
+    for num, compare in [(1000, True), (10000, False)]:
+        timings = []
+        for fn in (per_entry, bulk) if compare else (bulk,):
+            memory = setup(scene, db_client)
+            archive = entries(num)
+            t0 = time.perf_counter()
+            loop.run_until_complete(fn(scene, archive))
+            timings.append(time.perf_counter() - t0)
+            assert memory.db.count() == num
+        if not compare:
+            timings.insert(0, None)
+        rows.append(
+            (
+                num,
+                f"{timings[0]:.2f}" if timings[0] is not None else "-",
+                f"{timings[1]:.2f}",
+            )
+        )
+
+    report("Archive import (s)", rows, ("entries", "per entry", "bulk"))
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Definition import, load, per-execution planning and socket linking cost of
+the bundled node modules.
+
+Compares rebuilding and sorting the dependency graph on every execution
+(how graphs used to be executed) against the compiled execution plan a
+graph keeps until its nodes or edges change, and resolving input socket
+sources by scanning all edges against the reverse edge index. Nested
+graphs are included since each of them plans its own execution.
+"""
+
+import json
+import os
+import uuid
+from pathlib import Path
+
+import networkx as nx
+
+from common import measure, report
+
+import talemate.game.engine.nodes.core as core
+import talemate.game.engine.nodes.load_definitions  # noqa: F401
+from talemate.game.engine.nodes.core import Graph
+from talemate.game.engine.nodes.layout import load_graph_from_file
+from talemate.game.engine.nodes import SEARCH_PATHS
+from talemate.game.engine.nodes.registry import (
+    NODES,
+    import_talemate_node_definitions,
+)
+
+MODULE_DIR = os.path.join(
+    os.path.dirname(
+        os.path.abspath(talemate.game.engine.nodes.load_definitions.__file__)
+    ),
+    "modules",
+    "scene",
+)
+
+
+def import_fresh_definitions():
+    for name, cls in list(NODES.items()):
+        if getattr(cls, "__dynamic_imported__", False):
+            del NODES[name]
+    import_talemate_node_definitions()
+
+
+def load_definitions() -> list[dict]:
+    definitions = []
+    for base_path in SEARCH_PATHS:
+        for path in Path(base_path).rglob("*.json"):
+            with open(path) as file:
+                definitions.append(json.load(file))
+    return definitions
+
+
+def uuid4_socket_id() -> str:
+    return str(uuid.uuid4())
+
+
+def plan_uncached(graph: Graph) -> list[list[str]]:
+    dependency_graph = graph.build()
+    if not nx.is_directed_acyclic_graph(dependency_graph):
+        raise ValueError("Graph contains cycles")
+    chains = list(nx.weakly_connected_components(dependency_graph))
+    chains.sort(key=lambda chain: graph.assign_priority(chain))
+    return [
+        list(nx.topological_sort(dependency_graph.subgraph(chain))) for chain in chains
+    ]
+
+
+def plan_cached(graph: Graph) -> list[list[str]]:
+    return graph.execution_plan().chains
+
+
+def set_socket_source_references_scan(graph: Graph):
+    for node in graph.nodes.values():
+        for socket in node.inputs:
+            for output_socket_id, input_socket_ids in graph.edges.items():
+                output_node_id, output_socket_name = output_socket_id.split(".", 1)
+                if socket.id in input_socket_ids:
+                    socket.source = graph.sockets[
+                        f"{output_node_id}.{output_socket_name}"
+                    ]
+                    break
+
+
+def collect_graphs(graph: Graph) -> list[Graph]:
+    graphs = [graph]
+    for node in graph.nodes.values():
+        if isinstance(node, Graph):
+            graphs.extend(collect_graphs(node))
+    return graphs
+
+
+def main():
+    import_talemate_node_definitions()
+
+    # definitions used to be validated a second time after being
+    # instantiated on import
+    definitions = load_definitions()
+
+    def import_and_validate():
+        import_fresh_definitions()
+        for data in definitions:
+            NODES[data["registry"]].model_validate(data)
+
+    rows = [
+        (
+            "import_talemate_node_definitions",
+            f"{measure(import_and_validate):.1f}",
+            f"{measure(import_fresh_definitions):.1f}",
+        )
+    ]
+    report(
+        "Node definition import (ms)",
+        rows,
+        ("", "instantiate + validate", "instantiate"),
+    )
+
+    rows = []
+    new_socket_id = core.new_socket_id
+    for filename in sorted(os.listdir(MODULE_DIR)):
+        path = os.path.join(MODULE_DIR, filename)
+        core.new_socket_id = uuid4_socket_id
+        uuid4 = measure(lambda: load_graph_from_file(path), repeat=10)
+        core.new_socket_id = new_socket_id
+        getrandbits = measure(lambda: load_graph_from_file(path), repeat=10)
+        rows.append((filename, f"{uuid4:.2f}", f"{getrandbits:.2f}"))
+
+    report(
+        "load_graph_from_file (ms)",
+        rows,
+        ("module", "uuid4 socket ids", "getrandbits socket ids"),
+    )
+
+    rows = []
+    for filename in sorted(os.listdir(MODULE_DIR)):
+        graph, _ = load_graph_from_file(os.path.join(MODULE_DIR, filename))
+        graphs = collect_graphs(graph)
+        num_nodes = sum(len(g.nodes) for g in graphs)
+
+        for g in graphs:
+            assert plan_cached(g) == plan_uncached(g)
+
+        uncached = measure(lambda: [plan_uncached(g) for g in graphs], repeat=20)
+        cached = measure(lambda: [plan_cached(g) for g in graphs], repeat=20)
+        rows.append(
+            (filename, len(graphs), num_nodes, f"{uncached:.3f}", f"{cached:.3f}")
+        )
+
+    report(
+        "Execution planning per run (ms)",
+        rows,
+        ("module", "graphs", "nodes", "rebuild", "compiled plan"),
+    )
+
+    rows = []
+    for filename in sorted(os.listdir(MODULE_DIR)):
+        graph, _ = load_graph_from_file(os.path.join(MODULE_DIR, filename))
+        graphs = collect_graphs(graph)
+        num_edges = sum(len(ids) for g in graphs for ids in g.edges.values())
+
+        scan = measure(
+            lambda: [set_socket_source_references_scan(g) for g in graphs], repeat=20
+        )
+        indexed = measure(
+            lambda: [g.set_socket_source_references() for g in graphs], repeat=20
+        )
+        rows.append((filename, num_edges, f"{scan:.3f}", f"{indexed:.3f}"))
+
+    report(
+        "set_socket_source_references per run (ms)",
+        rows,
+        ("module", "edges", "edge scan", "edge index"),
+    )
+
+
+if __name__ == "__main__":
+    main()
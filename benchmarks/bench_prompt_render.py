@@ -0,0 +1,93 @@
+"""
+Per-template load and render time of agent prompt templates.
+
+Compares a fresh jinja2 environment per call (how prompts used to be
+rendered) against the shared environments returned by `get_template_env`.
+"""
+
+import os
+
+import jinja2
+
+from common import measure, report
+
+from talemate.prompts.base import (
+    BASE_DIR,
+    Prompt,
+    get_template_env,
+)
+
+AGENT_TYPES = [
+    "conversation",
+    "creator",
+    "director",
+    "editor",
+    "narrator",
+    "summarizer",
+    "world_state",
+]
+
+
+def fresh_env(agent_type: str) -> jinja2.Environment:
+    shared = get_template_env(agent_type)
+    env = jinja2.Environment(loader=jinja2.FileSystemLoader(shared.loader.searchpath))
+    env.globals.update(shared.globals)
+    env.filters.update(shared.filters)
+    return env
+
+
+def list_templates(agent_type: str) -> list[str]:
+    path = os.path.join(BASE_DIR, "templates", agent_type)
+    return sorted(
+        filename for filename in os.listdir(path) if filename.endswith(".jinja2")
+    )
+
+
+def main():
+    rows = []
+    totals = [0.0, 0.0]
+    for agent_type in AGENT_TYPES:
+        for name in list_templates(agent_type):
+            uncached = measure(lambda: fresh_env(agent_type).get_template(name))
+            cached = measure(lambda: get_template_env(agent_type).get_template(name))
+            totals[0] += uncached
+            totals[1] += cached
+            rows.append((f"{agent_type}/{name}", f"{uncached:.3f}", f"{cached:.3f}"))
+
+    rows.append(("TOTAL", f"{totals[0]:.1f}", f"{totals[1]:.1f}"))
+    report("Template load (ms)", rows, ("template", "fresh env", "shared env"))
+
+    text = "\n".join(
+        f"{{% if n > {i} %}}Line {i}: {{{{ name }}}} {{{{ to_str(n) }}}}{{% endif %}}"
+        for i in range(200)
+    )
+
+    def render():
+        prompt = Prompt.from_text(text, vars={"name": "Elara", "n": 150})
+        prompt.dedupe_enabled = False
+        return prompt.render()
+
+    report(
+        "Prompt.from_text render (ms)",
+        [("200 line template", f"{measure(render, repeat=20):.3f}")],
+        ("template", "median"),
+    )
+
+    history = "\n".join(
+        f'Elara: "Line {i} of the scene, the caravan moves on." She looks back.'
+        for i in range(1500)
+    )
+    prompt = Prompt.from_text("", vars={"name": "Elara"})
+    prompt.dedupe_enabled = False
+    rows = []
+    for label, text in [
+        ("no markers", history),
+        ("with markers", history + "\n{!{ name }!} {!{ name|upper }!}"),
+    ]:
+        ms = measure(lambda: prompt.render_second_pass(text), repeat=20)
+        rows.append((label, len(text), f"{ms:.3f}"))
+    report("Prompt.render_second_pass (ms)", rows, ("prompt", "chars", "median"))
+
+
+if __name__ == "__main__":
+    main()
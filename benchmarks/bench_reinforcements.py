@@ -0,0 +1,123 @@
+"""
+End-of-turn latency of state reinforcement updates.
+
+Times `update_reinforcements` for a set of due reinforcements against a
+stub client that takes a fixed time per request. Compares one request per
+reinforcement, sent one at a time (how reinforcements used to be updated)
+against the same requests sent up to the client's concurrency limit at a
+time and against batched requests answering several reinforcements each.
+Memory agent calls are stubbed out, only request latency is measured.
+"""
+
+import asyncio
+import json
+import time
+
+from common import bootstrap_scene, report
+
+import talemate.instance as instance
+from talemate.character import Character
+from talemate.client.base import ClientBase
+from talemate.context import active_scene
+from talemate.scene_message import CharacterMessage
+from talemate.world_state import Reinforcement
+
+LATENCY = 0.05
+REINFORCEMENTS = 15
+
+
+class StubClient(ClientBase):
+    client_type = "stub"
+    data_format = "json"
+    max_token_length = 8192
+    max_concurrent_requests = 1
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = 0
+
+    async def send_prompt(self, prompt: str, kind: str = "conversation", **kwargs):
+        self.requests += 1
+        await asyncio.sleep(LATENCY)
+        if kind == "analyze_long":
+            return json.dumps(
+                {str(i): f"Answer {i}." for i in range(1, REINFORCEMENTS + 1)}
+            )
+        return "Elara is watching the road."
+
+
+class StubMemory:
+    async def query(self, *args, **kwargs):
+        return []
+
+    async def multi_query(self, *args, **kwargs):
+        return {}
+
+    async def add_many(self, *args, **kwargs):
+        pass
+
+    async def delete(self, *args, **kwargs):
+        pass
+
+
+def setup(concurrency: int, batch: bool):
+    scene = bootstrap_scene()
+    scene.active = True
+    instance.AGENTS["memory"] = StubMemory()
+
+    elara = Character(name="Elara", description="A caravan guard.")
+    scene.get_character = lambda name: elara if name == "Elara" else None
+
+    for i in range(50):
+        scene.history.append(CharacterMessage(f"Elara: Line {i} of the scene."))
+
+    scene.world_state.reinforce = [
+        Reinforcement(
+            question=f"What is Elara thinking about {i}?",
+            character="Elara",
+            insert="sequential" if i % 2 else "conversation-context",
+        )
+        for i in range(REINFORCEMENTS)
+    ]
+
+    client = StubClient()
+    client.max_concurrent_requests = concurrency
+
+    agent = instance.get_agent("world_state")
+    agent.client = client
+    agent.actions["update_reinforcements"].config["batch"].value = batch
+    agent.actions["update_reinforcements"].config["batch_size"].value = 5
+    return scene, agent
+
+
+async def run(scene, agent) -> float:
+    token = active_scene.set(scene)
+    try:
+        t0 = time.perf_counter()
+        await agent.update_reinforcements(force=True)
+        return (time.perf_counter() - t0) * 1000
+    finally:
+        active_scene.reset(token)
+
+
+def main():
+    rows = []
+    for name, concurrency, batch in (
+        ("sequential", 1, False),
+        ("concurrent (4)", 4, False),
+        ("batched (5)", 1, True),
+        ("batched (5), concurrent (4)", 4, True),
+    ):
+        scene, agent = setup(concurrency, batch)
+        elapsed = asyncio.run(run(scene, agent))
+        rows.append((name, agent.client.requests, f"{elapsed:.0f}"))
+
+    report(
+        f"Updating {REINFORCEMENTS} reinforcements ({LATENCY * 1000:.0f}ms per request)",
+        rows,
+        ("mode", "requests", "ms"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+History lookups on long scenes.
+
+Compares a linear scan of the history (how every lookup used to work)
+against the indexed `SceneHistory`, for lookups that have to walk far back:
+
+- message_index / get_message: a message from early in the scene, e.g.
+  when editing or deleting an old message from the frontend
+- last_message_of_type: a message type that is rare in the history
+- pop_history: removing the last director message, done on every push of
+  a new director message, followed by a lookup
+- append: cost of keeping the indexes current while the history grows
+"""
+
+from talemate.scene_message import (
+    CharacterMessage,
+    DirectorMessage,
+    NarratorMessage,
+    SceneHistory,
+)
+
+from common import bootstrap_scene, measure, report
+
+LOOKUPS = 100
+
+
+def message(i: int):
+    if i == 10:
+        return DirectorMessage("Keep the caravan moving.", source="Elara")
+    if i % 2:
+        return CharacterMessage(f"Elara: Line {i}, we should keep moving.")
+    return NarratorMessage(f"The caravan winds through the pass, step {i}.")
+
+
+def linear_index(history: list, message_id: int) -> int:
+    for idx in range(len(history) - 1, -1, -1):
+        if history[idx].id == message_id:
+            return idx
+    return -1
+
+
+def linear_last_of_type(history: list, typ: str):
+    for idx in range(len(history) - 1, -1, -1):
+        if history[idx].typ == typ:
+            return history[idx]
+
+
+def linear_pop(history: list, typ: str):
+    for idx in range(len(history) - 1, -1, -1):
+        if history[idx].typ == typ:
+            history.remove(history[idx])
+            return
+
+
+def main():
+    scene = bootstrap_scene()
+    rows = []
+    for num in (10000, 50000):
+        messages = [message(i) for i in range(num)]
+        target = messages[20].id
+        scene.history = list(messages)
+        plain = list(messages)
+
+        def index_linear():
+            for _ in range(LOOKUPS):
+                linear_index(plain, target)
+
+        def index_indexed():
+            for _ in range(LOOKUPS):
+                scene.message_index(target)
+
+        def type_linear():
+            for _ in range(LOOKUPS):
+                linear_last_of_type(plain, "director")
+
+        def type_indexed():
+            for _ in range(LOOKUPS):
+                scene.last_message_of_type("director")
+
+        def pop_linear():
+            linear_pop(plain, "director")
+            plain.append(messages[10])
+            linear_index(plain, target)
+
+        def pop_indexed():
+            scene.pop_history("director")
+            scene.history.append(messages[10])
+            scene.message_index(target)
+
+        def append_plain():
+            history = []
+            for m in messages:
+                history.append(m)
+
+        def append_indexed():
+            history = SceneHistory()
+            history.index_of(0)
+            for m in messages:
+                history.append(m)
+
+        rows.append(
+            (
+                num,
+                f"{measure(index_linear):.1f}",
+                f"{measure(index_indexed):.3f}",
+                f"{measure(type_linear):.1f}",
+                f"{measure(type_indexed):.3f}",
+                f"{measure(pop_linear):.2f}",
+                f"{measure(pop_indexed):.2f}",
+                f"{measure(append_plain):.1f}",
+                f"{measure(append_indexed):.1f}",
+            )
+        )
+
+    report(
+        f"History lookups (ms, {LOOKUPS} lookups per column)",
+        rows,
+        (
+            "messages",
+            "index scan",
+            "index map",
+            "type scan",
+            "type index",
+            "pop scan",
+            "pop index",
+            "append list",
+            "append indexed",
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Scene load time for large synthetic saves.
+
+Reports, per history size:
+- parse: stdlib `json.load` against `json_loads` (orjson when installed)
+- hydrate: building every scene message up front against the backscroll
+  first loader, split into the time until the backscroll has been emitted
+  and the event loop is free again, and the time until all history is built
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+import types
+
+from talemate.load import _load_history, _load_history_backscroll_first
+from talemate.save import json_loads, orjson
+
+from common import measure, report
+
+MAX_BACKSCROLL = 100
+
+LINE = (
+    'Elara: "The caravan will not wait for us past sundown, and the pass is '
+    'already thick with snow." She tightens the straps on her pack.'
+)
+NARRATION = (
+    "The wind howls across the ridge as the last light fades behind the peaks, "
+    "painting the valley below in shades of violet and ash."
+)
+
+
+def scene_data(num: int) -> dict:
+    history = []
+    for i in range(num):
+        if i % 3 == 2:
+            history.append(
+                {"message": NARRATION, "id": i, "typ": "narrator", "source": ""}
+            )
+        else:
+            history.append(
+                {"message": LINE, "id": i, "typ": "character", "source": "ai"}
+            )
+    return {"name": "Caravan", "history": history, "characters": []}
+
+
+def history_copy(data: dict) -> list[dict]:
+    # the loaders consume the entries
+    return [dict(entry) for entry in data["history"]]
+
+
+async def backscroll_first(history: list[dict]) -> tuple[float, float]:
+    scene = types.SimpleNamespace(max_backscroll=MAX_BACKSCROLL)
+    t0 = time.perf_counter()
+    ready = []
+
+    # runs as soon as the loader first hands control back to the event loop
+    asyncio.get_running_loop().call_soon(lambda: ready.append(time.perf_counter() - t0))
+    await _load_history_backscroll_first(scene, history, [])
+    return ready[0] * 1000, (time.perf_counter() - t0) * 1000
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    rows = []
+    for num in (10000, 50000):
+        data = scene_data(num)
+        path = os.path.join(tmp, f"scene-{num}.json")
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+        def parse_stdlib():
+            with open(path) as f:
+                json.load(f)
+
+        def parse_fast():
+            with open(path, "rb") as f:
+                json_loads(f.read())
+
+        copies = [history_copy(data) for _ in range(10)]
+        upfront = measure(lambda: _load_history(copies.pop()), repeat=5)
+        first, full = asyncio.run(backscroll_first(copies.pop()))
+
+        rows.append(
+            (
+                num,
+                f"{measure(parse_stdlib):.1f}",
+                f"{measure(parse_fast):.1f}",
+                f"{upfront:.1f}",
+                f"{first:.1f}",
+                f"{full:.1f}",
+            )
+        )
+
+    report(
+        f"Scene load (ms, orjson {'installed' if orjson else 'not installed'})",
+        rows,
+        (
+            "messages",
+            "parse stdlib",
+            "parse json_loads",
+            "hydrate upfront",
+            "backscroll ready",
+            "hydrate all",
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
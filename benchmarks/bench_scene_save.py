@@ -0,0 +1,95 @@
+"""
+Auto-save latency as the scene history grows.
+
+Each round appends one message and saves, comparing a full
+`json.dump(..., indent=2)` of the scene (how every save used to work)
+against the snapshot + journal writer. The journal is compacted into a new
+snapshot once it outgrows the snapshot, that cost is included in the
+median.
+"""
+
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from talemate.save import SceneEncoder, SceneJournal
+from talemate.scene_message import CharacterMessage, NarratorMessage
+
+from common import report
+
+ROUNDS = 50
+
+
+def message(i: int):
+    if i % 2:
+        return CharacterMessage(f"Elara: Line {i}, we should keep moving. " * 4, id=i)
+    return NarratorMessage(f"The caravan winds through the pass, step {i}. " * 4, id=i)
+
+
+def scene_data(num: int) -> dict:
+    return {
+        "name": "Caravan",
+        "history": [message(i) for i in range(num)],
+        "archived_history": [
+            {"text": f"Summary {i}. " * 20, "ts": f"PT{i}M", "id": f"a{i}"}
+            for i in range(num // 10)
+        ],
+        "layered_history": [],
+        "characters": [{"name": "Elara", "description": "A scout. " * 50}],
+        "agent_state": {},
+        "ts": "PT1H",
+    }
+
+
+def full_save(path: str, data: dict) -> list[float]:
+    timings = []
+    for i in range(ROUNDS):
+        data["history"].append(message(len(data["history"])))
+        t0 = time.perf_counter()
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2, cls=SceneEncoder)
+        timings.append((time.perf_counter() - t0) * 1000)
+    return timings
+
+
+async def journal_save(path: str, data: dict) -> list[float]:
+    journal = SceneJournal()
+    await journal.write(path, data)
+    timings = []
+    for i in range(ROUNDS):
+        data["history"].append(message(len(data["history"])))
+        t0 = time.perf_counter()
+        await journal.write(path, data)
+        timings.append((time.perf_counter() - t0) * 1000)
+    return timings
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    rows = []
+    for num in (1000, 5000, 20000):
+        full = full_save(os.path.join(tmp, "full.json"), scene_data(num))
+        journaled = asyncio.run(
+            journal_save(os.path.join(tmp, f"journal-{num}.json"), scene_data(num))
+        )
+        rows.append(
+            (
+                num,
+                f"{statistics.median(full):.1f}",
+                f"{statistics.median(journaled):.2f}",
+                f"{max(journaled):.1f}",
+            )
+        )
+
+    report(
+        "Auto-save latency (ms)",
+        rows,
+        ("messages", "full dump", "journal median", "journal max"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Cost of timestamp handling for archived history.
+
+- labels: one prompt build's worth of "x ago" labels for every archived
+  entry against the current scene time, parsing every timestamp each time
+  (the previous behaviour) against the memoized parse and label path
+- fix_time: `Scene.fix_time` on a history with a time passage message
+  every few messages
+"""
+
+import isodate
+
+from talemate.scene_message import NarratorMessage, TimePassageMessage
+from talemate.util import time as util_time
+
+from common import bootstrap_scene, measure, report
+
+CACHES = (
+    util_time.parse_duration,
+    util_time.iso8601_to_seconds,
+    util_time._seconds_to_human,
+)
+
+
+def timestamps(num: int) -> list[str]:
+    return [
+        isodate.duration_isoformat(isodate.Duration(hours=i * 7, minutes=i % 60))
+        for i in range(num)
+    ]
+
+
+def labels_uncached(entries: list[str], now: str):
+    for ts in entries:
+        for cache in CACHES:
+            cache.cache_clear()
+        util_time.iso8601_duration_to_human(util_time.iso8601_diff(ts, now))
+
+
+def labels_cached(entries: list[str], now: str):
+    for ts in entries:
+        util_time.iso8601_diff_to_human(ts, now)
+
+
+def populate(scene, num_messages: int):
+    scene.history = []
+    scene.archived_history = []
+    for i in range(num_messages):
+        if i % 5 == 4:
+            scene.history.append(TimePassageMessage(ts="PT2H", message="2 hours later"))
+        else:
+            scene.history.append(NarratorMessage(f"The caravan moves on, step {i}."))
+    for i in range(0, num_messages, 10):
+        scene.archived_history.append({"text": f"Entry {i}", "start": i, "end": i + 9})
+
+
+def main():
+    rows = []
+    for num in (1000, 5000):
+        entries = timestamps(num)
+        now = entries[-1]
+        uncached = measure(lambda: labels_uncached(entries, now))
+        labels_cached(entries, now)
+        cached = measure(lambda: labels_cached(entries, now))
+        rows.append((num, f"{uncached:.1f}", f"{cached:.2f}"))
+
+    report("Archive labels per prompt (ms)", rows, ("entries", "parse", "memoized"))
+
+    scene = bootstrap_scene()
+    rows = []
+    for num in (5000, 20000):
+        populate(scene, num)
+        rows.append((num, f"{measure(scene.fix_time):.1f}"))
+
+    report("Scene.fix_time (ms)", rows, ("messages", "fix_time"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Shared helpers for the benchmark scripts in this directory.
+
+Benchmarks are plain scripts and are not collected by pytest, run them
+directly, e.g. `python benchmarks/bench_context_history.py`
+"""
+
+import logging
+import statistics
+import time
+from typing import Callable
+
+import structlog
+
+import talemate.agents as agents
+import talemate.agents.tts.voice_library as voice_library
+import talemate.instance as instance
+from talemate.tale_mate import Scene
+
+__all__ = [
+    "bootstrap_scene",
+    "measure",
+    "report",
+]
+
+structlog.configure(
+    wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING),
+)
+
+
+def bootstrap_scene() -> Scene:
+    """
+    Creates an empty scene with all agents instantiated and attached
+    """
+    voice_library.VOICE_LIBRARY = voice_library.VoiceLibrary(voices={})
+    scene = Scene()
+    for agent_type, agent_cls in agents.AGENT_CLASSES.items():
+        agent = agent_cls()
+        agent.scene = scene
+        instance.AGENTS[agent_type] = agent
+    return scene
+
+
+def measure(fn: Callable, repeat: int = 5) -> float:
+    """
+    Runs `fn` `repeat` times and returns the median wall time in milliseconds
+    """
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(timings)
+
+
+def report(title: str, rows: list[tuple], headers: tuple):
+    """
+    Prints a simple aligned table
+    """
+    print(f"\n{title}")
+    widths = [
+        max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)
+    ]
+    print("  ".join(str(h).rjust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(c).rjust(w) for c, w in zip(row, widths)))
@@ -456,6 +456,15 @@ class Agent(ABC):
                 except AttributeError:
                     pass
 
+    async def destroy(self):
+        """
+        Called when talemate shuts down
+
+        Use this to release any resources the agent holds, e.g. open
+        connections.
+        """
+        pass
+
     async def save_config(self):
         """
         Saves the agent config to the config file.
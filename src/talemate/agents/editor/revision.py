@@ -34,7 +34,7 @@ from talemate.util.dedupe import (
     compile_text_to_sentences,
     split_sentences_on_comma,
     dedupe_sentences_from_matches,
-    similarity_matches,
+    batch_similarity_matches,
 )
 from talemate.util.diff import dmp_inline_diff
 from talemate.util import count_tokens
@@ -629,18 +629,13 @@ class RevisionMixin:
 
         compare_against: list[str] = await self.revision_collect_repetition_range()
 
-        matches = []
-
-        for old_text in compare_against:
-            matches.extend(
-                similarity_matches(
-                    text,
-                    old_text,
-                    similarity_threshold=self.revision_repetition_threshold,
-                    min_length=self.revision_repetition_min_length,
-                    split_on_comma=self.revision_split_on_comma,
-                )
-            )
+        matches = batch_similarity_matches(
+            text,
+            compare_against,
+            similarity_threshold=self.revision_repetition_threshold,
+            min_length=self.revision_repetition_min_length,
+            split_on_comma=self.revision_split_on_comma,
+        )
 
         return list(set(matches))
 
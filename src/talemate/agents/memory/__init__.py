@@ -3,6 +3,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 import asyncio
+import contextlib
 import functools
 import hashlib
 import traceback
@@ -28,6 +29,12 @@ from talemate.context import scene_is_loading, active_scene
 from talemate.emit import emit
 import talemate.emit.async_signals as async_signals
 from talemate.agents.memory.context import memory_request, MemoryRequest
+from talemate.agents.memory.embeddings import (
+    EMBEDDING_CACHE,
+    EMBEDDING_WORKER,
+    MODEL_REGISTRY,
+    SentenceTransformerEmbeddingFunction,
+)
 from talemate.agents.memory.exceptions import (
     EmbeddingsModelLoadError,
     SetDBError,
@@ -101,6 +108,25 @@ class MemoryAgent(Agent):
                             {"value": "cuda", "label": "CUDA"},
                         ],
                     ),
+                    "model_cache": AgentActionConfig(
+                        type="number",
+                        value=2048,
+                        label="Model cache (MB)",
+                        description="How much memory loaded local embeddings models may keep using after switching embeddings or scenes.",
+                        note="The model in use is always kept loaded. Other models are unloaded, least recently used first, once this is exceeded.",
+                        min=0,
+                        max=32768,
+                        step=256,
+                    ),
+                    "batch_size": AgentActionConfig(
+                        type="number",
+                        value=128,
+                        label="Import batch size",
+                        description="How many entries are embedded and stored at once when importing history and scene data into the memory database.",
+                        min=8,
+                        max=1024,
+                        step=8,
+                    ),
                 },
             ),
         }
@@ -210,6 +236,17 @@ class MemoryAgent(Agent):
     def device(self) -> str:
         return self.actions["_config"].config["device"].value
 
+    @property
+    def model_cache_size(self) -> int:
+        """
+        Memory cap for loaded local embeddings models in bytes
+        """
+        return int(self.actions["_config"].config["model_cache"].value) * 1024 * 1024
+
+    @property
+    def batch_size(self) -> int:
+        return int(self.actions["_config"].config["batch_size"].value)
+
     @property
     def trust_remote_code(self) -> bool:
         try:
@@ -234,6 +271,8 @@ class MemoryAgent(Agent):
 
         fingerprint_changed = _fingerprint != self.fingerprint
 
+        MODEL_REGISTRY.evict(self.model_cache_size)
+
         # have embeddings or device changed?
         if fingerprint_changed:
             log.warning(
@@ -428,7 +467,23 @@ class MemoryAgent(Agent):
         log.debug("memory agent add many", len=len(objects))
 
         loop = asyncio.get_running_loop()
-        await loop.run_in_executor(None, self._add_many, objects)
+        batch_size = self.batch_size
+        total = len(objects)
+
+        # embed and store in batches, reporting progress for larger imports
+        for start in range(0, total, batch_size):
+            if total > batch_size:
+                emit(
+                    "status",
+                    f"Importing into memory ({start}/{total})",
+                    status="busy",
+                )
+            await loop.run_in_executor(
+                None, self._add_many, objects[start : start + batch_size]
+            )
+
+        if total > batch_size:
+            emit("status", f"Imported {total} entries into memory", status="success")
 
     def _add_many(self, objects: list[dict]):
         """
@@ -469,6 +524,27 @@ class MemoryAgent(Agent):
     def _get(self, text, character=None, **query):
         raise NotImplementedError()
 
+    @set_processing
+    async def get_many(self, texts: list[str], character=None, **query):
+        """
+        Runs several queries against the memory at once
+
+        Returns one result list per text, in the same order.
+        """
+        with contextlib.ExitStack() as stack:
+            active_memory_requests = [
+                stack.enter_context(MemoryRequest(query=text, query_params=query))
+                for text in texts
+            ]
+            for active_memory_request in active_memory_requests:
+                active_memory_request.max_distance = self.max_distance
+            return await asyncio.to_thread(
+                self._get_many, texts, active_memory_requests, character, **query
+            )
+
+    def _get_many(self, texts, memory_requests, character=None, **query):
+        raise NotImplementedError()
+
     @set_processing
     async def get_document(self, id):
         loop = asyncio.get_running_loop()
@@ -480,9 +556,21 @@ class MemoryAgent(Agent):
     async def on_archive_add(self, event: events.ArchiveEvent):
         await self.add(event.text, uid=event.memory_id, ts=event.ts, typ="history")
 
+    async def on_archive_add_many(self, event: events.ArchiveManyEvent):
+        objects = []
+        for entry in event.entries:
+            if not entry.text:
+                continue
+            meta = {"character": "__narrator__", "typ": "history"}
+            if entry.ts:
+                meta["ts"] = entry.ts
+            objects.append({"id": entry.memory_id, "text": entry.text, "meta": meta})
+        await self.add_many(objects)
+
     def connect(self, scene):
         super().connect(scene)
         async_signals.get("archive_add").connect(self.on_archive_add)
+        async_signals.get("archive_add_many").connect(self.on_archive_add_many)
 
     async def memory_context(
         self,
@@ -496,6 +584,7 @@ class MemoryAgent(Agent):
         """
 
         memory_context = []
+        budget = util.TokenBudget(max_tokens)
 
         if not query:
             return memory_context
@@ -508,8 +597,9 @@ class MemoryAgent(Agent):
                 continue
 
             memory_context.append(memory)
+            budget.consume(memory)
 
-            if util.count_tokens(memory_context) >= max_tokens:
+            if budget.exhausted:
                 break
         return memory_context
 
@@ -556,6 +646,13 @@ class MemoryAgent(Agent):
 
         per_query_results: list[list[str]] = []
 
+        # Fetch potential memories for all non-empty queries in one go, so
+        # they share a single embedding call and vector search.
+        texts = [formatter(query) for query in queries if query]
+        fetched = iter(
+            await self.get_many(texts, limit=limit, **where) if texts else []
+        )
+
         for query in queries:
             # Skip empty queries so that we keep indexing consistent for the
             # round-robin step that follows.
@@ -563,8 +660,7 @@ class MemoryAgent(Agent):
                 per_query_results.append([])
                 continue
 
-            # Fetch potential memories for this query.
-            raw_results = await self.get(formatter(query), limit=limit, **where)
+            raw_results = next(fetched)
 
             # Apply filter and respect the `iterate` limit for this query.
             accepted: list[str] = []
@@ -583,6 +679,7 @@ class MemoryAgent(Agent):
         # budget.
 
         memory_context: list[str] = []
+        budget = util.TokenBudget(max_tokens)
         idx = 0
         while True:
             added_any = False
@@ -599,10 +696,11 @@ class MemoryAgent(Agent):
                     continue
 
                 memory_context.append(memory)
+                budget.consume(memory)
                 added_any = True
 
                 # Check token budget after each addition.
-                if util.count_tokens(memory_context) >= max_tokens:
+                if budget.exhausted:
                     return memory_context
 
             if not added_any:
@@ -619,6 +717,27 @@ class MemoryAgent(Agent):
     def embedding_function(self) -> Callable:
         raise NotImplementedError()
 
+    def embed(self, texts: list[str]) -> list[np.ndarray]:
+        """
+        Embeds `texts` with the current embedding function, serving
+        previously embedded texts from the embedding cache.
+
+        Blocks until the embedding worker is done, only call this from
+        executor threads. Use `aembed` on the event loop.
+        """
+        return EMBEDDING_WORKER.embed_sync(
+            self.fingerprint, texts, self.embedding_function
+        )
+
+    async def aembed(self, texts: list[str]) -> list[np.ndarray]:
+        """
+        Async variant of `embed`, runs on the embedding worker without
+        blocking the event loop.
+        """
+        return await EMBEDDING_WORKER.embed(
+            self.fingerprint, texts, self.embedding_function
+        )
+
     async def compare_strings(self, string1: str, string2: str) -> dict:
         """
         Compare two strings using the current embedding function without touching the database.
@@ -626,11 +745,8 @@ class MemoryAgent(Agent):
         Returns a dictionary with 'cosine_similarity' and 'euclidean_distance'.
         """
 
-        embed_fn = self.embedding_function
-
         # Embed the two strings
-        vec1 = np.array(embed_fn([string1])[0])
-        vec2 = np.array(embed_fn([string2])[0])
+        vec1, vec2 = await self.aembed([string1, string2])
 
         # Compute cosine similarity
         cosine_sim = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
@@ -656,14 +772,8 @@ class MemoryAgent(Agent):
             - 'similarity_matches': list of (i, j, score) (filtered if threshold set, otherwise all)
             - 'distance_matches': list of (i, j, distance) (filtered if threshold set, otherwise all)
         """
-        if (
-            not self.db
-            or not hasattr(self.db, "_embedding_function")
-            or self.db._embedding_function is None
-        ):
-            raise RuntimeError(
-                "Embedding function is not initialized. Make sure the database is set."
-            )
+        # raises if the embedding function is not initialized
+        self.embedding_function
 
         if not list_a or not list_b:
             return {
@@ -673,11 +783,10 @@ class MemoryAgent(Agent):
                 "distance_matches": [],
             }
 
-        embed_fn = self.db._embedding_function
-
         # Batch embed all strings
-        embeddings_a = embed_fn(list_a)
-        embeddings_b = embed_fn(list_b)
+        embeddings = await self.aembed(list_a + list_b)
+        embeddings_a = embeddings[: len(list_a)]
+        embeddings_b = embeddings[len(list_a) :]
 
         vecs_a = np.array(embeddings_a)  # shape: (len(list_a), embedding_dim)
         vecs_b = np.array(embeddings_b)  # shape: (len(list_b), embedding_dim)
@@ -808,6 +917,13 @@ class ChromaDBMemoryAgent(MemoryAgent):
                 description="The device to use for embeddings.",
             ).model_dump()
 
+        if EMBEDDING_CACHE.hits or EMBEDDING_CACHE.misses:
+            details["embedding_cache"] = AgentDetail(
+                icon="mdi-cached",
+                value=f"{EMBEDDING_CACHE.hit_rate:.0%} cached",
+                description=f"Embedding cache: {EMBEDDING_CACHE.hits} hits, {EMBEDDING_CACHE.misses} misses",
+            ).model_dump()
+
         if self.embeddings == "openai" and not self.openai_api_key:
             # return "No OpenAI API key set"
             details["error"] = {
@@ -973,10 +1089,14 @@ class ChromaDBMemoryAgent(MemoryAgent):
                 device=device,
             )
 
-            ef = embedding_functions.InstructorEmbeddingFunction(
-                model_name=model_name,
-                device=device,
-                instruction="Represent the document for retrieval:",
+            ef = MODEL_REGISTRY.get(
+                ("instructor", model_name, device, False),
+                lambda: embedding_functions.InstructorEmbeddingFunction(
+                    model_name=model_name,
+                    device=device,
+                    instruction="Represent the document for retrieval:",
+                ),
+                self.model_cache_size,
             )
 
             log.info("chromadb", status="embedding function ready")
@@ -994,10 +1114,15 @@ class ChromaDBMemoryAgent(MemoryAgent):
             )
 
             try:
-                ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-                    model_name=model_name,
-                    trust_remote_code=self.trust_remote_code,
-                    device=device,
+                trust_remote_code = self.trust_remote_code
+                ef = MODEL_REGISTRY.get(
+                    ("sentence-transformer", model_name, device, trust_remote_code),
+                    lambda: SentenceTransformerEmbeddingFunction(
+                        model_name=model_name,
+                        trust_remote_code=trust_remote_code,
+                        device=device,
+                    ),
+                    self.model_cache_size,
                 )
             except ValueError as e:
                 if "`trust_remote_code=True` to remove this error" in str(e):
@@ -1105,7 +1230,12 @@ class ChromaDBMemoryAgent(MemoryAgent):
 
         # log.debug("chromadb agent add", text=text, meta=meta, id=id)
 
-        self.db.upsert(documents=[text], metadatas=metadatas, ids=ids)
+        self.db.upsert(
+            documents=[text],
+            embeddings=self.embed([text]),
+            metadatas=metadatas,
+            ids=ids,
+        )
 
     def _add_many(self, objects: list[dict]):
         documents = []
@@ -1140,7 +1270,12 @@ class ChromaDBMemoryAgent(MemoryAgent):
             uid = obj.get("id", f"{character}-{self.memory_tracker[character]}")
             ids.append(uid)
 
-        self.db.upsert(documents=documents, metadatas=metadatas, ids=ids)
+        self.db.upsert(
+            documents=documents,
+            embeddings=self.embed(documents),
+            metadatas=metadatas,
+            ids=ids,
+        )
 
     def _delete(self, meta: dict):
         if "ids" in meta:
@@ -1158,6 +1293,21 @@ class ChromaDBMemoryAgent(MemoryAgent):
         log.debug("chromadb agent delete", meta=meta, where=where)
 
     def _get(self, text, character=None, limit: int = 15, **kwargs):
+        return self._get_many(
+            [text], [memory_request.get()], character, limit=limit, **kwargs
+        )[0]
+
+    def _get_many(
+        self,
+        texts: list[str],
+        memory_requests: list,
+        character=None,
+        limit: int = 15,
+        **kwargs,
+    ) -> list[list[MemoryDocument]]:
+        if not texts:
+            return []
+
         where = {}
 
         # this doesn't work because chromadb currently doesn't match
@@ -1182,13 +1332,36 @@ class ChromaDBMemoryAgent(MemoryAgent):
         elif not where["$and"]:
             where = None
 
-        log.debug("crhomadb agent get", text=text, where=where)
+        log.debug("crhomadb agent get", texts=texts, where=where)
 
+        # all queries are embedded and searched by chromadb in one go
         try:
-            _results = self.db.query(query_texts=[text], where=where, n_results=limit)
+            _results = self.db.query(
+                query_embeddings=self.embed(texts), where=where, n_results=limit
+            )
         except Exception as e:
             log.error("chromadb agent", error="failed to query", details=e)
-            return []
+            return [[] for _ in texts]
+
+        return [
+            self._collect_results(_results, index, text, active_memory_request, limit)
+            for index, (text, active_memory_request) in enumerate(
+                zip(texts, memory_requests)
+            )
+        ]
+
+    def _collect_results(
+        self,
+        _results: dict,
+        index: int,
+        text: str,
+        active_memory_request,
+        limit: int,
+    ) -> list[MemoryDocument]:
+        """
+        Turns the chromadb results for the query at `index` into memory
+        documents, dropping anything further away than `max_distance`
+        """
 
         # import json
         # print(json.dumps(_results["ids"], indent=2))
@@ -1200,13 +1373,11 @@ class ChromaDBMemoryAgent(MemoryAgent):
 
         closest = None
 
-        active_memory_request = memory_request.get()
-
-        for i in range(len(_results["distances"][0])):
-            distance = _results["distances"][0][i]
+        for i in range(len(_results["distances"][index])):
+            distance = _results["distances"][index][i]
 
-            doc = _results["documents"][0][i]
-            meta = _results["metadatas"][0][i]
+            doc = _results["documents"][index][i]
+            meta = _results["metadatas"][index][i]
 
             active_memory_request.add_result(doc, distance, meta)
 
@@ -1231,7 +1402,7 @@ class ChromaDBMemoryAgent(MemoryAgent):
                 if date_prefix:
                     doc = f"{date_prefix}: {doc}"
 
-                doc = MemoryDocument(doc, meta, _results["ids"][0][i], raw)
+                doc = MemoryDocument(doc, meta, _results["ids"][index][i], raw)
 
                 results.append(doc)
                 active_memory_request.accept_result(str(doc), distance, meta)
@@ -0,0 +1,346 @@
+"""
+Process wide registry of loaded local embedding models and a persistent
+cache of computed embeddings.
+
+Loading a sentence-transformer or instructor model reads hundreds of MB of
+weights from disk, so loaded embedding functions are kept warm across scene
+loads and embeddings changes and only evicted (least recently used first)
+once they exceed the configured memory cap.
+
+Embeddings themselves are cached on disk keyed by the embeddings
+fingerprint and a digest of the text, since the same history, character
+and world state text gets embedded again on every memory re-import.
+
+All embedding computation runs on a single dedicated worker thread, so a
+local model never blocks the event loop and is never called from two
+threads at once.
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Any, Callable
+
+import numpy as np
+import structlog
+
+try:
+    from chromadb.utils import embedding_functions
+except ImportError:
+    embedding_functions = None
+
+__all__ = [
+    "EmbeddingCache",
+    "EMBEDDING_CACHE",
+    "EmbeddingModelRegistry",
+    "EmbeddingWorker",
+    "EMBEDDING_WORKER",
+    "MODEL_REGISTRY",
+    "SentenceTransformerEmbeddingFunction",
+    "model_size",
+]
+
+log = structlog.get_logger("talemate.agents.memory.embeddings")
+
+# next to chromadb's default persistent storage
+EMBEDDING_CACHE_PATH = os.path.join("chroma", "embedding_cache.sqlite3")
+
+# sqlite's default limit on host parameters is 999
+SQLITE_BATCH_SIZE = 500
+
+
+def model_size(embedding_function: Any) -> int:
+    """
+    Approximate memory use of an embedding function's model in bytes.
+
+    Returns 0 if the embedding function has no torch model to measure.
+    """
+    model = getattr(embedding_function, "_model", None)
+    try:
+        return sum(p.numel() * p.element_size() for p in model.parameters())
+    except (AttributeError, TypeError):
+        return 0
+
+
+class EmbeddingModelRegistry:
+    """
+    LRU cache of loaded embedding functions keyed by
+    (embeddings, model, device, trust_remote_code).
+
+    The most recently used model is always kept, even if it exceeds the
+    cap on its own.
+
+    Thread safe, models are loaded from the executor in `_set_db`.
+    """
+
+    def __init__(self):
+        self.models: collections.OrderedDict[tuple, Any] = collections.OrderedDict()
+        self.sizes: dict[tuple, int] = {}
+        self.lock = threading.RLock()
+
+    @property
+    def size(self) -> int:
+        return sum(self.sizes.values())
+
+    def get(self, key: tuple, loader: Callable[[], Any], max_bytes: int) -> Any:
+        """
+        Returns the embedding function for `key`, calling `loader` to
+        create it if it is not loaded yet.
+        """
+        with self.lock:
+            if key in self.models:
+                self.models.move_to_end(key)
+                return self.models[key]
+
+            log.info("loading embeddings model", key=key)
+            embedding_function = loader()
+            self.models[key] = embedding_function
+            self.sizes[key] = model_size(embedding_function)
+            self.evict(max_bytes)
+            return embedding_function
+
+    def evict(self, max_bytes: int):
+        """
+        Unloads least recently used models until the loaded models fit
+        into `max_bytes`.
+        """
+        with self.lock:
+            while len(self.models) > 1 and self.size > max_bytes:
+                key, _ = self.models.popitem(last=False)
+                log.info(
+                    "unloading embeddings model", key=key, size=self.sizes.pop(key)
+                )
+
+    def clear(self):
+        with self.lock:
+            self.models.clear()
+            self.sizes.clear()
+
+
+MODEL_REGISTRY = EmbeddingModelRegistry()
+
+
+def text_digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    On-disk cache of embeddings keyed by (embeddings fingerprint, text digest)
+
+    Vectors are stored as float32. The database is opened lazily on first
+    use and can be used from executor threads.
+
+    Args:
+        path (str): Path of the sqlite database.
+    """
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "fingerprint TEXT NOT NULL, "
+                "digest TEXT NOT NULL, "
+                "vector BLOB NOT NULL, "
+                "PRIMARY KEY (fingerprint, digest))"
+            )
+        return self._db
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get_many(self, fingerprint: str, texts: list[str]) -> list[np.ndarray | None]:
+        """
+        Cached embeddings for `texts`, None where a text is not cached.
+        """
+        digests = [text_digest(text) for text in texts]
+        found = {}
+        with self.lock:
+            unique = list(dict.fromkeys(digests))
+            for i in range(0, len(unique), SQLITE_BATCH_SIZE):
+                batch = unique[i : i + SQLITE_BATCH_SIZE]
+                rows = self.db.execute(
+                    "SELECT digest, vector FROM embeddings "
+                    f"WHERE fingerprint = ? AND digest IN ({','.join('?' * len(batch))})",
+                    [fingerprint, *batch],
+                )
+                for digest, vector in rows:
+                    found[digest] = np.frombuffer(vector, dtype=np.float32)
+
+            vectors = [found.get(digest) for digest in digests]
+            hits = sum(vector is not None for vector in vectors)
+            self.hits += hits
+            self.misses += len(vectors) - hits
+        return vectors
+
+    def put_many(self, fingerprint: str, embeddings: dict[str, np.ndarray]):
+        """
+        Stores embeddings given as a text -> vector mapping.
+        """
+        rows = [
+            (
+                fingerprint,
+                text_digest(text),
+                np.asarray(vector, dtype=np.float32).tobytes(),
+            )
+            for text, vector in embeddings.items()
+        ]
+        with self.lock:
+            with self.db:
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows
+                )
+
+    def embed(
+        self, fingerprint: str, texts: list[str], embed_fn: Callable
+    ) -> list[np.ndarray]:
+        """
+        Embeddings for `texts`, calling `embed_fn` once for the unique
+        texts that are not cached yet.
+        """
+        vectors = self.get_many(fingerprint, texts)
+        missing = list(
+            dict.fromkeys(text for text, v in zip(texts, vectors) if v is None)
+        )
+        if not missing:
+            return vectors
+
+        computed = {
+            text: np.asarray(vector, dtype=np.float32)
+            for text, vector in zip(missing, embed_fn(missing))
+        }
+        self.put_many(fingerprint, computed)
+        return [
+            computed[text] if vector is None else vector
+            for text, vector in zip(texts, vectors)
+        ]
+
+
+EMBEDDING_CACHE = EmbeddingCache()
+
+
+class EmbeddingWorker:
+    """
+    Runs embedding calls (through the embedding cache) on a dedicated thread
+
+    Async requests go through a bounded queue. Requests that pile up while
+    the worker is busy are coalesced into a single embedding call per
+    embeddings fingerprint.
+
+    Args:
+        cache (EmbeddingCache): Cache to embed through.
+        max_pending (int): Queue size, callers wait once it is full.
+    """
+
+    def __init__(self, cache: EmbeddingCache, max_pending: int = 64):
+        self.cache = cache
+        self.max_pending = max_pending
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="talemate-embeddings"
+        )
+        self.coalesced = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    def embed_sync(
+        self, fingerprint: str, texts: list[str], embed_fn: Callable
+    ) -> list[np.ndarray]:
+        """
+        Blocking variant for code that already runs in an executor thread.
+        """
+        if not texts:
+            return []
+        return self.executor.submit(
+            self.cache.embed, fingerprint, texts, embed_fn
+        ).result()
+
+    async def embed(
+        self, fingerprint: str, texts: list[str], embed_fn: Callable
+    ) -> list[np.ndarray]:
+        if not texts:
+            return []
+
+        loop = asyncio.get_running_loop()
+
+        # the queue and its consumer belong to a single event loop
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._task = loop.create_task(self._run(self._queue))
+
+        future = loop.create_future()
+        await self._queue.put((fingerprint, list(texts), embed_fn, future))
+        return await future
+
+    async def _run(self, queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            requests = [await queue.get()]
+            while not queue.empty():
+                requests.append(queue.get_nowait())
+
+            groups: dict[tuple[str, int], list] = {}
+            for request in requests:
+                fingerprint, _, embed_fn, _ = request
+                groups.setdefault((fingerprint, id(embed_fn)), []).append(request)
+
+            for group in groups.values():
+                fingerprint, _, embed_fn, _ = group[0]
+                texts = [text for request in group for text in request[1]]
+                self.coalesced += len(group) - 1
+                try:
+                    vectors = await loop.run_in_executor(
+                        self.executor, self.cache.embed, fingerprint, texts, embed_fn
+                    )
+                except Exception as exc:
+                    for *_, future in group:
+                        if not future.done():
+                            future.set_exception(exc)
+                    continue
+
+                offset = 0
+                for _, request_texts, _, future in group:
+                    if not future.done():
+                        future.set_result(vectors[offset : offset + len(request_texts)])
+                    offset += len(request_texts)
+
+
+EMBEDDING_WORKER = EmbeddingWorker(EMBEDDING_CACHE)
+
+
+if embedding_functions:
+
+    class SentenceTransformerEmbeddingFunction(
+        embedding_functions.SentenceTransformerEmbeddingFunction
+    ):
+        """
+        chromadb keeps every sentence-transformer model it loads in a class
+        level dict keyed by model name alone, which ignores the device and
+        never releases memory. Keep the model on the instance instead and let
+        `MODEL_REGISTRY` take care of sharing it.
+        """
+
+        def __init__(self, *args, **kwargs):
+            self.models = {}
+            super().__init__(*args, **kwargs)
+
+else:
+    SentenceTransformerEmbeddingFunction = None
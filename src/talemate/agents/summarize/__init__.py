@@ -55,6 +55,18 @@ class BuildArchiveEmission(AgentEmission):
     generation_options: GenerationOptions | None = None
 
 
+@dataclasses.dataclass
+class ArchivePlan:
+    """
+    The scene history range the next archive entry will summarize
+    """
+
+    start: int
+    end: int
+    ts: str
+    dialogue_entries: list = dataclasses.field(default_factory=list)
+
+
 @dataclasses.dataclass
 class SummarizeEmission(AgentTemplateEmission):
     text: str = ""
@@ -230,8 +242,32 @@ class SummarizeAgent(
     async def build_archive(
         self, scene, generation_options: GenerationOptions | None = None
     ):
-        end = None
+        emission = await self.start_build_archive(generation_options)
+
+        if not emission:
+            return
+
+        plan = await self.plan_archive_entry(scene)
 
+        if not plan:
+            # nothing to archive yet
+            return
+
+        summarized = await self.summarize_archive_entry(
+            scene, plan, generation_options=generation_options
+        )
+
+        await self.commit_archive_entry(scene, plan, summarized, emission)
+
+        return True
+
+    async def start_build_archive(
+        self, generation_options: GenerationOptions | None = None
+    ) -> BuildArchiveEmission | None:
+        """
+        Sends the before_build_archive signal, returns the emission to pass on
+        to `commit_archive_entry` or None if archiving is disabled
+        """
         emission = BuildArchiveEmission(
             agent=self,
             generation_options=generation_options,
@@ -242,11 +278,33 @@ class SummarizeAgent(
         ).send(emission)
 
         if not self.actions["archive"].enabled:
-            return
+            return None
+
+        return emission
+
+    async def plan_archive_entry(
+        self, scene, previous: ArchivePlan | None = None
+    ) -> ArchivePlan | None:
+        """
+        Determines the range of the scene history that goes into the next
+        archive entry.
+
+        Continues after the most recent archive entry, or after `previous`
+        if given, which allows planning ahead of entries that have not
+        been committed yet.
 
-        if not scene.archived_history:
+        Returns None if there is nothing to archive yet.
+        """
+        end = None
+
+        if previous:
+            start = previous.end + 1
+            recent_entry = previous
+            ts = previous.ts
+        elif not scene.archived_history:
             start = 0
             recent_entry = None
+            ts = "PT0S"
         else:
             recent_entry = scene.archived_history[-1]
             if "end" not in recent_entry:
@@ -255,34 +313,16 @@ class SummarizeAgent(
                 start = 0
             else:
                 start = recent_entry.get("end", 0) + 1
-
-        # if there is a recent entry we also collect the 3 most recentries
-        # as extra context
-
-        num_previous = self.actions["archive"].config["include_previous"].value
-        if recent_entry and num_previous > 0:
-            if self.layered_history_available:
-                extra_context = self.compile_layered_history(include_base_layer=True)
-            else:
-                extra_context = [
-                    entry["text"] for entry in scene.archived_history[-num_previous:]
-                ]
-
-        else:
-            extra_context = None
+            ts = recent_entry.get("ts", "PT0S")
 
         tokens = 0
         dialogue_entries = []
-        ts = "PT0S"
         time_passage_termination = False
 
         token_threshold = self.actions["archive"].config["threshold"].value
 
         log.debug("build_archive", start=start, recent_entry=recent_entry)
 
-        if recent_entry:
-            ts = recent_entry.get("ts", ts)
-
         # we ignore the most recent entry, as the user may still chose to
         # regenerate it
         for i in range(start, max(start, len(scene.history) - 1)):
@@ -326,7 +366,7 @@ class SummarizeAgent(
 
         if end is None:
             # nothing to archive yet
-            return
+            return None
 
         log.debug(
             "build_archive",
@@ -371,6 +411,40 @@ class SummarizeAgent(
                         adjusted_dialogue=adjusted_dialogue,
                     )
 
+        return ArchivePlan(
+            start=start, end=end, ts=ts, dialogue_entries=dialogue_entries
+        )
+
+    async def summarize_archive_entry(
+        self,
+        scene,
+        plan: ArchivePlan,
+        generation_options: GenerationOptions | None = None,
+    ) -> str:
+        """
+        Summarizes the dialogue of a planned archive entry, using the archive
+        entries committed so far as extra context.
+        """
+
+        # if there is a recent entry we also collect the 3 most recentries
+        # as extra context
+
+        recent_entry = scene.archived_history[-1] if scene.archived_history else None
+
+        num_previous = self.actions["archive"].config["include_previous"].value
+        if recent_entry and num_previous > 0:
+            if self.layered_history_available:
+                extra_context = self.compile_layered_history(include_base_layer=True)
+            else:
+                extra_context = [
+                    entry["text"] for entry in scene.archived_history[-num_previous:]
+                ]
+
+        else:
+            extra_context = None
+
+        dialogue_entries = list(plan.dialogue_entries)
+
         if dialogue_entries:
             if not extra_context:
                 # prepend scene intro to dialogue
@@ -393,23 +467,34 @@ class SummarizeAgent(
         else:
             # AI has likely identified the first line as a scene change, so we can't summarize
             # just use the first line
-            summarized = str(scene.history[start])
+            summarized = str(scene.history[plan.start])
+
+        return summarized
+
+    async def commit_archive_entry(
+        self,
+        scene,
+        plan: ArchivePlan,
+        summarized: str,
+        emission: BuildArchiveEmission,
+    ):
+        """
+        Adds the summarized archive entry to the scene
+        """
 
         # determine the appropariate timestamp for the summarization
 
         await scene.push_archive(
-            ArchiveEntry(text=summarized, start=start, end=end, ts=ts)
+            ArchiveEntry(text=summarized, start=plan.start, end=plan.end, ts=plan.ts)
         )
 
-        scene.ts = ts
+        scene.ts = plan.ts
         scene.emit_status()
 
         await talemate.emit.async_signals.get(
             "agent.summarization.after_build_archive"
         ).send(emission)
 
-        return True
-
     @set_processing
     async def analyze_dialoge(self, dialogue):
         response = await Prompt.request(
@@ -14,6 +14,7 @@ from talemate.emit import emit
 from talemate.context import handle_generation_cancelled
 from talemate.history import LayeredArchiveEntry, HistoryEntry, entry_contained
 import talemate.util as util
+from talemate.util.async_tools import run_ordered
 
 if TYPE_CHECKING:
     from talemate.agents.summarize import BuildArchiveEmission
@@ -196,17 +197,14 @@ class LayeredHistoryMixin:
 
         while current_chunk:
             partial_chunk = []
+            partial_tokens = 0
             max_process_tokens = self.layered_history_max_process_tokens
 
             # Build partial chunk up to max_process_tokens
-            while (
-                current_chunk
-                and util.count_tokens(
-                    "\n\n".join(chunk["text"] for chunk in partial_chunk)
-                )
-                < max_process_tokens
-            ):
-                partial_chunk.append(current_chunk.pop(0))
+            while current_chunk and partial_tokens < max_process_tokens:
+                chunk = current_chunk.pop(0)
+                partial_chunk.append(chunk)
+                partial_tokens += util.count_entry_tokens(chunk)
 
             text_to_summarize = "\n\n".join(chunk["text"] for chunk in partial_chunk)
 
@@ -263,6 +261,45 @@ class LayeredHistoryMixin:
 
         return ts, ts_start, ts_end
 
+    def _lh_plan_chunks(
+        self, source_layer: list[dict], start_from: int
+    ) -> list[tuple[int, int, list[dict]]]:
+        """
+        Splits the source layer, from `start_from` on, into the chunks that
+        are ready to be summarized into the next layer.
+
+        Returns a list of (start, end, entries). The trailing entries that do
+        not reach the token threshold yet are left for a later run.
+        """
+        token_threshold = self.layered_history_threshold
+
+        chunks = []
+        current_chunk = []
+        current_tokens = 0
+        start_index = start_from
+
+        for i in range(start_from, len(source_layer)):
+            entry = source_layer[i]
+            entry_tokens = util.count_entry_tokens(entry)
+
+            if current_tokens + entry_tokens > token_threshold and current_chunk:
+                chunks.append((start_index, i, current_chunk))
+                current_chunk = []
+                current_tokens = 0
+                start_index = i
+
+            current_chunk.append(entry)
+            current_tokens += entry_tokens
+
+        log.debug(
+            "_lh_plan_chunks",
+            chunks=len(chunks),
+            tokens=current_tokens,
+            threshold=token_threshold,
+        )
+
+        return chunks
+
     async def _lh_finalize_archive_entry(
         self,
         entry: LayeredArchiveEntry,
@@ -454,104 +491,92 @@ class LayeredHistoryMixin:
         layered_history = self.scene.layered_history
 
         async def summarize_layer(source_layer, next_layer_index, start_from) -> bool:
-            current_chunk = []
-            current_tokens = 0
-            start_index = start_from
-            noop = True
-
-            total_tokens_in_previous_layer = util.count_tokens(
-                [entry["text"] for entry in source_layer]
-            )
-            estimated_entries = total_tokens_in_previous_layer // token_threshold
+            chunks = self._lh_plan_chunks(source_layer, start_from)
 
-            for i in range(start_from, len(source_layer)):
-                entry = source_layer[i]
-                entry_tokens = util.count_tokens(entry["text"])
+            if not chunks:
+                return False
 
+            try:
+                # check if the next layer exists
+                next_layer = layered_history[next_layer_index]
+            except IndexError:
+                # create the next layer
+                layered_history.append([])
                 log.debug(
                     "summarize_to_layered_history",
-                    entry=entry["text"][:100] + "...",
-                    tokens=entry_tokens,
-                    current_layer=next_layer_index - 1,
+                    created_layer=next_layer_index,
                 )
+                next_layer = layered_history[next_layer_index]
 
-                if current_tokens + entry_tokens > token_threshold:
-                    if current_chunk:
-                        try:
-                            # check if the next layer exists
-                            next_layer = layered_history[next_layer_index]
-                        except IndexError:
-                            # create the next layer
-                            layered_history.append([])
-                            log.debug(
-                                "summarize_to_layered_history",
-                                created_layer=next_layer_index,
-                            )
-                            next_layer = layered_history[next_layer_index]
-
-                        ts, ts_start, ts_end = self._lh_extract_timestamps(
-                            current_chunk
-                        )
+            total_tokens_in_previous_layer = sum(
+                util.count_entry_tokens(entry) for entry in source_layer
+            )
+            estimated_entries = total_tokens_in_previous_layer // token_threshold
 
-                        extra_context = self._lh_build_extra_context(next_layer_index)
+            async def summarize_chunk(chunk: tuple[int, int, list[dict]]) -> list[str]:
+                _, _, entries = chunk
 
-                        text_length = util.count_tokens(
-                            "\n\n".join(chunk["text"] for chunk in current_chunk)
-                        )
+                # built when the chunk is started, so it holds every chunk
+                # that has been committed to the layer so far
+                extra_context = self._lh_build_extra_context(next_layer_index)
 
-                        num_entries_in_layer = len(layered_history[next_layer_index])
+                text_length = util.count_tokens(
+                    "\n\n".join(entry["text"] for entry in entries)
+                )
 
-                        emit(
-                            "status",
-                            status="busy",
-                            message=f"Updating layered history - layer {next_layer_index} - {num_entries_in_layer} / {estimated_entries}",
-                            data={"cancellable": True},
-                        )
+                emit(
+                    "status",
+                    status="busy",
+                    message=f"Updating layered history - layer {next_layer_index} - {len(next_layer)} / {estimated_entries}",
+                    data={"cancellable": True},
+                )
 
-                        summaries = await self._lh_split_and_summarize_chunks(
-                            current_chunk,
-                            extra_context,
-                            generation_options=generation_options,
-                        )
-                        noop = False
-
-                        # validate summary length
-                        self._lh_validate_summary_length(summaries, text_length)
-
-                        next_layer.append(
-                            LayeredArchiveEntry(
-                                **{
-                                    "start": start_index,
-                                    "end": i,
-                                    "ts": ts,
-                                    "ts_start": ts_start,
-                                    "ts_end": ts_end,
-                                    "text": "\n\n".join(summaries),
-                                }
-                            ).model_dump(exclude_none=True)
-                        )
+                summaries = await self._lh_split_and_summarize_chunks(
+                    entries,
+                    extra_context,
+                    generation_options=generation_options,
+                )
 
-                        emit(
-                            "status",
-                            status="busy",
-                            message=f"Updating layered history - layer {next_layer_index} - {num_entries_in_layer + 1} / {estimated_entries}",
-                        )
+                # validate summary length
+                self._lh_validate_summary_length(summaries, text_length)
 
-                        current_chunk = []
-                        current_tokens = 0
-                        start_index = i
+                return summaries
 
-                current_chunk.append(entry)
-                current_tokens += entry_tokens
+            async def commit_chunk(
+                chunk: tuple[int, int, list[dict]], summaries: list[str]
+            ):
+                start_index, end_index, entries = chunk
+                ts, ts_start, ts_end = self._lh_extract_timestamps(entries)
 
-            log.debug(
-                "summarize_to_layered_history",
-                tokens=current_tokens,
-                threshold=token_threshold,
-                next_layer=next_layer_index,
+                next_layer.append(
+                    LayeredArchiveEntry(
+                        **{
+                            "start": start_index,
+                            "end": end_index,
+                            "ts": ts,
+                            "ts_start": ts_start,
+                            "ts_end": ts_end,
+                            "text": "\n\n".join(summaries),
+                        }
+                    ).model_dump(exclude_none=True)
+                )
+
+                emit(
+                    "status",
+                    status="busy",
+                    message=f"Updating layered history - layer {next_layer_index} - {len(next_layer)} / {estimated_entries}",
+                )
+
+            # chunks are committed in order, so if this is interrupted the
+            # next run picks up after the last committed chunk
+            await run_ordered(
+                chunks,
+                summarize_chunk,
+                commit_chunk,
+                concurrency=self.client.max_concurrent_requests,
             )
 
-            return not noop
+            return True
 
         # First layer (always the base layer)
         has_been_updated = False
@@ -696,7 +721,7 @@ class LayeredHistoryMixin:
 
         for entry_index, entry in enumerate(entries):
             is_last_entry = entry_index == len(entries) - 1
-            entry_tokens = util.count_tokens(entry["text"])
+            entry_tokens = util.count_entry_tokens(entry)
 
             log.debug(
                 "summarize_entries_to_layered_history",
@@ -1,5 +1,6 @@
 import asyncio
 
+import httpx
 import structlog
 
 import talemate.agents.visual.automatic1111  # noqa: F401
@@ -16,6 +17,7 @@ from talemate.agents.registry import register
 from talemate.agents.editor.revision import RevisionDisabled
 from talemate.agents.summarize.analyze_scene import SceneAnalysisDisabled
 from talemate.client.base import ClientBase
+from talemate.client.http import HTTPPool
 from talemate.emit import emit
 from talemate.prompts.base import Prompt
 
@@ -157,6 +159,7 @@ class VisualBase(Agent):
         self.backend_ready = False
         self.initialized = False
         self.actions = VisualBase.init_actions()
+        self._http_pool = HTTPPool()
 
     @property
     def enabled(self):
@@ -203,6 +206,13 @@ class VisualBase(Agent):
         except KeyError:
             return None
 
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """
+        Pooled httpx client for requests to the backend at `api_url`
+        """
+        return self._http_pool.client(self.api_url)
+
     @property
     def agent_details(self):
         details = {
@@ -290,6 +300,8 @@ class VisualBase(Agent):
 
         if backend_changed:
             self.backend_ready = False
+            # connections to the previous backend are no longer needed
+            await self._http_pool.aclose()
 
         log.debug(
             "apply_config",
@@ -317,6 +329,10 @@ class VisualBase(Agent):
 
         self.initialized = True
 
+    async def destroy(self):
+        await self._http_pool.aclose()
+        await super().destroy()
+
     def resolution_from_format(self, format: str, model_type: str = "sdxl"):
         if model_type not in RESOLUTION_MAP:
             raise ValueError(f"Model type {model_type} not found in resolution map")
@@ -1,4 +1,3 @@
-import httpx
 import structlog
 
 from talemate.agents.base import (
@@ -160,12 +159,12 @@ class Automatic1111Mixin:
 
         log.info("automatic1111_generate", payload=payload, url=url)
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url=f"{url}/sdapi/v1/txt2img",
-                json=payload,
-                timeout=self.generate_timeout,
-            )
+        client = self.http_client
+        response = await client.post(
+            url=f"{url}/sdapi/v1/txt2img",
+            json=payload,
+            timeout=self.generate_timeout,
+        )
 
         r = response.json()
 
@@ -182,8 +181,6 @@ class Automatic1111Mixin:
         Will send a GET to /sdapi/v1/memory and on 200 will return True
         """
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                url=f"{self.api_url}/sdapi/v1/memory", timeout=2
-            )
-            return response.status_code == 200
+        client = self.http_client
+        response = await client.get(url=f"{self.api_url}/sdapi/v1/memory", timeout=2)
+        return response.status_code == 200
@@ -6,7 +6,6 @@ import random
 import time
 import urllib.parse
 
-import httpx
 import pydantic
 import structlog
 
@@ -219,9 +218,9 @@ class ComfyUIMixin:
         if hasattr(self, "_comfyui_object_info"):
             return self._comfyui_object_info
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url=f"{self.api_url}/object_info")
-            self._comfyui_object_info = response.json()
+        client = self.http_client
+        response = await client.get(url=f"{self.api_url}/object_info")
+        self._comfyui_object_info = response.json()
 
         return self._comfyui_object_info
 
@@ -254,14 +253,14 @@ class ComfyUIMixin:
         data = {"filename": filename, "subfolder": subfolder, "type": folder_type}
         url_values = urllib.parse.urlencode(data)
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url=f"{self.api_url}/view?{url_values}")
-            return response.content
+        client = self.http_client
+        response = await client.get(url=f"{self.api_url}/view?{url_values}")
+        return response.content
 
     async def comfyui_get_history(self, prompt_id: str):
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url=f"{self.api_url}/history/{prompt_id}")
-            return response.json()
+        client = self.http_client
+        response = await client.get(url=f"{self.api_url}/history/{prompt_id}")
+        return response.json()
 
     async def comfyui_get_images(self, prompt_id: str, max_wait: int = 60.0):
         output_images = {}
@@ -306,10 +305,10 @@ class ComfyUIMixin:
 
         log.info("comfyui_generate", payload=payload, url=url)
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url=f"{url}/prompt", json=payload, timeout=self.generate_timeout
-            )
+        client = self.http_client
+        response = await client.post(
+            url=f"{url}/prompt", json=payload, timeout=self.generate_timeout
+        )
 
         log.info("comfyui_generate", response=response.text)
 
@@ -343,6 +342,6 @@ class ComfyUIMixin:
         Will send a GET to /system_stats and on 200 will return True
         """
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url=f"{self.api_url}/system_stats", timeout=2)
-            return response.status_code == 200
+        client = self.http_client
+        response = await client.get(url=f"{self.api_url}/system_stats", timeout=2)
+        return response.status_code == 200
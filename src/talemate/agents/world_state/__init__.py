@@ -12,6 +12,7 @@ import talemate.emit.async_signals
 import talemate.util as util
 from talemate.emit import emit
 from talemate.events import GameLoopEvent
+from talemate.exceptions import GenerationCancelled
 from talemate.instance import get_agent
 from talemate.client import ClientBase
 from talemate.prompts import Prompt
@@ -20,6 +21,7 @@ from talemate.scene_message import (
     TimePassageMessage,
 )
 from talemate.util.response import extract_list
+from talemate.util.async_tools import run_ordered
 
 
 from talemate.agents.base import (
@@ -37,6 +39,7 @@ import talemate.agents.world_state.nodes
 
 if TYPE_CHECKING:
     from talemate.tale_mate import Character
+    from talemate.world_state import Reinforcement
 
 log = structlog.get_logger("talemate.agents.world_state")
 
@@ -103,7 +106,23 @@ class WorldStateAgent(CharacterProgressionMixin, Agent):
                 can_be_disabled=True,
                 label="Update state reinforcements",
                 description="Will attempt to update any due state reinforcements.",
-                config={},
+                config={
+                    "batch": AgentActionConfig(
+                        type="bool",
+                        label="Batch requests",
+                        description="Ask for several due reinforcements in a single request instead of one request per reinforcement. Reinforcements missing from the response are requested individually.",
+                        value=False,
+                    ),
+                    "batch_size": AgentActionConfig(
+                        type="number",
+                        label="Batch size",
+                        description="Max. number of reinforcements per batched request.",
+                        value=5,
+                        min=2,
+                        max=20,
+                        step=1,
+                    ),
+                },
             ),
             "check_pin_conditions": AgentAction(
                 enabled=True,
@@ -149,6 +168,14 @@ class WorldStateAgent(CharacterProgressionMixin, Agent):
     def initial_update(self):
         return self.actions["update_world_state"].config["initial"].value
 
+    @property
+    def reinforcement_batch_enabled(self) -> bool:
+        return self.actions["update_reinforcements"].config["batch"].value
+
+    @property
+    def reinforcement_batch_size(self) -> int:
+        return int(self.actions["update_reinforcements"].config["batch_size"].value)
+
     def connect(self, scene):
         super().connect(scene)
         talemate.emit.async_signals.get("game_loop").connect(self.on_game_loop)
@@ -529,16 +556,78 @@ class WorldStateAgent(CharacterProgressionMixin, Agent):
     async def update_reinforcements(self, force: bool = False, reset: bool = False):
         """
         Queries due worldstate re-inforcements
+
+        With batching enabled several due reinforcements are asked for in a
+        single request. Otherwise, and for any reinforcement the batched
+        response did not answer, one request per reinforcement is sent, up
+        to the client's concurrency limit at a time. Answers are applied in
+        the order of the reinforcements either way.
         """
 
+        due = []
+
         for reinforcement in self.scene.world_state.reinforce:
             if reinforcement.due <= 0 or force:
-                await self.update_reinforcement(
-                    reinforcement.question, reinforcement.character, reset=reset
+                due.append(
+                    (reinforcement, self._prepare_reinforcement(reinforcement, reset))
                 )
             else:
                 reinforcement.due -= 1
 
+        if not due:
+            return
+
+        answers = {}
+
+        if self.reinforcement_batch_enabled and len(due) > 1:
+            batch_size = self.reinforcement_batch_size
+
+            async def request_batch(offset: int):
+                batch = [
+                    reinforcement
+                    for reinforcement, _ in due[offset : offset + batch_size]
+                ]
+                return await self.request_reinforcements(batch, reset=reset)
+
+            async def collect_batch(offset: int, batch_answers: dict[int, str]):
+                for index, answer in batch_answers.items():
+                    answers[offset + index] = answer
+
+            # a single reinforcement left over at the end is requested
+            # on its own below
+            await run_ordered(
+                [
+                    offset
+                    for offset in range(0, len(due), batch_size)
+                    if len(due) - offset > 1
+                ],
+                request_batch,
+                collect_batch,
+                concurrency=self.client.max_concurrent_requests,
+            )
+
+        async def request(job: tuple[int, "Reinforcement", ReinforcementMessage]):
+            index, reinforcement, _ = job
+            if index in answers:
+                return answers[index]
+            return await self._request_reinforcement(reinforcement, reset=reset)
+
+        async def apply(
+            job: tuple[int, "Reinforcement", ReinforcementMessage], answer: str
+        ):
+            _, reinforcement, message = job
+            await self._apply_reinforcement(reinforcement, message, answer, reset=reset)
+
+        await run_ordered(
+            [
+                (index, reinforcement, message)
+                for index, (reinforcement, message) in enumerate(due)
+            ],
+            request,
+            apply,
+            concurrency=self.client.max_concurrent_requests,
+        )
+
     @set_processing
     async def update_reinforcement(
         self, question: str, character: "str | Character" = None, reset: bool = False
@@ -550,7 +639,6 @@ class WorldStateAgent(CharacterProgressionMixin, Agent):
         if isinstance(character, self.scene.Character):
             character = character.name
 
-        message = None
         idx, reinforcement = await self.scene.world_state.find_reinforcement(
             question, character
         )
@@ -561,12 +649,28 @@ class WorldStateAgent(CharacterProgressionMixin, Agent):
             )
             return
 
+        message = self._prepare_reinforcement(reinforcement, reset)
+
+        answer = await self._request_reinforcement(reinforcement, reset=reset)
+
+        return await self._apply_reinforcement(
+            reinforcement, message, answer, reset=reset
+        )
+
+    def _prepare_reinforcement(
+        self, reinforcement: "Reinforcement", reset: bool = False
+    ) -> ReinforcementMessage:
+        """
+        Creates the message for a reinforcement and, when resetting, removes
+        its previous messages from the history
+        """
+
         message = ReinforcementMessage(message="")
         message.set_source(
             "world_state",
             "update_reinforcement",
-            question=question,
-            character=character,
+            question=reinforcement.question,
+            character=reinforcement.character,
         )
 
         if reset and reinforcement.insert == "sequential":
@@ -574,6 +678,23 @@ class WorldStateAgent(CharacterProgressionMixin, Agent):
                 typ="reinforcement", meta_hash=message.meta_hash, all=True
             )
 
+        return message
+
+    def _clean_reinforcement_answer(
+        self, reinforcement: "Reinforcement", answer: str
+    ) -> str:
+        # sequential reinforcment should be single sentence so we
+        # split on line breaks and take the first line in case the
+        # LLM did not understand the request and returned a longer response
+
+        if reinforcement.insert == "sequential":
+            answer = answer.split("\n")[0]
+
+        return answer
+
+    async def _request_reinforcement(
+        self, reinforcement: "Reinforcement", reset: bool = False
+    ) -> str:
         if reinforcement.insert == "sequential":
             kind = "analyze_freeform_medium_short"
         else:
@@ -598,13 +719,85 @@ class WorldStateAgent(CharacterProgressionMixin, Agent):
             },
         )
 
-        # sequential reinforcment should be single sentence so we
-        # split on line breaks and take the first line in case the
-        # LLM did not understand the request and returned a longer response
+        return self._clean_reinforcement_answer(reinforcement, answer)
 
-        if reinforcement.insert == "sequential":
-            answer = answer.split("\n")[0]
+    @set_processing
+    async def request_reinforcements(
+        self, reinforcements: list["Reinforcement"], reset: bool = False
+    ) -> dict[int, str]:
+        """
+        Asks for several reinforcements in a single request
+
+        Returns the answers by index in `reinforcements`, reinforcements the
+        response did not answer are left out.
+        """
 
+        characters = [
+            self.scene.get_character(name)
+            for name in dict.fromkeys(
+                reinforcement.character
+                for reinforcement in reinforcements
+                if reinforcement.character
+            )
+        ]
+
+        try:
+            _, response = await Prompt.request(
+                "world_state.update-reinforcements-batch",
+                self.client,
+                "analyze_long",
+                vars={
+                    "scene": self.scene,
+                    "max_tokens": self.client.max_token_length,
+                    "reinforcements": reinforcements,
+                    "characters": [character for character in characters if character],
+                    "reset": reset,
+                    "coercion": {"1": ""},
+                },
+            )
+        except GenerationCancelled:
+            raise
+        except Exception as exc:
+            log.error("request_reinforcements", error=exc)
+            return {}
+
+        if not isinstance(response, dict):
+            log.warning("request_reinforcements", response=response)
+            return {}
+
+        # yaml parses the item numbers as int keys
+        response = {str(key).strip(): value for key, value in response.items()}
+
+        answers = {}
+
+        for index, reinforcement in enumerate(reinforcements):
+            answer = response.get(str(index + 1))
+
+            if answer is None or isinstance(answer, (dict, list)):
+                continue
+
+            answer = self._clean_reinforcement_answer(
+                reinforcement, str(answer).strip()
+            )
+
+            if answer:
+                answers[index] = answer
+
+        log.debug(
+            "request_reinforcements",
+            num_reinforcements=len(reinforcements),
+            num_answers=len(answers),
+        )
+
+        return answers
+
+    async def _apply_reinforcement(
+        self,
+        reinforcement: "Reinforcement",
+        message: ReinforcementMessage,
+        answer: str,
+        reset: bool = False,
+    ) -> ReinforcementMessage:
         reinforcement.answer = answer
         reinforcement.due = reinforcement.interval
 
@@ -211,7 +211,7 @@ class AnthropicClient(EndpointOverrideMixin, ClientBase):
                 ):
                     content = event.delta.text
                     response += content
-                    self.update_request_tokens(self.count_tokens(content))
+                    self.receive_chunk(content)
 
                 elif (
                     event.type == "content_block_delta"
@@ -219,7 +219,7 @@ class AnthropicClient(EndpointOverrideMixin, ClientBase):
                 ):
                     content = event.delta.thinking
                     reasoning += content
-                    self.update_request_tokens(self.count_tokens(content))
+                    self.receive_chunk(content, reasoning=True)
 
                 elif event.type == "message_start":
                     prompt_tokens = event.message.usage.input_tokens
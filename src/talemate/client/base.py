@@ -3,16 +3,20 @@ A unified client base, based on the openai API
 """
 
 import ipaddress
+import json
 import logging
 import re
 import random
 import time
 import traceback
+import uuid
 import asyncio
-from typing import Callable, Union, Literal
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Union, Literal
 
 import pydantic
 import dataclasses
+import httpx
 import structlog
 import urllib3
 from openai import PermissionDeniedError
@@ -22,6 +26,7 @@ import talemate.instance as instance
 import talemate.util as util
 from talemate.agents.context import active_agent
 from talemate.client.context import client_context_attribute
+from talemate.client.http import HTTPPool
 from talemate.client.model_prompts import model_prompt, DEFAULT_TEMPLATE
 from talemate.client.ratelimit import CounterRateLimiter
 from talemate.context import active_scene
@@ -55,6 +60,12 @@ INDIRECT_COERCION_PROMPT = "\nStart your response with: "
 
 DEFAULT_REASONING_PATTERN = r".*?</think>"
 
+# seconds between token count updates while a response is streamed
+STREAM_TOKEN_INTERVAL = 0.25
+
+# seconds between partial response frames sent to the frontend
+STREAM_FRAME_INTERVAL = 0.1
+
 
 class ClientDisabledError(OSError):
     def __init__(self, client: "ClientBase"):
@@ -77,6 +88,7 @@ class PromptData(pydantic.BaseModel):
     inference_preset: str = None
     preset_group: str | None = None
     reasoning: str | None = None
+    time_to_first_token: float | None = None
 
 
 class ErrorAction(pydantic.BaseModel):
@@ -88,6 +100,7 @@ class ErrorAction(pydantic.BaseModel):
 
 class CommonDefaults(pydantic.BaseModel):
     rate_limit: int | None = None
+    max_concurrent_requests: int = 1
     data_format: Literal["yaml", "json"] | None = None
     preset_group: str | None = None
     reason_enabled: bool = False
@@ -138,8 +151,16 @@ class ParameterReroute(pydantic.BaseModel):
 class RequestInformation(pydantic.BaseModel):
     start_time: float = pydantic.Field(default_factory=time.time)
     end_time: float | None = None
+    first_token_time: float | None = None
     tokens: int = 0
 
+    @pydantic.computed_field(description="Time to first token")
+    @property
+    def time_to_first_token(self) -> float | None:
+        if self.first_token_time is None:
+            return None
+        return self.first_token_time - self.start_time
+
     @pydantic.computed_field(description="Duration")
     @property
     def duration(self) -> float:
@@ -176,6 +197,103 @@ class RequestInformation(pydantic.BaseModel):
         return time.time() - self.end_time
 
 
+class PartialResponse:
+    """
+    Coalesces the chunks of a streamed response into `partial_response`
+    emissions, at most one every `STREAM_FRAME_INTERVAL` seconds, so the
+    frontend can show the text while it is being generated.
+
+    Args:
+        client_name (str): The name of the client generating the response.
+        kind (str): The prompt kind.
+        agent_stack (list[str]): The agents that requested the response.
+    """
+
+    def __init__(self, client_name: str, kind: str, agent_stack: list[str]):
+        self.id = str(uuid.uuid4())
+        self.client_name = client_name
+        self.kind = kind
+        self.agent_stack = agent_stack
+        self.pending: list[str] = []
+        self.last_frame = time.monotonic()
+
+    def feed(self, content: str):
+        self.pending.append(content)
+        if time.monotonic() - self.last_frame >= STREAM_FRAME_INTERVAL:
+            self.flush()
+
+    def flush(self, done: bool = False):
+        """
+        Emits the text received since the last frame.
+        """
+        if not self.pending and not done:
+            return
+        emit(
+            "partial_response",
+            data={
+                "id": self.id,
+                "client_name": self.client_name,
+                "kind": self.kind,
+                "agent_stack": self.agent_stack,
+                "text": "".join(self.pending),
+                "done": done,
+            },
+        )
+        self.pending.clear()
+        self.last_frame = time.monotonic()
+
+
+# the partial response stream of the request running in the current context,
+# so concurrent requests through the same client each stream their own response
+current_partial_response: ContextVar[PartialResponse | None] = ContextVar(
+    "current_partial_response", default=None
+)
+
+
+@dataclasses.dataclass
+class ClientRequest:
+    """
+    State of a single request sent through a client
+
+    Args:
+        information (RequestInformation): Timing and token counts of the request.
+        prompt_tokens (int | None): Prompt tokens as reported by the API.
+        response_tokens (int | None): Response tokens as reported by the API.
+        reasoning (str | None): The reasoning returned with the response.
+    """
+
+    information: RequestInformation = dataclasses.field(
+        default_factory=RequestInformation
+    )
+    prompt_tokens: int | None = None
+    response_tokens: int | None = None
+    reasoning: str | None = None
+
+
+# the request running in the current context, so concurrent requests through
+# the same client each keep their own token counts, timing and reasoning
+current_request: ContextVar[ClientRequest | None] = ContextVar(
+    "current_request", default=None
+)
+
+
+def _request_attribute(name: str) -> property:
+    """
+    Property proxying `name` of the request running in the current context
+    """
+
+    def fget(self):
+        request = current_request.get()
+        return getattr(request, name) if request else None
+
+    def fset(self, value):
+        request = current_request.get()
+        if request:
+            setattr(request, name, value)
+
+    return property(fget, fset)
+
+
 @dataclasses.dataclass
 class ClientEmbeddingsStatus:
     client: "ClientBase | None" = None
@@ -202,13 +320,13 @@ class ClientBase:
     remote_model_locked: bool = False
     current_status: str = None
     processing: bool = False
+    requests_in_flight: int = 0
     connected: bool = False
     conversation_retries: int = 0
     decensor_enabled: bool = True
     auto_determine_prompt_template: bool = False
     finalizers: list[str] = []
     client_type = "base"
-    request_information: RequestInformation | None = None
     status_request_timeout: int = 2
     rate_limit_counter: CounterRateLimiter = None
 
@@ -229,6 +347,7 @@ class ClientBase:
         self.remote_model_name = None
         self.auto_determine_prompt_template_attempt = None
         self.log = structlog.get_logger(f"client.{self.client_type}")
+        self._http_pool = HTTPPool()
 
     def __str__(self):
         return f"{self.client_type}Client[{self.api_url}][{self.model_name or ''}]"
@@ -266,6 +385,16 @@ class ClientBase:
     def api_url(self) -> str | None:
         return self.client_config.api_url
 
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """
+        Pooled httpx client for requests to the backend at `api_url`
+
+        Connections are kept alive between requests and the pool is
+        recreated when `api_url` changes.
+        """
+        return self._http_pool.client(self.api_url)
+
     @property
     def max_token_length(self) -> int:
         return self.client_config.max_token_length
@@ -278,6 +407,10 @@ class ClientBase:
     def rate_limit(self) -> int | None:
         return self.client_config.rate_limit
 
+    @property
+    def max_concurrent_requests(self) -> int:
+        return max(1, self.client_config.max_concurrent_requests or 1)
+
     @property
     def data_format(self) -> Literal["yaml", "json"]:
         return self.client_config.data_format
@@ -421,6 +554,8 @@ class ClientBase:
         if self.supports_embeddings:
             await self.remove_embeddings()
 
+        await self._http_pool.aclose()
+
     async def reset_embeddings(self):
         self._embeddings_model_name = None
         self._embeddings_status = False
@@ -690,6 +825,7 @@ class ClientBase:
             "can_be_coerced": self.can_be_coerced,
             "preset_group": self.preset_group or "",
             "rate_limit": self.rate_limit,
+            "max_concurrent_requests": self.max_concurrent_requests,
             "data_format": self.data_format,
             "manual_model_choices": getattr(self.Meta(), "manual_model_choices", []),
             "supports_embeddings": self.supports_embeddings,
@@ -926,11 +1062,43 @@ class ClientBase:
         """
         pass
 
+    _returned_prompt_tokens = _request_attribute("prompt_tokens")
+    _returned_response_tokens = _request_attribute("response_tokens")
+    _reasoning_response = _request_attribute("reasoning")
+
+    @property
+    def request_information(self) -> RequestInformation | None:
+        """
+        The request information of the request running in the current
+        context, outside of a request the most recently started one.
+        """
+        request = current_request.get()
+        if request:
+            return request.information
+        return getattr(self, "_latest_request_information", None)
+
+    @request_information.setter
+    def request_information(self, information: RequestInformation | None):
+        request = current_request.get()
+        if request:
+            request.information = information
+        self._latest_request_information = information
+
     def new_request(self):
         """
-        Creates a new request information object.
+        Starts a new request in the current context.
         """
-        self.request_information = RequestInformation()
+        request = ClientRequest()
+        current_request.set(request)
+        self._latest_request_information = request.information
+
+    @property
+    def partial_response(self) -> PartialResponse | None:
+        return current_partial_response.get()
+
+    @partial_response.setter
+    def partial_response(self, partial_response: PartialResponse | None):
+        current_partial_response.set(partial_response)
 
     def end_request(self):
         """
@@ -938,6 +1106,25 @@ class ClientBase:
         """
         self.request_information.end_time = time.time()
 
+    def receive_chunk(self, content: str, reasoning: bool = False, count: bool = True):
+        """
+        Called by streaming clients for every chunk of response text.
+
+        Records the time to first token, forwards the chunk to the partial
+        response stream if one is open and, unless `count` is False, adds
+        its tokens to the request information.
+
+        Reasoning chunks are counted but not streamed to the frontend.
+        """
+        if not self.request_information:
+            return
+        if self.request_information.first_token_time is None:
+            self.request_information.first_token_time = time.time()
+        if self.partial_response and not reasoning:
+            self.partial_response.feed(content)
+        if count:
+            self.update_request_tokens(self.count_tokens(content))
+
     def update_request_tokens(self, tokens: int, replace: bool = False):
         """
         Updates the request information object with the number of tokens received.
@@ -948,6 +1135,56 @@ class ClientBase:
             else:
                 self.request_information.tokens += tokens
 
+    async def sse_events(
+        self, url: str, payload: dict, headers: dict | None = None
+    ) -> AsyncIterator[dict]:
+        """
+        POSTs `payload` to `url` and yields the json decoded data of each
+        server-sent event as it arrives.
+
+        The request goes through the client's pooled http client. If the
+        consuming task is cancelled the stream is closed right away, which
+        also stops the generation on backends that abort on disconnect.
+        """
+        async with self.http_client.stream(
+            "POST", url, json=payload, headers=headers, timeout=None
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                if data:
+                    yield json.loads(data)
+
+    async def collect_stream(self, chunks: AsyncIterator[str]) -> str:
+        """
+        Joins streamed text chunks into the full response.
+
+        The request token count is updated in batches, at most every
+        `STREAM_TOKEN_INTERVAL` seconds, instead of tokenizing every chunk.
+        """
+        response = []
+        pending = []
+        last_update = time.monotonic()
+
+        async for chunk in chunks:
+            self.receive_chunk(chunk, count=False)
+            response.append(chunk)
+            pending.append(chunk)
+            now = time.monotonic()
+            if now - last_update >= STREAM_TOKEN_INTERVAL:
+                self.update_request_tokens(self.count_tokens("".join(pending)))
+                pending.clear()
+                last_update = now
+
+        if pending:
+            self.update_request_tokens(self.count_tokens("".join(pending)))
+
+        return "".join(response)
+
     def strip_coercion_prompt(self, response: str, coercion_prompt: str = None) -> str:
         """
         Strips the coercion prompt from the response if it is present.
@@ -1116,10 +1353,7 @@ class ClientBase:
             raise ClientDisabledError(self)
 
         try:
-            self._returned_prompt_tokens = None
-            self._returned_response_tokens = None
-            self._reasoning_response = None
-
+            self.requests_in_flight += 1
             self.emit_status(processing=True)
             await self.status()
 
@@ -1168,6 +1402,15 @@ class ClientBase:
 
             self.new_request()
 
+            agent_context = active_agent.get()
+
+            if self.config.game.general.stream_responses:
+                self.partial_response = PartialResponse(
+                    self.name,
+                    kind,
+                    agent_context.agent_stack if agent_context else [],
+                )
+
             response = await self._cancelable_generate(
                 finalized_prompt, prompt_param, kind
             )
@@ -1205,8 +1448,6 @@ class ClientBase:
                     response = response.split(stopping_string)[0]
                     break
 
-            agent_context = active_agent.get()
-
             emit(
                 "prompt_sent",
                 data=PromptData(
@@ -1224,6 +1465,7 @@ class ClientBase:
                     inference_preset=client_context_attribute("inference_preset"),
                     preset_group=self.preset_group,
                     reasoning=self._reasoning_response,
+                    time_to_first_token=self.request_information.time_to_first_token,
                 ).model_dump(),
             )
 
@@ -1241,9 +1483,15 @@ class ClientBase:
             )
             return ""
         finally:
-            self.emit_status(processing=False)
-            self._returned_prompt_tokens = None
-            self._returned_response_tokens = None
+            # the client stays busy until all of its requests are done
+            self.requests_in_flight -= 1
+            self.emit_status(processing=self.requests_in_flight > 0)
+
+            # close the stream in the frontend, also when generation failed
+            if self.partial_response:
+                self.partial_response.flush(done=True)
+                self.partial_response = None
+            current_request.set(None)
 
             if self.rate_limit_counter:
                 self.rate_limit_counter.increment()
@@ -161,7 +161,7 @@ class DeepSeekClient(ClientBase):
                     content_piece = delta.content
                     response += content_piece
                     # Incrementally track token usage
-                    self.update_request_tokens(self.count_tokens(content_piece))
+                    self.receive_chunk(content_piece)
 
             # Save token accounting for whole request
             self._returned_prompt_tokens = self.prompt_tokens(prompt)
@@ -402,7 +402,7 @@ class GoogleClient(EndpointOverrideMixin, RemoteServiceMixin, ClientBase):
                             reasoning += part.text
                         else:
                             response += part.text
-                        self.update_request_tokens(count_tokens(part.text))
+                        self.receive_chunk(part.text, reasoning=bool(part.thought))
                 except Exception as e:
                     log.error("error processing chunk", e=e, chunk=chunk)
                     continue
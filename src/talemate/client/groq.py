@@ -188,7 +188,7 @@ class GroqClient(EndpointOverrideMixin, ClientBase):
                     content_piece = delta.content
                     response += content_piece
                     # Incrementally track token usage
-                    self.update_request_tokens(self.count_tokens(content_piece))
+                    self.receive_chunk(content_piece)
 
             return response
         except PermissionDeniedError as e:
@@ -0,0 +1,85 @@
+"""
+Long-lived httpx clients for backends that talemate talks to over plain HTTP.
+"""
+
+import asyncio
+
+import httpx
+import structlog
+
+__all__ = ["HTTPPool"]
+
+log = structlog.get_logger("talemate.client.http")
+
+
+class HTTPPool:
+    """
+    Lazily created `httpx.AsyncClient` that keeps connections to a backend
+    alive between requests, so status probes and generations don't pay for
+    a new TCP (and TLS) handshake every time.
+
+    The underlying client is recreated when the base url it was created for
+    changes, when it was closed, or when it is used from a different event
+    loop (an httpx client is bound to the loop it first ran on).
+
+    Args:
+        max_keepalive_connections (int): Idle connections kept open.
+        keepalive_expiry (float): Seconds an idle connection is kept open.
+    """
+
+    def __init__(
+        self, max_keepalive_connections: int = 10, keepalive_expiry: float = 30.0
+    ):
+        self.limits = httpx.Limits(
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._client: httpx.AsyncClient | None = None
+        self._url: str | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._closing: set[asyncio.Task] = set()
+
+    def client(self, url: str | None) -> httpx.AsyncClient:
+        """
+        Returns the pooled client for `url`, creating it if needed.
+
+        Must be called from within a running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        if (
+            self._client is None
+            or self._client.is_closed
+            or self._url != url
+            or self._loop is not loop
+        ):
+            self._release()
+            log.debug("http pool created", url=url)
+            self._client = httpx.AsyncClient(limits=self.limits)
+            self._url = url
+            self._loop = loop
+        return self._client
+
+    def _release(self):
+        """
+        Drops the current client, closing it in the background if it
+        belongs to the running loop.
+        """
+        client, loop = self._client, self._loop
+        self._client = None
+        if client is None or client.is_closed:
+            return
+        if loop is asyncio.get_running_loop():
+            task = loop.create_task(client.aclose())
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    async def aclose(self):
+        """
+        Closes the pooled client and any open connections.
+        """
+        client, loop = self._client, self._loop
+        self._client = None
+        if client is None or client.is_closed:
+            return
+        if loop is asyncio.get_running_loop():
+            await client.aclose()
@@ -1,7 +1,4 @@
 import random
-import json
-import sseclient
-import asyncio
 from typing import TYPE_CHECKING
 import requests
 from chromadb.api.types import EmbeddingFunction, Documents, Embeddings
@@ -9,7 +6,6 @@ from chromadb.api.types import EmbeddingFunction, Documents, Embeddings
 # import urljoin
 from urllib.parse import urljoin, urlparse
 
-import httpx
 import structlog
 
 import talemate.util as util
@@ -224,13 +220,13 @@ class KoboldCppClient(ClientBase):
         # otherwise, get the model name by doing a request to
         # the embeddings endpoint with a single character
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                self.embeddings_url,
-                json={"input": ["test"]},
-                timeout=2,
-                headers=self.request_headers,
-            )
+        client = self.http_client
+        response = await client.post(
+            self.embeddings_url,
+            json={"input": ["test"]},
+            timeout=2,
+            headers=self.request_headers,
+        )
 
         response_data = response.json()
         self._embeddings_model_name = response_data.get("model")
@@ -238,46 +234,46 @@ class KoboldCppClient(ClientBase):
 
     async def get_embeddings_status(self):
         url_version = urljoin(self.api_url, "api/extra/version")
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url_version, timeout=2)
-            response_data = response.json()
-            self._embeddings_status = response_data.get("embeddings", False)
+        client = self.http_client
+        response = await client.get(url_version, timeout=2)
+        response_data = response.json()
+        self._embeddings_status = response_data.get("embeddings", False)
 
-            if not self.embeddings_status or self.embeddings_model_name:
-                return
+        if not self.embeddings_status or self.embeddings_model_name:
+            return
 
-            await self.get_embeddings_model_name()
+        await self.get_embeddings_model_name()
 
-            log.debug(
-                "KoboldCpp embeddings are enabled, suggesting embeddings",
-                model_name=self.embeddings_model_name,
-            )
+        log.debug(
+            "KoboldCpp embeddings are enabled, suggesting embeddings",
+            model_name=self.embeddings_model_name,
+        )
 
-            await self.set_embeddings()
+        await self.set_embeddings()
 
-            emission = ClientEmbeddingsStatus(
-                client=self,
-                embedding_name=self.embeddings_model_name,
-            )
+        emission = ClientEmbeddingsStatus(
+            client=self,
+            embedding_name=self.embeddings_model_name,
+        )
 
-            await async_signals.get("client.embeddings_available").send(emission)
+        await async_signals.get("client.embeddings_available").send(emission)
 
-            if not emission.seen:
-                # the suggestion has not been seen by the memory agent
-                # yet, so we unset the embeddings model name so it will
-                # get suggested again
-                self._embeddings_model_name = None
+        if not emission.seen:
+            # the suggestion has not been seen by the memory agent
+            # yet, so we unset the embeddings model name so it will
+            # get suggested again
+            self._embeddings_model_name = None
 
     async def get_model_name(self):
         self.ensure_api_endpoint_specified()
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    self.api_url_for_model,
-                    timeout=2,
-                    headers=self.request_headers,
-                )
+            client = self.http_client
+            response = await client.get(
+                self.api_url_for_model,
+                timeout=2,
+                headers=self.request_headers,
+            )
         except Exception:
             self._embeddings_model_name = None
             raise
@@ -315,20 +311,20 @@ class KoboldCppClient(ClientBase):
 
         url_tokencount = f"{parts.scheme}://{parts.netloc}/api/extra/tokencount"
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url_tokencount,
-                json={"prompt": content},
-                timeout=None,
-                headers=self.request_headers,
-            )
+        client = self.http_client
+        response = await client.post(
+            url_tokencount,
+            json={"prompt": content},
+            timeout=None,
+            headers=self.request_headers,
+        )
 
-            if response.status_code == 404:
-                # kobold united doesn't have tokencount endpoint
-                return util.count_tokens(content)
+        if response.status_code == 404:
+            # kobold united doesn't have tokencount endpoint
+            return util.count_tokens(content)
 
-            tokencount = len(response.json().get("ids", []))
-            return tokencount
+        tokencount = len(response.json().get("ids", []))
+        return tokencount
 
     async def abort_generation(self):
         """
@@ -340,11 +336,11 @@ class KoboldCppClient(ClientBase):
 
         parts = urlparse(self.api_url)
         url_abort = f"{parts.scheme}://{parts.netloc}/api/extra/abort"
-        async with httpx.AsyncClient() as client:
-            await client.post(
-                url_abort,
-                headers=self.request_headers,
-            )
+        client = self.http_client
+        await client.post(
+            url_abort,
+            headers=self.request_headers,
+        )
 
     async def generate(self, prompt: str, parameters: dict, kind: str):
         """
@@ -353,37 +349,19 @@ class KoboldCppClient(ClientBase):
         if self.is_openai:
             return await self._generate_openai(prompt, parameters, kind)
         else:
-            loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(
-                None, self._generate_kcpp_stream, prompt, parameters, kind
-            )
+            return await self._generate_kcpp_stream(prompt, parameters, kind)
 
-    def _generate_kcpp_stream(self, prompt: str, parameters: dict, kind: str):
+    async def _generate_kcpp_stream(self, prompt: str, parameters: dict, kind: str):
         """
         Generates text from the given prompt and parameters.
         """
         parameters["prompt"] = prompt.strip(" ")
-
-        response = ""
         parameters["stream"] = True
-        stream_response = requests.post(
-            self.api_url_for_generation,
-            json=parameters,
-            timeout=None,
-            headers=self.request_headers,
-            stream=True,
-        )
-        stream_response.raise_for_status()
-
-        sse = sseclient.SSEClient(stream_response)
-
-        for event in sse.events():
-            payload = json.loads(event.data)
-            chunk = payload["token"]
-            response += chunk
-            self.update_request_tokens(self.count_tokens(chunk))
 
-        return response
+        events = self.sse_events(
+            self.api_url_for_generation, parameters, headers=self.request_headers
+        )
+        return await self.collect_stream(event["token"] async for event in events)
 
     async def _generate_openai(self, prompt: str, parameters: dict, kind: str):
         """
@@ -394,30 +372,30 @@ class KoboldCppClient(ClientBase):
 
         self._returned_prompt_tokens = await self.tokencount(parameters["prompt"])
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                self.api_url_for_generation,
-                json=parameters,
-                timeout=None,
-                headers=self.request_headers,
+        client = self.http_client
+        response = await client.post(
+            self.api_url_for_generation,
+            json=parameters,
+            timeout=None,
+            headers=self.request_headers,
+        )
+        response_data = response.json()
+        try:
+            if self.is_openai:
+                response_text = response_data["choices"][0]["text"]
+            else:
+                response_text = response_data["results"][0]["text"]
+        except (TypeError, KeyError) as exc:
+            log.error(
+                "Failed to generate text",
+                exc=exc,
+                response_data=response_data,
+                response_status=response.status_code,
             )
-            response_data = response.json()
-            try:
-                if self.is_openai:
-                    response_text = response_data["choices"][0]["text"]
-                else:
-                    response_text = response_data["results"][0]["text"]
-            except (TypeError, KeyError) as exc:
-                log.error(
-                    "Failed to generate text",
-                    exc=exc,
-                    response_data=response_data,
-                    response_status=response.status_code,
-                )
-                response_text = ""
+            response_text = ""
 
-            self._returned_response_tokens = await self.tokencount(response_text)
-            return response_text
+        self._returned_response_tokens = await self.tokencount(response_text)
+        return response_text
 
     def jiggle_randomness(self, prompt_config: dict, offset: float = 0.3) -> dict:
         """
@@ -462,19 +440,19 @@ class KoboldCppClient(ClientBase):
 
         sd_models_url = urljoin(self.url, "/sdapi/v1/sd-models")
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(url=sd_models_url, timeout=2)
-            except Exception as exc:
-                log.error(f"Failed to fetch sd models from {sd_models_url}", exc=exc)
-                return False
+        client = self.http_client
+        try:
+            response = await client.get(url=sd_models_url, timeout=2)
+        except Exception as exc:
+            log.error(f"Failed to fetch sd models from {sd_models_url}", exc=exc)
+            return False
 
-            if response.status_code != 200:
-                return False
+        if response.status_code != 200:
+            return False
 
-            response_data = response.json()
+        response_data = response.json()
 
-            sd_model = response_data[0].get("model_name") if response_data else None
+        sd_model = response_data[0].get("model_name") if response_data else None
 
         if not sd_model:
             return False
@@ -62,7 +62,7 @@ class LMStudioClient(ClientBase):
         """
         Generates text from the given prompt and parameters using a streaming
         request so that token usage can be tracked incrementally via
-        `update_request_tokens`.
+        `receive_chunk`.
         """
 
         self.log.debug(
@@ -92,7 +92,7 @@ class LMStudioClient(ClientBase):
                 content_piece = chunk.choices[0].text
                 response += content_piece
                 # Track token usage incrementally
-                self.update_request_tokens(self.count_tokens(content_piece))
+                self.receive_chunk(content_piece)
 
             # Store overall token accounting once the stream is finished
             self._returned_prompt_tokens = self.prompt_tokens(prompt)
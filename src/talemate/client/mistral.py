@@ -195,9 +195,7 @@ class MistralAIClient(EndpointOverrideMixin, ClientBase):
             async for event in event_stream:
                 if event.data.choices:
                     response += event.data.choices[0].delta.content
-                    self.update_request_tokens(
-                        self.count_tokens(event.data.choices[0].delta.content)
-                    )
+                    self.receive_chunk(event.data.choices[0].delta.content)
                 if event.data.usage:
                     completion_tokens += event.data.usage.completion_tokens
                     prompt_tokens += event.data.usage.prompt_tokens
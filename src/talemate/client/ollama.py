@@ -1,5 +1,4 @@
 import structlog
-import httpx
 import ollama
 import time
 
@@ -121,9 +120,9 @@ class OllamaClient(ClientBase):
             # instead of using the client (which apparently cannot set a timeout per endpoint)
             # we use httpx to check {api_url}/api/version to see if the server is running
             # use a timeout of 2 seconds
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.api_url}/api/version", timeout=2)
-                response.raise_for_status()
+            client = self.http_client
+            response = await client.get(f"{self.api_url}/api/version", timeout=2)
+            response.raise_for_status()
 
             # if the server is running, fetch the available models
             await self.fetch_available_models()
@@ -232,7 +231,7 @@ class OllamaClient(ClientBase):
             async for part in stream:
                 content = part.response
                 response += content
-                self.update_request_tokens(self.count_tokens(content))
+                self.receive_chunk(content)
 
             # Extract the response text
             return response
@@ -291,7 +291,7 @@ class OpenAIClient(EndpointOverrideMixin, ClientBase):
                     content_piece = delta.content
                     response += content_piece
                     # Incrementally track token usage
-                    self.update_request_tokens(self.count_tokens(content_piece))
+                    self.receive_chunk(content_piece)
 
             return response
         except PermissionDeniedError as e:
@@ -324,7 +324,7 @@ class OpenAIClient(EndpointOverrideMixin, ClientBase):
 
             if content:
                 # Update token usage based on the full content
-                self.update_request_tokens(self.count_tokens(content))
+                self.receive_chunk(content)
 
             return content
         except PermissionDeniedError as e:
@@ -372,60 +372,54 @@ class OpenRouterClient(ClientBase):
         completion_tokens = 0
         prompt_tokens = 0
         try:
-            async with httpx.AsyncClient() as client:
-                async with client.stream(
-                    "POST",
-                    "https://openrouter.ai/api/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.openrouter_api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json=payload,
-                    timeout=120.0,  # 2 minute timeout for generation
-                ) as response:
-                    async for chunk in response.aiter_text():
-                        buffer += chunk
-
-                        while True:
-                            # Find the next complete SSE line
-                            line_end = buffer.find("\n")
-                            if line_end == -1:
+            client = self.http_client
+            async with client.stream(
+                "POST",
+                "https://openrouter.ai/api/v1/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {self.openrouter_api_key}",
+                    "Content-Type": "application/json",
+                },
+                json=payload,
+                timeout=120.0,  # 2 minute timeout for generation
+            ) as response:
+                async for chunk in response.aiter_text():
+                    buffer += chunk
+
+                    while True:
+                        # Find the next complete SSE line
+                        line_end = buffer.find("\n")
+                        if line_end == -1:
+                            break
+
+                        line = buffer[:line_end].strip()
+                        buffer = buffer[line_end + 1 :]
+
+                        if line.startswith("data: "):
+                            data = line[6:]
+                            if data == "[DONE]":
                                 break
 
-                            line = buffer[:line_end].strip()
-                            buffer = buffer[line_end + 1 :]
-
-                            if line.startswith("data: "):
-                                data = line[6:]
-                                if data == "[DONE]":
-                                    break
-
-                                try:
-                                    data_obj = json.loads(data)
-                                    content = data_obj["choices"][0]["delta"].get(
-                                        "content"
-                                    )
-                                    usage = data_obj.get("usage", {})
-                                    completion_tokens += usage.get(
-                                        "completion_tokens", 0
-                                    )
-                                    prompt_tokens += usage.get("prompt_tokens", 0)
-                                    if content:
-                                        response_text += content
-                                        # Update tokens as content streams in
-                                        self.update_request_tokens(
-                                            self.count_tokens(content)
-                                        )
-
-                                except (json.JSONDecodeError, KeyError):
-                                    pass
-
-                    # Extract the response content
-                    response_content = response_text
-                    self._returned_prompt_tokens = prompt_tokens
-                    self._returned_response_tokens = completion_tokens
-
-                    return response_content
+                            try:
+                                data_obj = json.loads(data)
+                                content = data_obj["choices"][0]["delta"].get("content")
+                                usage = data_obj.get("usage", {})
+                                completion_tokens += usage.get("completion_tokens", 0)
+                                prompt_tokens += usage.get("prompt_tokens", 0)
+                                if content:
+                                    response_text += content
+                                    # Update tokens as content streams in
+                                    self.receive_chunk(content)
+
+                            except (json.JSONDecodeError, KeyError):
+                                pass
+
+                # Extract the response content
+                response_content = response_text
+                self._returned_prompt_tokens = prompt_tokens
+                self._returned_response_tokens = completion_tokens
+
+                return response_content
 
         except httpx.ConnectTimeout:
             self.log.error("OpenRouter API timeout")
@@ -99,16 +99,16 @@ class TabbyAPIClient(ClientBase):
         headers = {
             "x-api-key": self.api_key,
         }
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers, timeout=10.0)
-            if response.status_code != 200:
-                raise Exception(f"Request failed: {response.status_code}")
-            response_data = response.json()
-            model_name = response_data.get("id")
-            # split by "/" and take last
-            if model_name:
-                model_name = model_name.split("/")[-1]
-            return model_name
+        client = self.http_client
+        response = await client.get(url, headers=headers, timeout=10.0)
+        if response.status_code != 200:
+            raise Exception(f"Request failed: {response.status_code}")
+        response_data = response.json()
+        model_name = response_data.get("id")
+        # split by "/" and take last
+        if model_name:
+            model_name = model_name.split("/")[-1]
+        return model_name
 
     async def generate(self, prompt: str, parameters: dict, kind: str):
         """
@@ -187,60 +187,56 @@ class TabbyAPIClient(ClientBase):
             completion_tokens = 0
             prompt_tokens = 0
 
-            async with httpx.AsyncClient() as client:
-                async with client.stream(
-                    "POST", url, headers=headers, json=payload, timeout=120.0
-                ) as response:
-                    async for chunk in response.aiter_text():
-                        buffer += chunk
+            client = self.http_client
+            async with client.stream(
+                "POST", url, headers=headers, json=payload, timeout=120.0
+            ) as response:
+                async for chunk in response.aiter_text():
+                    buffer += chunk
 
-                        while True:
-                            line_end = buffer.find("\n")
-                            if line_end == -1:
-                                break
+                    while True:
+                        line_end = buffer.find("\n")
+                        if line_end == -1:
+                            break
 
-                            line = buffer[:line_end].strip()
-                            buffer = buffer[line_end + 1 :]
+                        line = buffer[:line_end].strip()
+                        buffer = buffer[line_end + 1 :]
 
-                            if not line:
-                                continue
+                        if not line:
+                            continue
 
-                            if line.startswith("data: "):
-                                data = line[6:]
-                                if data == "[DONE]":
-                                    break
+                        if line.startswith("data: "):
+                            data = line[6:]
+                            if data == "[DONE]":
+                                break
 
-                                try:
-                                    data_obj = json.loads(data)
+                            try:
+                                data_obj = json.loads(data)
 
-                                    choice = data_obj.get("choices", [{}])[0]
+                                choice = data_obj.get("choices", [{}])[0]
 
-                                    # Chat completions use delta -> content.
-                                    delta = choice.get("delta", {})
-                                    content = (
-                                        delta.get("content")
-                                        or delta.get("text")
-                                        or choice.get("text")
-                                    )
+                                # Chat completions use delta -> content.
+                                delta = choice.get("delta", {})
+                                content = (
+                                    delta.get("content")
+                                    or delta.get("text")
+                                    or choice.get("text")
+                                )
 
-                                    usage = data_obj.get("usage", {})
+                                usage = data_obj.get("usage", {})
 
-                                    if not usage:
-                                        continue
+                                if not usage:
+                                    continue
 
-                                    completion_tokens = usage.get(
-                                        "completion_tokens", 0
-                                    )
-                                    prompt_tokens = usage.get("prompt_tokens", 0)
+                                completion_tokens = usage.get("completion_tokens", 0)
+                                prompt_tokens = usage.get("prompt_tokens", 0)
 
-                                    if content:
-                                        response_text += content
-                                        self.update_request_tokens(
-                                            self.count_tokens(content)
-                                        )
-                                except (json.JSONDecodeError, IndexError):
-                                    # ignore malformed json chunks
-                                    pass
+                                if content:
+                                    response_text += content
+                                    self.receive_chunk(content)
+                            except (json.JSONDecodeError, IndexError):
+                                # ignore malformed json chunks
+                                pass
 
             # Save token stats for logging
             self._returned_prompt_tokens = prompt_tokens
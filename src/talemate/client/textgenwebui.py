@@ -1,10 +1,5 @@
 import random
 import re
-import json
-import sseclient
-import requests
-import asyncio
-import httpx
 import structlog
 
 from talemate.client.base import STOPPING_STRINGS, ClientBase, Defaults
@@ -131,12 +126,12 @@ class TextGeneratorWebuiClient(ClientBase):
         return prompt, True
 
     async def get_model_name(self):
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.api_url}/v1/internal/model/info",
-                timeout=self.status_request_timeout,
-                headers=self.request_headers,
-            )
+        client = self.http_client
+        response = await client.get(
+            f"{self.api_url}/v1/internal/model/info",
+            timeout=self.status_request_timeout,
+            headers=self.request_headers,
+        )
         if response.status_code == 404:
             raise Exception("Could not find model info (wrong api version?)")
         response_data = response.json()
@@ -151,44 +146,25 @@ class TextGeneratorWebuiClient(ClientBase):
         """
         Trigger the stop generation endpoint
         """
-        async with httpx.AsyncClient() as client:
-            await client.post(
-                f"{self.api_url}/v1/internal/stop-generation",
-                headers=self.request_headers,
-            )
-
-    async def generate(self, prompt: str, parameters: dict, kind: str):
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            None, self._generate, prompt, parameters, kind
+        client = self.http_client
+        await client.post(
+            f"{self.api_url}/v1/internal/stop-generation",
+            headers=self.request_headers,
         )
 
-    def _generate(self, prompt: str, parameters: dict, kind: str):
+    async def generate(self, prompt: str, parameters: dict, kind: str):
         """
         Generates text from the given prompt and parameters.
         """
         parameters["prompt"] = prompt.strip(" ")
-
-        response = ""
         parameters["stream"] = True
-        stream_response = requests.post(
-            f"{self.api_url}/v1/completions",
-            json=parameters,
-            timeout=None,
-            headers=self.request_headers,
-            stream=True,
-        )
-        stream_response.raise_for_status()
-
-        sse = sseclient.SSEClient(stream_response)
 
-        for event in sse.events():
-            payload = json.loads(event.data)
-            chunk = payload["choices"][0]["text"]
-            response += chunk
-            self.update_request_tokens(self.count_tokens(chunk))
-
-        return response
+        events = self.sse_events(
+            f"{self.api_url}/v1/completions", parameters, headers=self.request_headers
+        )
+        return await self.collect_stream(
+            event["choices"][0]["text"] async for event in events
+        )
 
     def jiggle_randomness(self, prompt_config: dict, offset: float = 0.3) -> dict:
         """
@@ -45,6 +45,10 @@ class Client(pydantic.BaseModel):
     # max requests per minute
     rate_limit: Union[int, None] = None
 
+    # max requests that may be sent at the same time by tasks that can
+    # run in parallel (e.g., rebuilding the history)
+    max_concurrent_requests: int = 1
+
     # expected data structure format in responses
     data_format: Literal["json", "yaml"] | None = None
 
@@ -113,6 +117,7 @@ class General(pydantic.BaseModel):
     auto_progress: bool = True
     max_backscroll: int = 100
     add_default_character: bool = True
+    stream_responses: bool = False
 
 
 class StateReinforcementTemplate(pydantic.BaseModel):
@@ -25,6 +25,7 @@ AgentStatus = signal("agent_status")
 RequestAgentStatus = signal("request_agent_status")
 ClientBootstraps = signal("client_bootstraps")
 PromptSent = signal("prompt_sent")
+PartialResponse = signal("partial_response")
 MemoryRequest = signal("memory_request")
 
 RemoveMessage = signal("remove_message")
@@ -76,6 +77,7 @@ handlers = {
     "archived_history": ArchivedHistory,
     "message_edited": MessageEdited,
     "prompt_sent": PromptSent,
+    "partial_response": PartialResponse,
     "audio_queue": AudioQueue,
     "status": StatusMessage,
     "image_generated": ImageGenerated,
@@ -32,6 +32,11 @@ class ArchiveEvent(Event):
     ts: str = None
 
 
+@dataclass
+class ArchiveManyEvent(Event):
+    entries: list[ArchiveEvent]
+
+
 @dataclass
 class CharacterStateEvent(Event):
     state: str
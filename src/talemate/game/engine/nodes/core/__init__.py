@@ -1,6 +1,8 @@
 import pydantic
+import random
 import uuid
 from typing import Any, Callable, ClassVar, Annotated
+import functools
 import networkx as nx
 import contextvars
 import asyncio
@@ -394,8 +396,23 @@ class SaveContext:
         save_state.reset(self.token)
 
 
+# private generator for socket ids, so code seeding the global
+# random module can not make socket ids repeat
+_socket_id_random = random.Random()
+
+
+def new_socket_id() -> str:
+    """
+    Random uuid4 string for sockets.
+
+    Every node instance creates its sockets anew, random.getrandbits
+    is considerably cheaper than the os.urandom call made by uuid.uuid4.
+    """
+    return str(uuid.UUID(int=_socket_id_random.getrandbits(128), version=4))
+
+
 class Socket(pydantic.BaseModel):
-    id: str = pydantic.Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = pydantic.Field(default_factory=lambda: new_socket_id())
     name: str
     node: "NodeBase | None" = pydantic.Field(exclude=True, default=None)
 
@@ -1356,6 +1373,78 @@ class ModuleStyle(Node):
         pass
 
 
+class ExecutionPlan:
+    """
+    Compiled execution order of a graph's nodes.
+
+    Holds the node dependency graph built from the graph's edges, its
+    weakly connected components (chains) sorted by priority and the
+    topologically sorted node ids of each chain.
+
+    A graph keeps its plan until its nodes or edges change, so repeated
+    executions (and every loop iteration) reuse it instead of rebuilding
+    and sorting the dependency graph.
+    """
+
+    def __init__(self, graph: nx.DiGraph, priority: Callable[[set[str]], float]):
+        self.graph = graph
+        self.priority = priority
+        self._subplans: dict[tuple[str, bool], "ExecutionPlan"] = {}
+
+    @functools.cached_property
+    def is_acyclic(self) -> bool:
+        return nx.is_directed_acyclic_graph(self.graph)
+
+    def validate(self):
+        if not self.is_acyclic:
+            raise ValueError("Graph contains cycles")
+
+    @functools.cached_property
+    def chains(self) -> list[list[str]]:
+        """
+        Topologically sorted node ids of each chain, in priority order
+        """
+        self.validate()
+
+        chains = list(nx.weakly_connected_components(self.graph))
+        chains.sort(key=self.priority)
+
+        return [
+            list(nx.topological_sort(self.graph.subgraph(chain))) for chain in chains
+        ]
+
+    @property
+    def predecessors(self) -> dict[str, dict]:
+        """
+        node id -> ids of the nodes it directly depends on
+        """
+        return self.graph.pred
+
+    @property
+    def successors(self) -> dict[str, dict]:
+        """
+        node id -> ids of the nodes that directly depend on it
+        """
+        return self.graph.succ
+
+    def subplan(self, node_id: str, execute_forks: bool = False) -> "ExecutionPlan":
+        """
+        Plan for executing only the nodes required to reach `node_id`
+        """
+        key = (node_id, execute_forks)
+        if key not in self._subplans:
+            if not execute_forks:
+                predecessors = nx.ancestors(self.graph, node_id)
+            else:
+                predecessors = get_ancestors_with_forks(self.graph, node_id)
+            predecessors.add(node_id)
+
+            self._subplans[key] = ExecutionPlan(
+                self.graph.subgraph(predecessors), self.priority
+            )
+        return self._subplans[key]
+
+
 @base_node_type("core/Graph")
 class Graph(NodeBase):
     nodes: dict[str, RegistryNode] = pydantic.Field(default_factory=dict)
@@ -1369,6 +1458,8 @@ class Graph(NodeBase):
     callbacks: list[Callable] = pydantic.Field(default_factory=list, exclude=True)
 
     _interrupt: bool = False
+    _execution_plan: ExecutionPlan | None = None
+    _input_sources: dict[str, str] | None = None
 
     @property
     def input_nodes(self) -> list[Input]:
@@ -1538,6 +1629,15 @@ class Graph(NodeBase):
         return data
 
     def reinitialize(self) -> "Graph":
+        self.invalidate_edges()
+        return self._relink()
+
+    def _relink(self) -> "Graph":
+        """
+        Restores socket references, ephemeral properties and connections.
+
+        Does not change nodes or edges, so the execution plan stays valid.
+        """
         self.set_node_references()
         self.set_socket_source_references()
         self.reset_ephemeral_properties()
@@ -1553,7 +1653,7 @@ class Graph(NodeBase):
                 socket.value = UNRESOLVED
                 socket.deactivated = False
 
-        self.reinitialize()
+        self._relink()
 
     def reset_sockets(self):
         """
@@ -1619,16 +1719,13 @@ class Graph(NodeBase):
         the `source` reference based on the edge connections
         """
 
+        input_sources = self.input_sources()
+
         for node in self.nodes.values():
             for socket in node.inputs:
-                for output_socket_id, input_socket_ids in self.edges.items():
-                    output_node_id, output_socket_name = output_socket_id.split(".", 1)
-                    if socket.id in input_socket_ids:
-                        output_socket = self.sockets[
-                            f"{output_node_id}.{output_socket_name}"
-                        ]
-                        socket.source = output_socket
-                        break
+                output_socket_id = input_sources.get(socket.id)
+                if output_socket_id:
+                    socket.source = self.sockets[output_socket_id]
         return self
 
     def node(self, node_id: str) -> NodeBase:
@@ -1636,6 +1733,7 @@ class Graph(NodeBase):
 
     def add_node(self, node: NodeBase):
         self.nodes[node.id] = node
+        self.invalidate_edges()
 
         for socket in node.inputs + node.outputs:
             self.sockets[socket.id] = socket
@@ -1665,6 +1763,7 @@ class Graph(NodeBase):
 
         if input_socket.full_id not in self.edges[output_socket.full_id]:
             self.edges[output_socket.full_id].append(input_socket.full_id)
+            self.invalidate_edges()
         input_socket.source = output_socket
 
     def build(self) -> nx.DiGraph:
@@ -1684,6 +1783,38 @@ class Graph(NodeBase):
 
         return graph
 
+    def execution_plan(self) -> ExecutionPlan:
+        """
+        Returns the compiled execution plan, building it if the nodes
+        or edges changed since it was last built
+        """
+        if self._execution_plan is None:
+            self._execution_plan = ExecutionPlan(self.build(), self.assign_priority)
+        return self._execution_plan
+
+    def input_sources(self) -> dict[str, str]:
+        """
+        Returns the reverse edge index, input socket id -> output socket id,
+        building it if the edges changed since it was last built
+        """
+        if self._input_sources is None:
+            input_sources = {}
+            for output_socket_id, input_socket_ids in self.edges.items():
+                for input_socket_id in input_socket_ids:
+                    input_sources.setdefault(input_socket_id, output_socket_id)
+            self._input_sources = input_sources
+        return self._input_sources
+
+    def invalidate_edges(self):
+        """
+        Discards the compiled execution plan and the reverse edge index.
+
+        Needs to be called when nodes or edges are changed directly
+        instead of through `add_node` or `connect`.
+        """
+        self._execution_plan = None
+        self._input_sources = None
+
     def assign_priority(self, node_chain: nx.DiGraph) -> int:
         """
         Will search for a Stage type
@@ -1799,7 +1930,7 @@ class Graph(NodeBase):
         """
         Returns a list of nodes connected to the given node
         """
-        graph = self.build()
+        graph = self.execution_plan().graph
         predecessors = get_ancestors_with_forks(graph, node.id)
         if not fn_filter:
             return [self.nodes[node_id] for node_id in predecessors]
@@ -1820,32 +1951,23 @@ class Graph(NodeBase):
         run_isolated: bool = True,
     ):
         """Execute the graph in topological order"""
-        graph = self.build()
 
         # check that node exists
         if stop_at_node.id not in self.nodes:
             raise ValueError(f"Node {stop_at_node.id} not found in graph")
 
-        # Get all predecessor nodes including the target node
-        if not execute_forks:
-            predecessors = nx.ancestors(graph, stop_at_node.id)
-        else:
-            predecessors = get_ancestors_with_forks(graph, stop_at_node.id)
-        predecessors.add(stop_at_node.id)
-
-        # Get subgraph of only the nodes we need to execute
-        subgraph = graph.subgraph(predecessors)
+        # plan for only the nodes we need to execute, including the target node
+        plan = self.execution_plan().subplan(stop_at_node.id, execute_forks)
 
         # Check for cycles
-        if not nx.is_directed_acyclic_graph(subgraph):
-            raise ValueError("Graph contains cycles")
+        plan.validate()
 
         with GraphContext(outer_state, self) as state:
             if state_values:
                 state.data.update(state_values)
 
             await self._execute_inner(
-                subgraph, state, emit_state=emit_state, run_isolated=run_isolated
+                plan, state, emit_state=emit_state, run_isolated=run_isolated
             )
 
             for callback in callbacks:
@@ -1861,11 +1983,10 @@ class Graph(NodeBase):
     ):
         """Execute the graph in topological order"""
 
-        graph = self.build()
+        plan = self.execution_plan()
 
         # Check for cycles
-        if not nx.is_directed_acyclic_graph(graph):
-            raise ValueError("Graph contains cycles")
+        plan.validate()
 
         with GraphContext(outer_state, self) as state:
             self.reset()
@@ -1874,7 +1995,7 @@ class Graph(NodeBase):
                 state.data.update(state_values)
 
             await self.node_state_sync_all(state)
-            await self._execute_inner(graph, state)
+            await self._execute_inner(plan, state)
             for callback in self.callbacks:
                 await callback(state)
             for callback in callbacks:
@@ -1882,7 +2003,7 @@ class Graph(NodeBase):
 
     async def _execute_inner(
         self,
-        graph: nx.DiGraph,
+        plan: ExecutionPlan,
         state: GraphState,
         emit_state: bool = True,
         run_isolated: bool = False,
@@ -1911,17 +2032,8 @@ class Graph(NodeBase):
                 value = self.get_property(name)
                 node.set_output_values({"name": name, "value": node.cast_value(value)})
 
-            # Separate into weakly connected components (isolated chains)
-            chains = list(nx.weakly_connected_components(graph))
-
-            # sort chains by priority
-            chains.sort(key=lambda chain: self.assign_priority(chain))
-
-            for chain in chains:
-                subgraph = graph.subgraph(chain)
-
-                sorted_nodes = list(nx.topological_sort(subgraph))
-
+            # isolated chains in priority order
+            for sorted_nodes in plan.chains:
                 # check if the final in the chain is _isolated, and if so, skip the chain
                 if self.nodes[sorted_nodes[-1]]._isolated and not run_isolated:
                     continue
@@ -2061,10 +2173,10 @@ class Loop(Graph):
         run_isolated: bool = False,
     ):
         """Execute the graph in topological order"""
-        graph = self.build()
+        plan = self.execution_plan()
 
-        if not nx.is_directed_acyclic_graph(graph):
-            raise ValueError("Graph contains cycles")
+        # Check for cycles
+        plan.validate()
 
         with GraphContext(outer_state, self) as state:
             self.reset()
@@ -2073,12 +2185,6 @@ class Loop(Graph):
                 state.data.update(state_values)
 
             try:
-                # Separate into weakly connected components (isolated chains)
-                chains = list(nx.weakly_connected_components(graph))
-
-                # sort chains by priority
-                chains.sort(key=lambda chain: self.assign_priority(chain))
-
                 while True:
                     self.reset_sockets()
 
@@ -2106,16 +2212,13 @@ class Loop(Graph):
 
                     # PROCESS NODE CHAINS
 
-                    for chain in chains:
+                    # isolated chains in priority order
+                    for sorted_nodes in plan.chains:
                         if BREAK_LOOP:
                             break
 
                         await self.node_state_sync_all(state)
 
-                        subgraph = graph.subgraph(chain)
-
-                        sorted_nodes = list(nx.topological_sort(subgraph))
-
                         # check if the final in the chain is _isolated, and if so, skip the chain
                         if self.nodes[sorted_nodes[-1]]._isolated and not run_isolated:
                             continue
@@ -236,6 +236,8 @@ def import_flat_graph(flat_data: dict, main_graph: "Graph" = None) -> Graph:
             if connection["to"] not in graph.edges[connection["from"]]:
                 graph.edges[connection["from"]].append(connection["to"])
 
+        graph.invalidate_edges()
+
     node_map = {}  # Maps node IDs to node instances
 
     # First pass: Create all nodes and build hierarchy
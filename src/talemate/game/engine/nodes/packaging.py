@@ -378,6 +378,7 @@ async def uninstall_package(scene: "Scene", package_registry: str):
     if scene_loop:
         for node_id in package_data.installed_nodes:
             scene_loop.nodes.pop(node_id, None)
+        scene_loop.invalidate_edges()
 
     package_data.installed_nodes = []
 
@@ -346,8 +346,10 @@ def import_node_definition(
 
     try:
         node_cls = registry[node_data["registry"]]
+        imported = False
     except KeyError:
         node_cls = dynamic_node_import(node_data, node_data["registry"], registry)
+        imported = True
 
     node = node_cls()
 
@@ -356,7 +358,10 @@ def import_node_definition(
             field = node.get_property_field(prop_name)
             field.model_validate(prop_data)
 
-    node.model_validate(node_data)
+    # a class imported from node_data already validated it when
+    # it was instantiated above
+    if not imported:
+        node.model_validate(node_data)
 
     registry[node_data["registry"]] = node_cls
 
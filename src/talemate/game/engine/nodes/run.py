@@ -2,7 +2,7 @@ import structlog
 import pydantic
 import asyncio
 import dataclasses
-from typing import ClassVar
+from typing import ClassVar, Iterable
 from talemate.game.engine.nodes.core import (
     Node,
     register,
@@ -22,6 +22,7 @@ from talemate.game.engine.nodes.core import (
 from talemate.game.engine.nodes.core.exception import ExceptionWrapper
 from talemate.game.engine.nodes.base_types import base_node_type
 from talemate.context import active_scene
+from talemate.util.async_tools import run_ordered
 import talemate.emit.async_signals as async_signals
 
 
@@ -101,6 +102,25 @@ class FunctionWrapper:
 
         return result
 
+    async def map(self, arguments: Iterable[dict], concurrency: int = 1) -> list:
+        """
+        Calls the function once for each set of keyword arguments and
+        returns the results in the same order
+
+        With a concurrency above 1, up to that many calls run at once. Every
+        call runs in its own graph state, only `state.shared` is shared
+        between them. If a call fails, the calls still running are cancelled
+        and the exception is raised.
+        """
+
+        if concurrency <= 1:
+            return [await self(**kwargs) for kwargs in arguments]
+
+        async def call(kwargs: dict):
+            return await self(**kwargs)
+
+        return await run_ordered(arguments, call, concurrency=concurrency)
+
     async def get_argument_nodes(self):
         if self.endpoint != self.containing_graph:
             return await self.containing_graph.get_nodes_connected_to(
@@ -391,6 +411,8 @@ class CallForEach(Node):
 
     - copy_items: Whether to copy the items list (default: False)
     - argument_name: The name of the argument to pass to the function (default: item)
+    - concurrency: Max. number of function calls to run at once, 1 calls the
+      function for one item after another (default: 1)
 
     Outputs:
 
@@ -413,6 +435,16 @@ class CallForEach(Node):
             default="item",
         )
 
+        concurrency = PropertyField(
+            type="int",
+            name="concurrency",
+            description="Max. number of function calls to run at once",
+            default=1,
+            step=1,
+            min=1,
+            max=16,
+        )
+
     def __init__(self, title="Call For Each", **kwargs):
         super().__init__(title=title, **kwargs)
 
@@ -423,6 +455,7 @@ class CallForEach(Node):
 
         self.set_property("copy_items", False)
         self.set_property("argument_name", "item")
+        self.set_property("concurrency", 1)
         self.add_output("state")
         self.add_output("results", socket_type="list")
 
@@ -431,6 +464,7 @@ class CallForEach(Node):
         items = self.get_input_value("items")
         argument_name = self.get_property("argument_name")
         copy_items = self.get_property("copy_items")
+        concurrency = self.get_property("concurrency")
 
         if not argument_name:
             raise InputValueError(self, "argument_name", "Argument name is required")
@@ -441,14 +475,13 @@ class CallForEach(Node):
         if not isinstance(items, list):
             raise InputValueError(self, "items", "items must be a list")
 
-        results = []
-
         if copy_items:
             items = items.copy()
 
-        for item in items:
-            result = await fn(**{argument_name: item})
-            results.append(result)
+        results = await fn.map(
+            ({argument_name: item} for item in items),
+            concurrency=int(concurrency or 1),
+        )
 
         self.set_output_values(
             {
@@ -24,12 +24,14 @@ from talemate.util import (
     duration_to_timedelta,
 )
 from talemate.world_state.templates import GenerationOptions
-from talemate.exceptions import GenerationCancelled
+from talemate.exceptions import GenerationCancelled, SceneInactiveError
 from talemate.context import handle_generation_cancelled
-from talemate.events import ArchiveEvent
+from talemate.events import ArchiveEvent, ArchiveManyEvent
+from talemate.util.async_tools import run_ordered
 
 if TYPE_CHECKING:
     from talemate.tale_mate import Scene
+    from talemate.agents.summarize import ArchivePlan
 
 __all__ = [
     "history_with_relative_time",
@@ -42,6 +44,7 @@ __all__ = [
     "resolve_history_entry",
     "entry_contained",
     "emit_archive_add",
+    "emit_archive_add_many",
     "add_history_entry",
     "delete_history_entry",
     "reimport_history",
@@ -50,7 +53,7 @@ __all__ = [
 log = structlog.get_logger()
 
 
-async_signals.register("archive_add")
+async_signals.register("archive_add", "archive_add_many")
 
 
 class UnregeneratableEntryError(Exception):
@@ -114,6 +117,31 @@ async def emit_archive_add(scene: "Scene", entry: ArchiveEntry):
     )
 
 
+async def emit_archive_add_many(scene: "Scene", entries: list[ArchiveEntry]):
+    """
+    Emits the archive_add_many signal for a batch of archive entries
+
+    Use this instead of `emit_archive_add` when (re)importing the whole
+    history, so the memory agent can embed and store the entries in bulk.
+    """
+    await async_signals.get("archive_add_many").send(
+        ArchiveManyEvent(
+            scene=scene,
+            event_type="archive_add_many",
+            entries=[
+                ArchiveEvent(
+                    scene=scene,
+                    event_type="archive_add",
+                    text=entry.text,
+                    ts=entry.ts,
+                    memory_id=entry.id,
+                )
+                for entry in entries
+            ],
+        )
+    )
+
+
 def resolve_history_entry(
     scene: "Scene", entry: HistoryEntry
 ) -> LayeredArchiveEntry | ArchiveEntry:
@@ -315,35 +343,68 @@ async def rebuild_history(
     entries = 0
     total_entries = summarizer.estimated_entry_count
 
-    try:
+    emission = await summarizer.start_build_archive(generation_options)
+
+    async def plan_entries():
+        """
+        Plans the archive entries one after another, each one continues
+        where the previous one ended, whether it has been committed yet or not
+        """
+        if not emission:
+            # archiving is disabled
+            return
+
+        plan = None
         while True:
             await asyncio.sleep(0.1)
 
             if not scene.active:
-                # scene is no longer active
-                log.warning("Scene is no longer active, aborting rebuild of history")
-                emit("status", message="Rebuilding of archive aborted", status="info")
+                raise SceneInactiveError("Scene is no longer active")
+
+            plan = await summarizer.plan_archive_entry(scene, plan)
+
+            if not plan:
                 return
 
-            emit(
-                "status",
-                message=f"Rebuilding historical archive... {entries}/~{total_entries}",
-                status="busy",
-                data={"cancellable": True},
-            )
+            yield plan
 
-            more = await summarizer.build_archive(
-                scene, generation_options=generation_options
-            )
+    async def summarize_entry(plan: "ArchivePlan") -> str:
+        emit(
+            "status",
+            message=f"Rebuilding historical archive... {entries}/~{total_entries}",
+            status="busy",
+            data={"cancellable": True},
+        )
+        return await summarizer.summarize_archive_entry(
+            scene, plan, generation_options=generation_options
+        )
 
-            scene.sync_time()
+    async def commit_entry(plan: "ArchivePlan", summarized: str):
+        nonlocal entries
 
-            if callback:
-                await callback()
+        await summarizer.commit_archive_entry(scene, plan, summarized, emission)
 
-            entries += 1
-            if not more:
-                break
+        scene.sync_time()
+
+        if callback:
+            await callback()
+
+        entries += 1
+
+    try:
+        # entries are summarized in parallel up to the client's concurrency
+        # limit, but always committed in order
+        await run_ordered(
+            plan_entries(),
+            summarize_entry,
+            commit_entry,
+            concurrency=summarizer.client.max_concurrent_requests,
+        )
+    except SceneInactiveError:
+        # scene is no longer active
+        log.warning("Scene is no longer active, aborting rebuild of history")
+        emit("status", message="Rebuilding of archive aborted", status="info")
+        return
     except GenerationCancelled as e:
         log.info("Generation cancelled, stopping rebuild of historical archive")
         emit("status", message="Rebuilding of archive cancelled", status="info")
@@ -547,8 +608,9 @@ async def validate_history(scene: "Scene") -> bool:
 
     # always send the archive_add signal for all entries
     # this ensures the entries are up to date in the memory database
-    for entry in scene.archived_history:
-        await emit_archive_add(scene, ArchiveEntry(**entry))
+    await emit_archive_add_many(
+        scene, [ArchiveEntry(**entry) for entry in scene.archived_history]
+    )
 
     for layer_index, layer in enumerate(layered_history):
         for entry_index, entry in enumerate(layer):
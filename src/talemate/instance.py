@@ -37,6 +37,14 @@ async def destroy_client(name: str):
         del CLIENTS[name]
 
 
+async def destroy_agents():
+    for agent in AGENTS.values():
+        try:
+            await agent.destroy()
+        except Exception as exc:
+            log.error("destroy_agents", agent=agent.agent_type, exc=exc)
+
+
 def get_client(name: str):
     client = CLIENTS.get(name)
 
@@ -1,3 +1,4 @@
+import asyncio
 import enum
 import json
 import os
@@ -17,6 +18,7 @@ from talemate.character import deactivate_character
 from talemate.config import get_config, Config
 from talemate.config.schema import GamePlayerCharacter
 from talemate.context import SceneIsLoading
+from talemate.emit import emit
 from talemate.exceptions import UnknownDataSpec
 from talemate.game.state import GameState
 from talemate.scene_message import (
@@ -27,6 +29,7 @@ from talemate.scene_message import (
     ReinforcementMessage,
     SceneMessage,
     reset_message_id,
+    set_message_id,
 )
 from talemate.status import LoadingStatus, set_loading
 from talemate.util import extract_metadata
@@ -34,6 +37,7 @@ from talemate.world_state import WorldState
 from talemate.game.engine.nodes.registry import import_scene_node_definitions
 from talemate.scene.intent import SceneIntent
 from talemate.history import validate_history
+from talemate.save import json_loads, read_scene_file
 import talemate.agents.tts.voice_library as voice_library
 from talemate.path import SCENES_DIR
 
@@ -50,6 +54,9 @@ __all__ = [
 
 log = structlog.get_logger("talemate.load")
 
+# number of older history messages built between yields to the event loop
+HISTORY_CHUNK_SIZE = 1000
+
 
 class ImportSpec(str, enum.Enum):
     talemate = "talemate"
@@ -85,8 +92,8 @@ async def load_scene(scene, file_path, reset: bool = False):
                 return await load_scene_from_zip(scene, file_path, reset)
 
             # a json file was uploaded, load the scene data
-            with open(file_path, "r") as f:
-                scene_data = json.load(f)
+            # (replaying the save journal, if there is one)
+            scene_data = read_scene_file(file_path)
 
             # check if the data is a character card
             # this will also raise an exception if the data is not recognized
@@ -301,6 +308,7 @@ async def load_scene_from_data(
     scene.name = scene_data.get("name", "Unknown Scene")
     scene.environment = scene_data.get("environment", "scene")
     scene.filename = None
+    scene.journal.reset()
     scene.immutable_save = scene_data.get("immutable_save", False)
     scene.experimental = scene_data.get("experimental", False)
     scene.help = scene_data.get("help", "")
@@ -312,11 +320,17 @@ async def load_scene_from_data(
 
     import_scene_node_definitions(scene)
 
+    characters = [
+        Character(**character_data) for character_data in scene_data["characters"]
+    ]
+
     if not reset:
         scene.memory_id = scene_data.get("memory_id", scene.memory_id)
         scene.saved_memory_session_id = scene_data.get("saved_memory_session_id", None)
         scene.memory_session_id = scene_data.get("memory_session_id", None)
-        scene.history = _load_history(scene_data["history"])
+        scene.history = await _load_history_backscroll_first(
+            scene, scene_data["history"], characters
+        )
         scene.archived_history = scene_data["archived_history"]
         scene.layered_history = scene_data.get("layered_history", [])
         scene.world_state = WorldState(**scene_data.get("world_state", {}))
@@ -351,9 +365,7 @@ async def load_scene_from_data(
     ).items():
         scene.inactive_characters[character_name] = Character(**character_data)
 
-    for character_data in scene_data["characters"]:
-        character = Character(**character_data)
-
+    for character in characters:
         if character.name in scene.inactive_characters:
             scene.inactive_characters.pop(character.name)
 
@@ -411,8 +423,8 @@ async def load_scene_from_zip(scene, zip_path, reset: bool = False):
 
         # Load scene.json
         scene_json_path = temp_path / "scene.json"
-        with open(scene_json_path, "r", encoding="utf-8") as f:
-            scene_data = json.load(f)
+        with open(scene_json_path, "rb") as f:
+            scene_data = json_loads(f.read())
 
         log.debug(
             "Loaded scene JSON from ZIP", scene_name=scene_data.get("name", "Unknown")
@@ -560,8 +572,7 @@ async def transfer_character(scene, scene_json_path, character_name):
     :return: The updated scene with the new character.
     """
     # Load the json file
-    with open(scene_json_path, "r") as f:
-        scene_data = json.load(f)
+    scene_data = read_scene_file(scene_json_path)
 
     agent = instance.get_agent("conversation")
 
@@ -757,20 +768,56 @@ def default_player_character() -> Player | None:
     )
 
 
-def _load_history(history):
+async def _load_history_backscroll_first(
+    scene, history: list, characters: list[Character]
+) -> list[SceneMessage]:
+    """
+    Builds the scene messages, starting with the last `max_backscroll`
+    ones, which are emitted to the frontend right away
+
+    Older messages are built afterwards in chunks, yielding to the event
+    loop in between, so the backscroll reaches the frontend while the rest
+    of the history is still hydrating.
+    """
+    split = max(len(history) - scene.max_backscroll, 0)
+    backscroll = _load_history(history[split:], start_id=split)
+
+    # message ids follow the position in history, move the counter past
+    # them before yielding so messages created meanwhile don't collide
+    set_message_id(len(history))
+
+    characters_by_name = {character.name: character for character in characters}
+    emit("clear_screen", "")
+    for message in backscroll:
+        if isinstance(message, CharacterMessage):
+            character = characters_by_name.get(message.character_name)
+        else:
+            character = None
+        emit(message.typ, message, character=character)
+
+    older = []
+    for start in range(0, split, HISTORY_CHUNK_SIZE):
+        await asyncio.sleep(0)
+        end = min(start + HISTORY_CHUNK_SIZE, split)
+        older.extend(_load_history(history[start:end], start_id=start))
+
+    return older + backscroll
+
+
+def _load_history(history, start_id: int = 0):
     _history = []
 
-    for text in history:
+    for index, text in enumerate(history, start=start_id + 1):
         if isinstance(text, str):
-            _history.append(_prepare_legacy_history(text))
+            _history.append(_prepare_legacy_history(text, index))
 
         elif isinstance(text, dict):
-            _history.append(_prepare_history(text))
+            _history.append(_prepare_history(text, index))
 
     return _history
 
 
-def _prepare_history(entry):
+def _prepare_history(entry, message_id: int):
     typ = entry.pop("typ", "scene_message")
     entry.pop("id", None)
 
@@ -779,7 +826,7 @@ def _prepare_history(entry):
 
     cls = MESSAGES.get(typ, SceneMessage)
 
-    msg = cls(**entry)
+    msg = cls(**entry, id=message_id)
 
     if isinstance(msg, (NarratorMessage, ReinforcementMessage)):
         msg = msg.migrate_source_to_meta()
@@ -789,7 +836,7 @@ def _prepare_history(entry):
     return msg
 
 
-def _prepare_legacy_history(entry):
+def _prepare_legacy_history(entry, message_id: int):
     """
     Convers legacy history to new format
 
@@ -804,7 +851,7 @@ def _prepare_legacy_history(entry):
     else:
         cls = CharacterMessage
 
-    return cls(entry)
+    return cls(entry, id=message_id)
 
 
 def new_scene():
@@ -8,6 +8,7 @@ changeable and extensible.
 import asyncio
 import dataclasses
 import fnmatch
+import functools
 import json
 import traceback
 import yaml
@@ -47,12 +48,22 @@ __all__ = [
     "SECTIONING_HANDLERS",
     "DEFAULT_SECTIONING_HANDLER",
     "set_default_sectioning_handler",
+    "get_template_env",
 ]
 
 log = structlog.get_logger("talemate")
 
 prepended_template_dirs = ContextVar("prepended_template_dirs", default=[])
 
+BASE_DIR = os.path.dirname(os.path.realpath(__file__))
+
+# jinja2 environments by (agent_type, prepended template dirs)
+TEMPLATE_ENVS: dict[tuple[str, tuple[str, ...]], jinja2.Environment] = {}
+
+# compiled bytecode is shared by all environments, jinja2 keys it by
+# template name and source checksum so changed templates are recompiled
+BYTECODE_CACHE = jinja2.FileSystemBytecodeCache()
+
 
 class PydanticJsonEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -80,6 +91,9 @@ nest_asyncio.apply()
 SECTIONING_HANDLERS = {}
 DEFAULT_SECTIONING_HANDLER = "titles"
 
+SECOND_PASS_MARKER_PATTERN = re.compile(r"\{!\{(.*?)\}!\}", re.DOTALL)
+NEWLINE_PATTERN = re.compile(r"\r\n|\r")
+
 
 class register_sectioning_handler:
     def __init__(self, name):
@@ -214,6 +228,98 @@ class JoinableList(list):
         return separator.join(self)
 
 
+class TemplateLoader(jinja2.FileSystemLoader):
+    """
+    FileSystemLoader that also treats a cached template as stale when a
+    file with the same name shows up in a higher priority search path,
+    e.g. a template override added while talemate is running.
+    """
+
+    def get_source(self, environment: jinja2.Environment, template: str):
+        contents, filename, uptodate = super().get_source(environment, template)
+
+        pieces = jinja2.loaders.split_template_path(template)
+        shadowing = []
+        for searchpath in self.searchpath:
+            candidate = os.path.normpath(os.path.join(searchpath, *pieces))
+            if candidate == os.path.normpath(filename):
+                break
+            shadowing.append(candidate)
+
+        def _uptodate() -> bool:
+            if not uptodate():
+                return False
+            return not any(os.path.isfile(path) for path in shadowing)
+
+        return contents, filename, _uptodate
+
+
+def get_template_env(
+    agent_type: str, prepend_dirs: list[str] | None = None
+) -> jinja2.Environment:
+    """
+    Returns the shared jinja2 environment for an agent type and set of
+    prepended template directories, creating it on first use.
+
+    Keeping the environment around lets jinja2 keep its compiled template
+    cache. Templates are reloaded when their file modification time changes.
+    """
+
+    key = (agent_type, tuple(prepend_dirs or []))
+
+    try:
+        return TEMPLATE_ENVS[key]
+    except KeyError:
+        pass
+
+    template_dirs = list(key[1]) + [
+        os.path.join(BASE_DIR, "..", "..", "..", "templates", "prompts", agent_type),
+        os.path.join(BASE_DIR, "..", "..", "..", "templates", "prompts", "common"),
+        os.path.join(BASE_DIR, "..", "..", "..", "templates", "modules"),
+        os.path.join(BASE_DIR, "templates", agent_type),
+        os.path.join(BASE_DIR, "templates", "common"),
+    ]
+
+    env = jinja2.Environment(
+        loader=TemplateLoader(template_dirs),
+        bytecode_cache=BYTECODE_CACHE,
+        auto_reload=True,
+    )
+
+    env.globals["debug"] = lambda *a, **kw: log.debug(*a, **kw)
+    env.globals["random_as_str"] = lambda x, y: str(random.randint(x, y))
+    env.globals["random_choice"] = lambda x: random.choice(x)
+    env.globals["uuidgen"] = lambda: str(uuid.uuid4())
+    env.globals["to_int"] = lambda x: int(x)
+    env.globals["to_str"] = lambda x: str(x)
+    env.globals["len"] = lambda x: len(x)
+    env.globals["max"] = lambda x, y: max(x, y)
+    env.globals["min"] = lambda x, y: min(x, y)
+    env.globals["join"] = lambda x, y: y.join(x)
+    env.globals["make_list"] = lambda: JoinableList()
+    env.globals["make_dict"] = lambda: {}
+    env.globals["count_tokens"] = lambda x: count_tokens(dedupe_string(x, debug=False))
+    env.globals["print"] = lambda x: print(x)
+    env.globals["json"] = lambda x: json.dumps(x, indent=2, cls=PydanticJsonEncoder)
+    env.globals["emit_system"] = lambda status, message: emit(
+        "system", status=status, message=message
+    )
+    env.globals["emit_narrator"] = lambda message: emit("system", message=message)
+    env.filters["condensed"] = condensed
+    env.filters["no_chapters"] = no_chapters
+
+    TEMPLATE_ENVS[key] = env
+    return env
+
+
+@functools.lru_cache(maxsize=256)
+def compile_template_string(env: jinja2.Environment, source: str) -> jinja2.Template:
+    """
+    Compiles a template from a string, caching the result per environment
+    """
+    return env.from_string(source)
+
+
 @dataclasses.dataclass
 class Prompt:
     """
@@ -317,28 +423,8 @@ class Prompt:
     def __str__(self):
         return self.render()
 
-    def template_env(self):
-        # Get the directory of this file
-        dir_path = os.path.dirname(os.path.realpath(__file__))
-
-        _prepended_template_dirs = prepended_template_dirs.get() or []
-
-        _fixed_template_dirs = [
-            os.path.join(
-                dir_path, "..", "..", "..", "templates", "prompts", self.agent_type
-            ),
-            os.path.join(dir_path, "..", "..", "..", "templates", "prompts", "common"),
-            os.path.join(dir_path, "..", "..", "..", "templates", "modules"),
-            os.path.join(dir_path, "templates", self.agent_type),
-            os.path.join(dir_path, "templates", "common"),
-        ]
-
-        template_dirs = _prepended_template_dirs + _fixed_template_dirs
-
-        # Create a jinja2 environment with the appropriate template paths
-        return jinja2.Environment(
-            loader=jinja2.FileSystemLoader(template_dirs),
-        )
+    def template_env(self) -> jinja2.Environment:
+        return get_template_env(self.agent_type, prepended_template_dirs.get())
 
     def list_templates(self, search_pattern: str):
         env = self.template_env()
@@ -379,59 +465,7 @@ class Prompt:
             else {},
         }
 
-        env.globals["render_template"] = self.render_template
-        env.globals["render_and_request"] = self.render_and_request
-        env.globals["debug"] = lambda *a, **kw: log.debug(*a, **kw)
-        env.globals["set_prepared_response"] = self.set_prepared_response
-        env.globals["set_prepared_response_random"] = self.set_prepared_response_random
-        env.globals["set_eval_response"] = self.set_eval_response
-        env.globals["set_json_response"] = self.set_json_response
-        env.globals["set_data_response"] = self.set_data_response
-        env.globals["set_question_eval"] = self.set_question_eval
-        env.globals["disable_dedupe"] = self.disable_dedupe
-        env.globals["random"] = self.random
-        env.globals["random_as_str"] = lambda x, y: str(random.randint(x, y))
-        env.globals["random_choice"] = lambda x: random.choice(x)
-        env.globals["query_scene"] = self.query_scene
-        env.globals["query_memory"] = self.query_memory
-        env.globals["query_text"] = self.query_text
-        env.globals["query_text_eval"] = self.query_text_eval
-        env.globals["instruct_text"] = self.instruct_text
-        env.globals["agent_action"] = self.agent_action
-        env.globals["agent_config"] = self.agent_config
-        env.globals["retrieve_memories"] = self.retrieve_memories
-        env.globals["time_diff"] = self.time_diff
-        env.globals["uuidgen"] = lambda: str(uuid.uuid4())
-        env.globals["to_int"] = lambda x: int(x)
-        env.globals["to_str"] = lambda x: str(x)
-        env.globals["config"] = self.config
-        env.globals["li"] = self.get_bullet_num
-        env.globals["len"] = lambda x: len(x)
-        env.globals["max"] = lambda x, y: max(x, y)
-        env.globals["min"] = lambda x, y: min(x, y)
-        env.globals["join"] = lambda x, y: y.join(x)
-        env.globals["make_list"] = lambda: JoinableList()
-        env.globals["make_dict"] = lambda: {}
-        env.globals["join"] = lambda x, y: y.join(x)
-        env.globals["data_format_type"] = (
-            lambda: getattr(self.client, "data_format", None) or self.data_format_type
-        )
-        env.globals["count_tokens"] = lambda x: count_tokens(
-            dedupe_string(x, debug=False)
-        )
-        env.globals["print"] = lambda x: print(x)
-        env.globals["json"] = lambda x: json.dumps(x, indent=2, cls=PydanticJsonEncoder)
-        env.globals["emit_status"] = self.emit_status
-        env.globals["emit_system"] = lambda status, message: emit(
-            "system", status=status, message=message
-        )
-        env.globals["llm_can_be_coerced"] = lambda: (
-            self.client.can_be_coerced if self.client else False
-        )
-        env.globals["text_to_chunks"] = self.text_to_chunks
-        env.globals["emit_narrator"] = lambda message: emit("system", message=message)
-        env.filters["condensed"] = condensed
-        env.filters["no_chapters"] = no_chapters
+        ctx.update(self.template_callables())
         ctx.update(self.vars)
 
         if "decensor" not in ctx:
@@ -442,7 +476,7 @@ class Prompt:
             # no template text specified, load from file
             template = env.get_template("{}.jinja2".format(self.name))
         else:
-            template = env.from_string(self.template)
+            template = compile_template_string(env, self.template)
 
         sectioning_handler = SECTIONING_HANDLERS.get(self.sectioning_hander)
 
@@ -474,8 +508,11 @@ class Prompt:
 
     def render_second_pass(self, prompt_text: str):
         """
-        Will find all {!{ and }!} occurances replace them with {{ and }} and
-        then render the prompt again.
+        Will find all {!{ and }!} occurances and render their contents as
+        {{ }} expressions.
+
+        Only the marked fragments are rendered, the rest of the prompt is
+        left as is. If there are no markers jinja2 is skipped entirely.
         """
 
         # replace any {{ and }} as they are not from the scenario content
@@ -483,14 +520,27 @@ class Prompt:
 
         prompt_text = prompt_text.replace("{{", "__").replace("}}", "__")
 
-        # now replace {!{ and }!} with {{ and }} so that they are rendered
-        # these are internal to talemate
+        # keep the line ending normalization and trailing newline handling
+        # the prompt would have gotten from being rendered as a template
 
-        prompt_text = prompt_text.replace("{!{", "{{").replace("}!}", "}}")
+        if "\r" in prompt_text:
+            prompt_text = NEWLINE_PATTERN.sub("\n", prompt_text)
+        if prompt_text.endswith("\n"):
+            prompt_text = prompt_text[:-1]
 
-        env = self.template_env()
-        env.globals["random"] = self.random
-        parsed_text = env.from_string(prompt_text).render(self.vars)
+        # now render the {!{ }!} fragments, these are internal to talemate
+
+        if "{!{" in prompt_text:
+            env = self.template_env()
+            ctx = {"random": self.random, **self.vars}
+            parsed_text = SECOND_PASS_MARKER_PATTERN.sub(
+                lambda match: compile_template_string(
+                    env, "{{" + match.group(1) + "}}"
+                ).render(ctx),
+                prompt_text,
+            )
+        else:
+            parsed_text = prompt_text
 
         if self.dedupe_enabled:
             parsed_text = dedupe_string(parsed_text, debug=False)
@@ -499,6 +549,47 @@ class Prompt:
 
         return parsed_text
 
+    def template_callables(self) -> dict:
+        """
+        Functions and values exposed to templates that are bound to this
+        prompt instance.
+
+        These are passed as render context so the shared template
+        environment is never mutated per prompt.
+        """
+        return {
+            "render_template": self.render_template,
+            "render_and_request": self.render_and_request,
+            "set_prepared_response": self.set_prepared_response,
+            "set_prepared_response_random": self.set_prepared_response_random,
+            "set_eval_response": self.set_eval_response,
+            "set_json_response": self.set_json_response,
+            "set_data_response": self.set_data_response,
+            "set_question_eval": self.set_question_eval,
+            "disable_dedupe": self.disable_dedupe,
+            "random": self.random,
+            "query_scene": self.query_scene,
+            "query_memory": self.query_memory,
+            "query_text": self.query_text,
+            "query_text_eval": self.query_text_eval,
+            "instruct_text": self.instruct_text,
+            "agent_action": self.agent_action,
+            "agent_config": self.agent_config,
+            "retrieve_memories": self.retrieve_memories,
+            "time_diff": self.time_diff,
+            "config": self.config,
+            "li": self.get_bullet_num,
+            "data_format_type": (
+                lambda: getattr(self.client, "data_format", None)
+                or self.data_format_type
+            ),
+            "emit_status": self.emit_status,
+            "llm_can_be_coerced": lambda: (
+                self.client.can_be_coerced if self.client else False
+            ),
+            "text_to_chunks": self.text_to_chunks,
+        }
+
     def render_template(self, uid, **kwargs) -> "Prompt":
         # copy self.vars and update with kwargs
         vars = self.vars.copy()
@@ -1,7 +1,16 @@
 from typing import TYPE_CHECKING
+import asyncio
+import copy
 import json
 import os
+import uuid
 import structlog
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from talemate.scene_message import SceneMessage
 from talemate.game.engine.nodes.core import Graph
 from talemate.game.engine.nodes.scene import SceneLoop
@@ -13,6 +22,23 @@ if TYPE_CHECKING:
 
 log = structlog.get_logger("talemate.save")
 
+__all__ = [
+    "SceneEncoder",
+    "SceneJournal",
+    "journal_path",
+    "json_loads",
+    "read_scene_file",
+    "replay_journal",
+    "save_node_module",
+]
+
+# history lists that are written to the journal as appends, every other
+# part of the scene data is written whole when it changes
+JOURNALED_KEYS = ("history", "archived_history", "layered_history")
+
+# journals smaller than this are never compacted into a new snapshot
+MIN_COMPACT_SIZE = 1024 * 1024
+
 
 def combine_paths(absolute, relative):
     # Split paths into components
@@ -32,6 +58,259 @@ class SceneEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+def json_loads(data: str | bytes):
+    """
+    Parses JSON with orjson when it is installed, falling back to the
+    stdlib parser (also for input orjson rejects, such as NaN values)
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def journal_path(filepath: str) -> str:
+    return f"{filepath}.journal"
+
+
+def journaled_lists(data: dict) -> dict[str, list]:
+    """
+    The journaled lists of serialized scene data, keyed by journal key
+    (`history`, `archived_history`, `layered_history.<layer index>`)
+    """
+    lists = {
+        "history": data.setdefault("history", []),
+        "archived_history": data.setdefault("archived_history", []),
+    }
+    layers = data.setdefault("layered_history", [])
+    for index, layer in enumerate(layers):
+        lists[f"layered_history.{index}"] = layer
+    return lists
+
+
+def journal_target(data: dict, key: str) -> list:
+    """
+    Resolves a journal key to its list in serialized scene data, adding
+    missing layers
+    """
+    if key.startswith("layered_history."):
+        layers = data.setdefault("layered_history", [])
+        index = int(key.split(".", 1)[1])
+        while len(layers) <= index:
+            layers.append([])
+        return layers[index]
+    return data.setdefault(key, [])
+
+
+def entry_signature(entry: SceneMessage | dict) -> int:
+    """
+    Cheap change signature of a history entry
+
+    Scene messages are signed by their serialized form, so every field
+    that is saved counts. String hashes are cached by python, so this
+    stays fast for entries that have not changed since the last save.
+    """
+    if isinstance(entry, SceneMessage):
+        entry = entry.__dict__()
+        # the token count is a cache, not content
+        entry.pop("tokens", None)
+    return hash(
+        (
+            tuple(entry),
+            tuple(
+                value if isinstance(value, (str, int, float)) else repr(value)
+                for value in entry.values()
+            ),
+        )
+    )
+
+
+def detach_entry(entry: SceneMessage | dict) -> dict:
+    if isinstance(entry, SceneMessage):
+        return entry.__dict__()
+    return dict(entry)
+
+
+def read_scene_file(filepath: str) -> dict:
+    """
+    Reads a scene save file, replaying its journal if there is one
+    """
+    with open(filepath, "rb") as f:
+        data = json_loads(f.read())
+    return replay_journal(data, journal_path(filepath))
+
+
+def replay_journal(data: dict, path: str) -> dict:
+    """
+    Applies the journal records at `path` to snapshot `data`
+
+    Records from another snapshot, records that don't line up with the
+    data and a truncated trailing record (interrupted write) end the
+    replay.
+    """
+    journal_id = data.get("journal_id") if isinstance(data, dict) else None
+
+    if not journal_id or not os.path.exists(path):
+        return data
+
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                record = json_loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                log.warning("replay_journal", error="truncated record", path=path)
+                break
+
+            if record.get("journal_id") != journal_id:
+                log.warning("replay_journal", error="stale journal", path=path)
+                break
+
+            if any(
+                len(journal_target(data, key)) != length
+                for key, length in record["base"].items()
+            ):
+                log.warning("replay_journal", error="record out of sync", path=path)
+                break
+
+            for key, entries in record["append"].items():
+                journal_target(data, key).extend(entries)
+
+            if "scene" in record:
+                data.update(record["scene"])
+
+    return data
+
+
+class SceneJournal:
+    """
+    Saves a scene as a snapshot file plus an append-only journal
+
+    When the history lists only grew since the last save, just the new
+    entries (and the rest of the scene data, if it changed) are appended
+    to the journal. Anything else, such as edits or deletions, a new save
+    path, or a journal grown larger than the snapshot, writes a new
+    snapshot. Snapshots are written to a temporary file and renamed into
+    place, then the journal is removed.
+
+    File writes run in a background thread, saves are serialized.
+    """
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the persisted state, the next write is a snapshot
+        """
+        self.filepath: str | None = None
+        self.journal_id: str | None = None
+        self.signatures: dict[str, list[int]] = {}
+        self.scene_json: str | None = None
+        self.snapshot_size = 0
+        self.journal_size = 0
+
+    async def write(self, filepath: str, scene_data: dict):
+        async with self.lock:
+            lists = journaled_lists(scene_data)
+            signatures = {
+                key: [entry_signature(entry) for entry in entries]
+                for key, entries in lists.items()
+            }
+            rest = {k: v for k, v in scene_data.items() if k not in JOURNALED_KEYS}
+            scene_json = json.dumps(rest, cls=SceneEncoder)
+
+            appended = self.appended(filepath, lists, signatures)
+            compact = self.journal_size > max(self.snapshot_size, MIN_COMPACT_SIZE)
+
+            if appended is None or compact:
+                await self.write_snapshot(filepath, scene_data)
+            else:
+                record = {
+                    "journal_id": self.journal_id,
+                    "base": {k: len(v) for k, v in self.signatures.items()},
+                    "append": {
+                        key: [detach_entry(entry) for entry in entries]
+                        for key, entries in appended.items()
+                    },
+                }
+                if scene_json != self.scene_json:
+                    record["scene"] = rest
+                line = json.dumps(record, cls=SceneEncoder) + "\n"
+                await asyncio.to_thread(self._append, journal_path(filepath), line)
+                self.journal_size += len(line)
+
+            self.signatures = signatures
+            self.scene_json = scene_json
+
+    def appended(
+        self, filepath: str, lists: dict[str, list], signatures: dict[str, list[int]]
+    ) -> dict[str, list] | None:
+        """
+        The entries added to each list since the last save, None if the
+        lists changed in any other way
+        """
+        if filepath != self.filepath or not self.journal_id:
+            return None
+
+        appended = {}
+        for key, persisted in self.signatures.items():
+            current = signatures.get(key)
+            if current is None or current[: len(persisted)] != persisted:
+                return None
+
+        for key, entries in lists.items():
+            start = len(self.signatures.get(key, []))
+            if len(entries) > start:
+                appended[key] = entries[start:]
+
+        return appended
+
+    async def write_snapshot(self, filepath: str, scene_data: dict):
+        journal_id = str(uuid.uuid4())[:10]
+
+        # detach the data from the live scene before handing it to the thread
+        snapshot = dict(scene_data)
+        snapshot["history"] = [detach_entry(e) for e in scene_data["history"]]
+        snapshot["archived_history"] = [
+            detach_entry(e) for e in scene_data["archived_history"]
+        ]
+        snapshot["layered_history"] = [
+            [detach_entry(e) for e in layer] for layer in scene_data["layered_history"]
+        ]
+        snapshot["agent_state"] = copy.deepcopy(scene_data.get("agent_state"))
+        snapshot["journal_id"] = journal_id
+
+        self.snapshot_size = await asyncio.to_thread(
+            self._write_snapshot, filepath, snapshot
+        )
+        self.filepath = filepath
+        self.journal_id = journal_id
+        self.journal_size = 0
+
+    @staticmethod
+    def _write_snapshot(filepath: str, snapshot: dict) -> int:
+        tmp_path = f"{filepath}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f, indent=2, cls=SceneEncoder)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+
+        # the journal belongs to the previous snapshot
+        if os.path.exists(journal_path(filepath)):
+            os.remove(journal_path(filepath))
+
+        return os.path.getsize(filepath)
+
+    @staticmethod
+    def _append(path: str, line: str):
+        with open(path, "a") as f:
+            f.write(line)
+
+
 async def save_node_module(
     scene: "Scene", graph: "Graph", filename: str = None, set_as_main: bool = False
 ) -> str:
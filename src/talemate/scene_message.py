@@ -1,4 +1,6 @@
+import bisect
 import enum
+import heapq
 import re
 import structlog
 from dataclasses import dataclass, field
@@ -15,6 +17,7 @@ __all__ = [
     "ContextInvestigationMessage",
     "Flags",
     "MESSAGES",
+    "SceneHistory",
 ]
 
 _message_id = 0
@@ -31,6 +34,14 @@ def reset_message_id():
     _message_id = 0
 
 
+def set_message_id(message_id: int):
+    """
+    Moves the message id counter, the next message gets `message_id + 1`
+    """
+    global _message_id
+    _message_id = message_id
+
+
 class Flags(enum.IntFlag):
     """
     Flags for messages
@@ -59,6 +70,10 @@ class SceneMessage:
 
     flags: Flags = Flags.NONE
 
+    # cached token count of the message as [text digest, count]
+    # (see talemate.util.count_message_tokens)
+    tokens: list | None = field(default=None, kw_only=True, compare=False)
+
     typ = "scene"
 
     def __str__(self):
@@ -88,6 +103,9 @@ class SceneMessage:
         if self.meta:
             rv["meta"] = self.meta
 
+        if self.tokens:
+            rv["tokens"] = self.tokens
+
         return rv
 
     def __iter__(self):
@@ -137,6 +155,9 @@ class SceneMessage:
     def meta_hash(self) -> int:
         return hash(str(self.meta))
 
+    def invalidate_tokens(self):
+        self.tokens = None
+
     def hide(self):
         self.flags |= Flags.HIDDEN
 
@@ -472,3 +493,212 @@ MESSAGES = {
     "reinforcement": ReinforcementMessage,
     "context_investigation": ContextInvestigationMessage,
 }
+
+
+def _positions_in(positions: list[int], lo: int, hi: int, newest_first: bool):
+    start = bisect.bisect_left(positions, lo)
+    end = bisect.bisect_right(positions, hi)
+    if newest_first:
+        return (positions[i] for i in range(end - 1, start - 1, -1))
+    return (positions[i] for i in range(start, end))
+
+
+class SceneHistory(list):
+    """
+    The scene history, a list of scene messages that additionally keeps
+    a message id -> position map and the positions of every message type.
+
+    Appending (and popping the last message) keeps the indexes current,
+    any other change to the list marks them stale and they are rebuilt on
+    the next lookup.
+    """
+
+    _stale: bool = True
+
+    def __getstate__(self):
+        # copies rebuild their own indexes
+        return None
+
+    def _index(self):
+        if self._stale:
+            self._rebuild()
+
+    def _rebuild(self):
+        self._positions = {}
+        self._by_type = {}
+        self._duplicates = False
+        self._stale = False
+        for position, message in enumerate(self):
+            self._add(position, message)
+
+    def _add(self, position: int, message: SceneMessage):
+        if message.id in self._positions:
+            self._duplicates = True
+        self._positions[message.id] = position
+        self._by_type.setdefault(message.typ, []).append(position)
+
+    def _invalidate(self):
+        self._stale = True
+
+    # mutation
+
+    def append(self, message: SceneMessage):
+        super().append(message)
+        if not self._stale:
+            self._add(len(self) - 1, message)
+
+    def extend(self, messages):
+        if self._stale:
+            super().extend(messages)
+            return
+        start = len(self)
+        super().extend(messages)
+        for position in range(start, len(self)):
+            self._add(position, self[position])
+
+    def __iadd__(self, messages):
+        self.extend(messages)
+        return self
+
+    def _shift(self, start: int, delta: int):
+        # moves every indexed position from `start` on by `delta` and re-maps
+        # the ids from `start` on, cheap for changes close to the end
+        for positions in self._by_type.values():
+            for i in range(bisect.bisect_left(positions, start), len(positions)):
+                positions[i] += delta
+        for position in range(max(start + delta, 0), len(self)):
+            self._positions[self[position].id] = position
+
+    def _removed(self, index: int, message: SceneMessage):
+        if self._duplicates:
+            self._invalidate()
+            return
+        del self._positions[message.id]
+        positions = self._by_type[message.typ]
+        del positions[bisect.bisect_left(positions, index)]
+        if not positions:
+            del self._by_type[message.typ]
+        self._shift(index + 1, -1)
+
+    def _inserted(self, index: int, message: SceneMessage):
+        if message.id in self._positions:
+            self._invalidate()
+            return
+        self._shift(index, 1)
+        self._positions[message.id] = index
+        bisect.insort(self._by_type.setdefault(message.typ, []), index)
+
+    def pop(self, index: int = -1):
+        message = super().pop(index)
+        if not self._stale:
+            self._removed(index if index >= 0 else index + len(self) + 1, message)
+        return message
+
+    def insert(self, index: int, message: SceneMessage):
+        if self._stale:
+            super().insert(index, message)
+            return
+        if index < 0:
+            index += len(self)
+        index = min(max(index, 0), len(self))
+        super().insert(index, message)
+        self._inserted(index, message)
+
+    def remove(self, message: SceneMessage):
+        if not self._stale:
+            index = self._positions.get(getattr(message, "id", None), -1)
+            if index > -1 and not self._duplicates and self[index] == message:
+                self.pop(index)
+                return
+        super().remove(message)
+        self._invalidate()
+
+    def clear(self):
+        super().clear()
+        self._invalidate()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._invalidate()
+
+    def reverse(self):
+        super().reverse()
+        self._invalidate()
+
+    def __setitem__(self, index, value):
+        if self._stale or isinstance(index, slice):
+            super().__setitem__(index, value)
+            self._invalidate()
+            return
+        message = self[index]
+        super().__setitem__(index, value)
+        if index < 0:
+            index += len(self)
+        if self._duplicates or (value.id != message.id and value.id in self._positions):
+            self._invalidate()
+            return
+        del self._positions[message.id]
+        self._positions[value.id] = index
+        positions = self._by_type[message.typ]
+        del positions[bisect.bisect_left(positions, index)]
+        if not positions:
+            del self._by_type[message.typ]
+        bisect.insort(self._by_type.setdefault(value.typ, []), index)
+
+    def __delitem__(self, index):
+        if self._stale or isinstance(index, slice):
+            super().__delitem__(index)
+            self._invalidate()
+            return
+        self.pop(index)
+
+    def __imul__(self, count):
+        result = super().__imul__(count)
+        self._invalidate()
+        return result
+
+    # lookup
+
+    def index_of(self, message_id: int) -> int:
+        """
+        Returns the position of the message with the given id, -1 if it is
+        not in the history
+        """
+        self._index()
+        return self._positions.get(message_id, -1)
+
+    def positions_of(
+        self,
+        typ: str | list[str],
+        lo: int = 0,
+        hi: int | None = None,
+        newest_first: bool = True,
+    ):
+        """
+        Yields the positions of the messages of the given type(s) between
+        `lo` and `hi` (inclusive), newest first unless `newest_first` is False
+        """
+        self._index()
+
+        if not isinstance(typ, list):
+            typ = [typ]
+
+        if hi is None:
+            hi = len(self) - 1
+
+        iterators = [
+            _positions_in(self._by_type[t], lo, hi, newest_first)
+            for t in set(typ)
+            if t in self._by_type
+        ]
+
+        if len(iterators) == 1:
+            return iterators[0]
+        return heapq.merge(*iterators, reverse=newest_first)
+
+    def last_position(self, typ: str | list[str], hi: int | None = None) -> int:
+        """
+        Returns the position of the last message of the given type(s) at or
+        before `hi`, -1 if there is none
+        """
+        return next(iter(self.positions_of(typ, hi=hi)), -1)
@@ -11,7 +11,6 @@ from talemate import VERSION
 from talemate.config import get_config, Config, commit_config, update_config
 from talemate.client.system_prompts import RENDER_CACHE as SYSTEM_PROMPTS_CACHE
 from talemate.server.websocket_server import WebsocketHandler
-from talemate.util.data import JSONEncoder
 from talemate.context import ActiveScene, Interaction
 from talemate.game.engine.nodes.registry import import_initial_node_definitions
 
@@ -59,6 +58,7 @@ async def websocket_endpoint(websocket):
         global _active_frontend_websocket
         nonlocal scene_task
         log.warning(f"frontend disconnected: {exc}")
+        log.debug("frontend outbound", **handler.outbound.stats())
 
         main_task.cancel()
         send_messages_task.cancel()
@@ -77,14 +77,7 @@ async def websocket_endpoint(websocket):
 
     # Create a task to send messages from the queue
     async def send_messages():
-        while True:
-            # check if there are messages in the queue
-            if message_queue.empty():
-                await asyncio.sleep(0.01)
-                continue
-
-            message = await message_queue.get()
-            await websocket.send(json.dumps(message, cls=JSONEncoder))
+        await handler.outbound.run()
 
     # Create a task to send regular client status updates
     async def send_status():
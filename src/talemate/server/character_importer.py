@@ -1,10 +1,10 @@
 import asyncio
-import json
 
 import pydantic
 import structlog
 
 from talemate.load import transfer_character
+from talemate.save import read_scene_file
 
 log = structlog.get_logger("talemate.server.character_importer")
 
@@ -43,8 +43,7 @@ class CharacterImporterServerPlugin:
 
         scene_path = list_characters_data.scene_path
 
-        with open(scene_path, "r") as f:
-            scene_data = json.load(f)
+        scene_data = read_scene_file(scene_path)
 
         sorted_characters = scene_data.get("characters", [])
 
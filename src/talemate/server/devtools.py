@@ -52,6 +52,10 @@ class DevToolsPlugin(Plugin):
             },
         )
 
+        # generate is called directly, so the request state has to be
+        # started here for the reasoning to be recorded
+        client.new_request()
+
         response = await client.generate(
             payload.prompt,
             payload.generation_parameters,
@@ -73,6 +77,15 @@ class DevToolsPlugin(Plugin):
             }
         )
 
+    async def handle_get_outbound_stats(self, data):
+        self.websocket_handler.queue_put(
+            {
+                "type": "devtools",
+                "action": "outbound_stats",
+                "data": self.websocket_handler.outbound.stats(),
+            }
+        )
+
     async def handle_get_scene_state(self, data):
         scene = self.scene
         editor = SceneStateEditor(scene)
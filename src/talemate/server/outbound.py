@@ -0,0 +1,133 @@
+"""
+Outbound message pipeline for the frontend websocket.
+"""
+
+import asyncio
+import json
+import time
+
+import structlog
+
+from talemate.util.data import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+__all__ = [
+    "OutboundPipeline",
+    "coalesce",
+    "encode",
+]
+
+log = structlog.get_logger("talemate.server.outbound")
+
+# message types where only the most recent message per name matters
+SUPERSEDED_TYPES = ("client_status", "agent_status", "scene_status")
+
+# max number of messages sent in a single frame
+MAX_BATCH_SIZE = 500
+
+
+def coalesce(messages: list[dict]) -> list[dict]:
+    """
+    Drops status messages that are superseded by a later message of the
+    same type and name in the same batch
+    """
+    latest = {}
+    for index, message in enumerate(messages):
+        if message.get("type") in SUPERSEDED_TYPES:
+            latest[(message["type"], message.get("name"))] = index
+
+    keep = set(latest.values())
+
+    return [
+        message
+        for index, message in enumerate(messages)
+        if message.get("type") not in SUPERSEDED_TYPES or index in keep
+    ]
+
+
+def _default(obj):
+    return JSONEncoder().default(obj)
+
+
+def encode(payload) -> str:
+    """
+    Encodes a frame, with orjson when it is installed
+
+    Dataclasses and datetimes are passed through to `JSONEncoder` so the
+    output matches `json.dumps(payload, cls=JSONEncoder)`.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                payload,
+                default=_default,
+                option=orjson.OPT_NON_STR_KEYS
+                | orjson.OPT_PASSTHROUGH_DATACLASS
+                | orjson.OPT_PASSTHROUGH_DATETIME,
+            ).decode("utf-8")
+        except (TypeError, orjson.JSONEncodeError):
+            pass
+    return json.dumps(payload, cls=JSONEncoder)
+
+
+class OutboundPipeline:
+    """
+    Sends the messages put on `queue` to the frontend websocket
+
+    Waits on the queue, then lets the current event loop tick finish so a
+    burst of emissions is collected, and sends everything pending as one
+    frame. A frame holding a single message is the message itself,
+    otherwise it is a list of messages.
+
+    Args:
+        websocket: The frontend websocket.
+        queue (asyncio.Queue): The outgoing message queue.
+    """
+
+    def __init__(self, websocket, queue: asyncio.Queue):
+        self.websocket = websocket
+        self.queue = queue
+        self.started = time.monotonic()
+        self.frames = 0
+        self.messages = 0
+        self.dropped = 0
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            "frames": self.frames,
+            "messages": self.messages,
+            "dropped": self.dropped,
+            "bytes": self.bytes,
+            "frames_per_second": self.frames / elapsed,
+            "bytes_per_second": self.bytes / elapsed,
+        }
+
+    async def collect(self) -> list[dict]:
+        messages = [await self.queue.get()]
+
+        # queue_put schedules puts with call_soon, let them land
+        await asyncio.sleep(0)
+
+        while not self.queue.empty() and len(messages) < MAX_BATCH_SIZE:
+            messages.append(self.queue.get_nowait())
+
+        return messages
+
+    async def run(self):
+        while True:
+            messages = await self.collect()
+            batch = coalesce(messages)
+            self.dropped += len(messages) - len(batch)
+
+            data = encode(batch[0] if len(batch) == 1 else batch)
+            await self.websocket.send(data)
+
+            self.frames += 1
+            self.messages += len(batch)
+            self.bytes += len(data.encode("utf-8"))
@@ -212,6 +212,9 @@ def run_server(args):
             # Shield against additional Ctrl+C during the close handshake
             loop.run_until_complete(asyncio.shield(websocket_server.wait_closed()))
 
+            # Let agents close open connections
+            loop.run_until_complete(talemate.instance.destroy_agents())
+
             # Cancel any remaining tasks
             loop.run_until_complete(cancel_all_tasks(loop))
             loop.run_until_complete(loop.shutdown_asyncgens())
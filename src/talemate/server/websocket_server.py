@@ -27,6 +27,7 @@ from talemate.server import (
     node_editor,
     package_manager,
 )
+from talemate.server.outbound import OutboundPipeline
 
 __all__ = [
     "WebsocketHandler",
@@ -44,6 +45,7 @@ class WebsocketHandler(Receiver):
         self.input = None
         self.scene = Scene()
         self.out_queue = out_queue
+        self.outbound = OutboundPipeline(socket, out_queue)
 
         self.routes = {
             assistant.AssistantPlugin.router: assistant.AssistantPlugin(self),
@@ -301,6 +303,14 @@ class WebsocketHandler(Receiver):
             }
         )
 
+    def handle_partial_response(self, emission: Emission):
+        self.queue_put(
+            {
+                "type": "partial_response",
+                "data": emission.data,
+            }
+        )
+
     def handle_clear_screen(self, emission: Emission):
         self.queue_put(
             {
@@ -1,4 +1,5 @@
 import asyncio
+import bisect
 import json
 import os
 import re
@@ -40,6 +41,7 @@ from talemate.scene_message import (
     SceneMessage,
     TimePassageMessage,
     ContextInvestigationMessage,
+    SceneHistory,
     MESSAGES as MESSAGE_TYPES,
 )
 from talemate.util import count_tokens
@@ -50,7 +52,7 @@ from talemate.game.engine.nodes.core import GraphState
 from talemate.game.engine.nodes.layout import load_graph
 from talemate.game.engine.nodes.packaging import initialize_packages
 from talemate.scene.intent import SceneIntent
-from talemate.history import emit_archive_add, ArchiveEntry
+from talemate.history import emit_archive_add, emit_archive_add_many, ArchiveEntry
 from talemate.character import Character
 from talemate.agents.tts.schema import VoiceLibrary
 from talemate.instance import get_agent
@@ -149,6 +151,9 @@ class Scene(Emitter):
         # has scene been saved before?
         self.saved = False
 
+        # snapshot + append-only journal writer for the save file
+        self.journal = save.SceneJournal()
+
         # if immutable_save is True, save will always
         # happen as save-as and not overwrite the original
         self.immutable_save = False
@@ -431,21 +436,34 @@ class Scene(Emitter):
         num = 0
         idx = history_legnth - 1
         recent_history = []
-        total_tokens = 0
+        budget = util.TokenBudget(max_tokens)
 
         while idx > -1:
-            recent_history.insert(0, scene.history[idx])
+            recent_history.append(scene.history[idx])
 
-            total_tokens += util.count_tokens(scene.history[idx])
+            budget.consume(scene.history[idx])
 
             num += 1
             idx -= 1
 
-            if total_tokens >= max_tokens:
+            if budget.exhausted:
                 break
 
+        # messages were collected newest first
+        recent_history.reverse()
+
         return recent_history
 
+    @property
+    def history(self) -> SceneHistory:
+        return self._history
+
+    @history.setter
+    def history(self, messages: list[SceneMessage]):
+        if not isinstance(messages, SceneHistory):
+            messages = SceneHistory(messages)
+        self._history = messages
+
     def push_history(self, messages: list[SceneMessage]):
         """
         Adds one or more messages to the scene history
@@ -460,11 +478,8 @@ class Scene(Emitter):
 
         for message in messages:
             if isinstance(message, DirectorMessage):
-                for idx in range(len(self.history) - 1, -1, -1):
-                    if (
-                        isinstance(self.history[idx], DirectorMessage)
-                        and self.history[idx].source == message.source
-                    ):
+                for idx in self.history.positions_of("director"):
+                    if self.history[idx].source == message.source:
                         self.history.pop(idx)
                         break
 
@@ -522,28 +537,16 @@ class Scene(Emitter):
         """
         Removes the last message from the history that matches the given typ and source
         """
-        iterations = 0
-
-        if not reverse:
-            iter_range = range(len(self.history) - 1, -1, -1)
-        else:
-            iter_range = range(len(self.history))
-
+        num_messages = len(self.history)
         to_remove = []
 
-        for idx in iter_range:
+        for idx in self.history.positions_of(typ, newest_first=not reverse):
             message = self.history[idx]
 
-            if message.typ != typ:
-                iterations += 1
-                continue
-
             if source is not None and message.source != source:
-                iterations += 1
                 continue
 
             if meta_hash is not None and message.meta_hash != meta_hash:
-                iterations += 1
                 continue
 
             # Apply additional filters
@@ -554,63 +557,53 @@ class Scene(Emitter):
                     break
 
             if valid:
-                to_remove.append(message)
+                to_remove.append(idx)
                 if not all:
                     break
 
-            iterations += 1
+            # number of messages looked at so far, including this one
+            iterations = (idx if reverse else num_messages - 1 - idx) + 1
             if max_iterations and iterations >= max_iterations:
                 break
 
-        for message in to_remove:
-            self.history.remove(message)
+        for idx in sorted(to_remove, reverse=True):
+            self.history.pop(idx)
 
     def find_message(self, typ: str, max_iterations: int = 100, **filters):
         """
         Finds the last message in the history that matches the given typ and source
         """
-        iterations = 0
-        for idx in range(len(self.history) - 1, -1, -1):
+        lo = len(self.history) - max_iterations + 1
+        for idx in self.history.positions_of(typ, lo=max(lo, 0)):
             message: SceneMessage = self.history[idx]
 
-            iterations += 1
-            if iterations >= max_iterations:
-                return None
-
-            if message.typ != typ:
-                continue
-
             for filter_name, filter_value in filters.items():
                 if getattr(message, filter_name, None) != filter_value:
                     continue
 
-            return self.history[idx]
+            return message
 
     def message_index(self, message_id: int) -> int:
         """
         Returns the index of the given message in the history
         """
-        for idx in range(len(self.history) - 1, -1, -1):
-            if self.history[idx].id == message_id:
-                return idx
-        return -1
+        return self.history.index_of(message_id)
 
     def get_message(self, message_id: int) -> SceneMessage:
         """
         Returns the message in the history with the given id
         """
-        for idx in range(len(self.history) - 1, -1, -1):
-            if self.history[idx].id == message_id:
-                return self.history[idx]
+        idx = self.history.index_of(message_id)
+        if idx > -1:
+            return self.history[idx]
 
     def last_player_message(self) -> str:
         """
         Returns the last message from the player
         """
-        for idx in range(len(self.history) - 1, -1, -1):
-            if isinstance(self.history[idx], CharacterMessage):
-                if self.history[idx].source == "player":
-                    return self.history[idx]
+        for idx in self.history.positions_of("character"):
+            if self.history[idx].source == "player":
+                return self.history[idx]
 
     def last_message_of_type(
         self,
@@ -637,6 +630,45 @@ class Scene(Emitter):
         if not isinstance(typ, list):
             typ = [typ]
 
+        if on_iterate:
+            # every message needs to be visited
+            return self._last_message_of_type_scan(
+                typ, source, max_iterations, stop_on_time_passage, on_iterate, **filters
+            )
+
+        lo = 0
+        if max_iterations is not None:
+            lo = len(self.history) - max_iterations
+
+        if stop_on_time_passage:
+            lo = max(lo, self.history.last_position("time") + 1)
+
+        for idx in self.history.positions_of(typ, lo=max(lo, 0)):
+            message = self.history[idx]
+
+            if source and message.source != source:
+                continue
+
+            valid = True
+
+            for filter_name, filter_value in filters.items():
+                message_value = getattr(message, filter_name, None)
+                if message_value != filter_value:
+                    valid = False
+                    break
+
+            if valid:
+                return message
+
+    def _last_message_of_type_scan(
+        self,
+        typ: list[str],
+        source: str,
+        max_iterations: int | None,
+        stop_on_time_passage: bool,
+        on_iterate: Callable,
+        **filters,
+    ) -> SceneMessage | None:
         num_iterations = 0
 
         for idx in range(len(self.history) - 1, -1, -1):
@@ -645,8 +677,7 @@ class Scene(Emitter):
 
             message = self.history[idx]
 
-            if on_iterate:
-                on_iterate(message)
+            on_iterate(message)
 
             if isinstance(message, TimePassageMessage) and stop_on_time_passage:
                 return None
@@ -680,30 +711,31 @@ class Scene(Emitter):
         Finds all messages in the history that match the given typ and source
         """
 
-        if typ and not isinstance(typ, list):
-            typ = [typ]
-
         messages = []
-        iterations = 0
-        collected = 0
 
         if start_idx is None:
             start_idx = len(self.history) - 1
 
-        for idx in range(start_idx, -1, -1):
-            message = self.history[idx]
-            if (not typ or message.typ in typ) and (
-                not source or message.source == source
-            ):
-                messages.append(message)
-                collected += 1
-                if max_messages is not None and collected >= max_messages:
-                    break
-            if isinstance(message, TimePassageMessage) and stop_on_time_passage:
-                break
+        # at least the message at start_idx is always looked at
+        lo = start_idx - max(max_iterations, 1) + 1
+
+        if stop_on_time_passage:
+            # the time passage message itself is still collected
+            lo = max(lo, self.history.last_position("time", hi=start_idx))
+
+        lo = max(lo, 0)
+
+        if typ:
+            positions = self.history.positions_of(typ, lo=lo, hi=start_idx)
+        else:
+            positions = range(start_idx, lo - 1, -1)
 
-            iterations += 1
-            if iterations >= max_iterations:
+        for idx in positions:
+            message = self.history[idx]
+            if source and message.source != source:
+                continue
+            messages.append(message)
+            if max_messages is not None and len(messages) >= max_messages:
                 break
 
         return messages
@@ -778,12 +810,12 @@ class Scene(Emitter):
         Finds the message in `history` by its id and will update its contents
         """
 
-        for i, _message in enumerate(self.history):
-            if _message.id == message_id:
-                self.history[i].message = message
-                emit("message_edited", self.history[i], id=message_id)
-                self.log.info("Message edited", message=message, id=message_id)
-                return
+        i = self.history.index_of(message_id)
+        if i > -1:
+            self.history[i].message = message
+            self.history[i].invalidate_tokens()
+            emit("message_edited", self.history[i], id=message_id)
+            self.log.info("Message edited", message=message, id=message_id)
 
     async def add_actor(self, actor: Actor):
         """
@@ -995,8 +1027,11 @@ class Scene(Emitter):
         parts_context = []
         parts_dialogue = []
 
-        budget_context = int(0.5 * budget)
-        budget_dialogue = int(0.5 * budget)
+        # token counts of the entries in parts_context, in the same order
+        tokens_context = []
+
+        budget_context = util.TokenBudget(int(0.5 * budget))
+        budget_dialogue = util.TokenBudget(int(0.5 * budget))
 
         keep_director = kwargs.get("keep_director", False)
         keep_context_investigation = kwargs.get("keep_context_investigation", True)
@@ -1033,19 +1068,27 @@ class Scene(Emitter):
                     time_message = util.iso8601_diff_to_human(
                         archive_history_entry["ts"], self.ts
                     )
-                    text = f"{time_message}: {archive_history_entry['text']}"
+                    prefix = f"{time_message}: "
                 except Exception as e:
                     log.error(
                         "context_history", error=e, traceback=traceback.format_exc()
                     )
-                    text = archive_history_entry["text"]
+                    prefix = ""
+
+                text = condensed(f"{prefix}{archive_history_entry['text']}")
+                tokens = count_tokens(prefix) + util.count_entry_tokens(
+                    archive_history_entry
+                )
 
-                if count_tokens(parts_context) + count_tokens(text) > budget_context:
+                if not budget_context.fits(tokens):
                     break
 
-                text = condensed(text)
+                parts_context.append(text)
+                tokens_context.append(budget_context.add(tokens))
 
-                parts_context.insert(0, text)
+            # entries were collected newest first
+            parts_context.reverse()
+            tokens_context.reverse()
 
         else:
             # layered history available
@@ -1084,15 +1127,21 @@ class Scene(Emitter):
                             if time_message_start != time_message_end
                             else time_message_start
                         )
-                    text = f"{time_message} {layered_history_entry['text']}"
+                    prefix = f"{time_message} "
 
                     # prepend chapter labels
                     if chapter_labels:
                         chapter_number = f"{num_layers - i}.{k + 1}"
-                        text = f"### Chapter {chapter_number}\n{text}"
+                        prefix = f"### Chapter {chapter_number}\n{prefix}"
                         chapter_numbers.append(chapter_number)
 
-                    parts_context.append(text)
+                    parts_context.append(f"{prefix}{layered_history_entry['text']}")
+                    tokens_context.append(
+                        budget_context.add(
+                            count_tokens(prefix)
+                            + util.count_entry_tokens(layered_history_entry)
+                        )
+                    )
 
                     k += 1
 
@@ -1114,25 +1163,35 @@ class Scene(Emitter):
 
                 if chapter_labels:
                     parts_context.append("### Current\n")
+                    tokens_context.append(budget_context.consume("### Current\n"))
 
                 for archive_history_entry in self.archived_history[base_layer_start:]:
                     time_message = util.iso8601_diff_to_human(
                         archive_history_entry["ts"], self.ts
                     )
 
-                    text = f"{time_message}: {archive_history_entry['text']}"
+                    prefix = f"{time_message}: "
 
-                    text = condensed(text)
-
-                    parts_context.append(text)
+                    parts_context.append(
+                        condensed(f"{prefix}{archive_history_entry['text']}")
+                    )
+                    tokens_context.append(
+                        budget_context.add(
+                            count_tokens(prefix)
+                            + util.count_entry_tokens(archive_history_entry)
+                        )
+                    )
 
                     i += 1
 
-        # log.warn if parts_context token count > budget_context
-        if count_tokens(parts_context) > budget_context:
-            # chop off the top until it fits
-            while count_tokens(parts_context) > budget_context:
-                parts_context.pop(0)
+        # chop off the top until it fits
+        if budget_context.exceeded:
+            drop = 0
+            while budget_context.exceeded:
+                budget_context.remove(tokens_context[drop])
+                drop += 1
+            del parts_context[:drop]
+            del tokens_context[:drop]
 
         # DIALOGUE
         try:
@@ -1197,17 +1256,24 @@ class Scene(Emitter):
             ):
                 continue
 
-            if count_tokens(parts_dialogue) + count_tokens(message) > budget_dialogue:
+            tokens = count_tokens(message)
+
+            if not budget_dialogue.fits(tokens):
                 break
 
-            parts_dialogue.insert(
-                0, message.as_format(conversation_format, mode=actor_direction_mode)
+            budget_dialogue.add(tokens)
+
+            parts_dialogue.append(
+                message.as_format(conversation_format, mode=actor_direction_mode)
             )
 
             if isinstance(message, CharacterMessage):
                 dialogue_messages_collected += 1
 
-        if count_tokens(parts_context) < 128:
+        # messages were collected newest first
+        parts_dialogue.reverse()
+
+        if budget_context.used < 128:
             intro = self.get_intro()
             if intro:
                 parts_context.insert(0, intro)
@@ -1223,17 +1289,15 @@ class Scene(Emitter):
         Delete a message from the history
         """
         log.debug(f"Deleting message {message_id}")
-        for i, message in enumerate(self.history):
-            if message.id == message_id:
-                self.history.pop(i)
-                log.info(f"Deleted message {message_id}")
-                emit("remove_message", "", id=message_id)
+        i = self.history.index_of(message_id)
+        if i > -1:
+            message = self.history.pop(i)
+            log.info(f"Deleted message {message_id}")
+            emit("remove_message", "", id=message_id)
 
-                if isinstance(message, TimePassageMessage):
-                    self.sync_time()
-                    self.emit_status()
-
-                break
+            if isinstance(message, TimePassageMessage):
+                self.sync_time()
+                self.emit_status()
 
     def can_auto_save(self):
         """
@@ -1278,6 +1342,7 @@ class Scene(Emitter):
                 "saved": self.saved,
                 "auto_save": self.auto_save,
                 "auto_progress": self.auto_progress,
+                "stream_responses": self.config.game.general.stream_responses,
                 "can_auto_save": self.can_auto_save(),
                 "game_state": self.game_state.model_dump(),
                 "agent_state": self.agent_state,
@@ -1394,9 +1459,8 @@ class Scene(Emitter):
         # store time jumps by index
         time_jumps = []
 
-        for idx, message in enumerate(self.history):
-            if isinstance(message, TimePassageMessage):
-                time_jumps.append((idx, message.ts))
+        for idx in self.history.positions_of("time", newest_first=False):
+            time_jumps.append((idx, self.history[idx].ts))
 
         # now make the timejumps cumulative, meaning that each time jump
         # will be the sum of all time jumps up to that point
@@ -1415,6 +1479,7 @@ class Scene(Emitter):
             return
 
         # apply time jumps to the archived history
+        jump_indexes = [idx for idx, _ in cumulative_time_jumps]
         ts = starting_time
         for _, entry in enumerate(self.archived_history):
             if "end" not in entry:
@@ -1424,12 +1489,8 @@ class Scene(Emitter):
             # index to time_jumps (find the closest time jump that is
             # smaller than entry["end"])
 
-            best_ts = None
-            for jump_idx, jump_ts in cumulative_time_jumps:
-                if jump_idx < entry["end"]:
-                    best_ts = jump_ts
-                else:
-                    break
+            position = bisect.bisect_left(jump_indexes, entry["end"])
+            best_ts = cumulative_time_jumps[position - 1][1] if position else None
 
             if best_ts:
                 entry["ts"] = best_ts
@@ -1688,8 +1749,7 @@ class Scene(Emitter):
         if not auto:
             emit("status", status="success", message="Saved scene")
 
-        with open(filepath, "w") as f:
-            json.dump(scene_data, f, indent=2, cls=save.SceneEncoder)
+        await self.journal.write(filepath, scene_data)
 
         self.saved = True
 
@@ -1732,12 +1792,12 @@ class Scene(Emitter):
         await memory.set_db()
 
         for ah in self.archived_history:
-            ts = ah.get("ts", "PT1S")
-
             if not ah.get("ts"):
-                ah["ts"] = ts
+                ah["ts"] = "PT1S"
 
-            await emit_archive_add(self, ArchiveEntry(**ah))
+        await emit_archive_add_many(
+            self, [ArchiveEntry(**ah) for ah in self.archived_history]
+        )
 
         for character in self.characters:
             await character.commit_to_memory(memory)
@@ -1,3 +1,4 @@
+import hashlib
 import re
 
 import structlog
@@ -23,14 +24,10 @@ def count_tokens(source):
         t = 0
         for s in source:
             t += count_tokens(s)
-    elif isinstance(source, (str, SceneMessage)):
-        # FIXME: there is currently no good way to determine
-        # the model loaded in the client, so we are using the
-        # TIKTOKEN_ENCODING for now.
-        #
-        # So counts through this function are at best an approximation
-
-        t = len(TIKTOKEN_ENCODING.encode(str(source)))
+    elif isinstance(source, SceneMessage):
+        t = count_message_tokens(source)
+    elif isinstance(source, str):
+        t = _count_text_tokens(source)
     else:
         log.warn("count_tokens", msg="Unknown type: " + str(type(source)))
         t = 0
@@ -38,6 +35,113 @@ def count_tokens(source):
     return t
 
 
+def _count_text_tokens(text: str) -> int:
+    # FIXME: there is currently no good way to determine
+    # the model loaded in the client, so we are using the
+    # TIKTOKEN_ENCODING for now.
+    #
+    # So counts through this function are at best an approximation
+
+    return len(TIKTOKEN_ENCODING.encode(text))
+
+
+def text_digest(text: str) -> str:
+    """
+    Returns a short digest of a text that is stable across processes.
+
+    Used to key cached token counts that get persisted in the save file.
+    """
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _cached_token_count(text: str, cached: list | None) -> tuple[int, list | None]:
+    """
+    Returns the token count of `text` and the new cache value if the
+    cached `[digest, count]` pair was missing or stale, otherwise None.
+    """
+    digest = text_digest(text)
+    if cached and cached[0] == digest:
+        return cached[1], None
+    count = _count_text_tokens(text)
+    return count, [digest, count]
+
+
+def count_message_tokens(message: SceneMessage) -> int:
+    """
+    Token count of a scene message, memoized on the message.
+
+    The cached value is keyed by a digest of the message's string
+    representation so it stays correct if the message is changed
+    without going through `Scene.edit_message`.
+    """
+    count, cache = _cached_token_count(str(message), message.tokens)
+    if cache:
+        message.tokens = cache
+    return count
+
+
+def count_entry_tokens(entry: dict) -> int:
+    """
+    Token count of the text of an archived or layered history entry,
+    memoized on the entry under the `tokens` key.
+    """
+    count, cache = _cached_token_count(entry["text"], entry.get("tokens"))
+    if cache:
+        entry["tokens"] = cache
+    return count
+
+
+class TokenBudget:
+    """
+    Keeps a running token total against a fixed budget.
+
+    Callers that assemble context piece by piece use this instead of
+    re-counting the whole collection every time a candidate is considered,
+    so each candidate only needs to be tokenized once.
+
+    Args:
+        budget (int): The maximum number of tokens.
+    """
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.used = 0
+
+    @property
+    def remaining(self) -> int:
+        return self.budget - self.used
+
+    @property
+    def exceeded(self) -> bool:
+        return self.used > self.budget
+
+    @property
+    def exhausted(self) -> bool:
+        return self.used >= self.budget
+
+    def fits(self, tokens: int) -> bool:
+        """
+        Whether adding `tokens` would keep the total within the budget.
+        """
+        return self.used + tokens <= self.budget
+
+    def add(self, tokens: int) -> int:
+        self.used += tokens
+        return tokens
+
+    def remove(self, tokens: int) -> int:
+        self.used -= tokens
+        return tokens
+
+    def consume(self, source) -> int:
+        """
+        Counts the tokens in `source` and adds them to the running total.
+
+        Returns the token count of `source`.
+        """
+        return self.add(count_tokens(source))
+
+
 def clean_id(name: str) -> str:
     """
     Cleans up a id name by removing all characters that aren't a-zA-Z0-9_-
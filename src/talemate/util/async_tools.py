@@ -1,11 +1,12 @@
 import asyncio
 import structlog
 from functools import wraps
-from typing import Optional
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable, Optional
 
 __all__ = [
     "cleanup_pending_tasks",
     "debounce",
+    "run_ordered",
     "shared_debounce",
 ]
 
@@ -133,3 +134,97 @@ async def cleanup_pending_tasks():
     # Wait for them to finish
     if pending:
         await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def run_ordered(
+    jobs: Iterable | AsyncIterable,
+    run: Callable[[Any], Awaitable],
+    commit: Callable[[Any, Any], Awaitable] | None = None,
+    concurrency: int = 1,
+) -> list:
+    """
+    Runs `run(job)` for every job with up to `concurrency` jobs in flight
+    and hands the results to `commit(job, result)` strictly in job order.
+
+    A job is only started once a slot is free, so `run` sees everything
+    committed up to that point. With a concurrency of 1 this is the same as
+    running and committing the jobs one after another.
+
+    `jobs` can be an async iterable, the next job is only pulled once a slot
+    is free, which allows planning a job to depend on the jobs before it.
+
+    If a job fails, no new jobs are started, the results before it are
+    still committed and the exception is raised. Jobs still in flight are
+    cancelled.
+
+    Returns the results in job order.
+    """
+
+    concurrency = max(1, concurrency or 1)
+
+    if isinstance(jobs, AsyncIterable):
+        job_iterator = aiter(jobs)
+
+        async def next_job():
+            return await anext(job_iterator)
+
+    else:
+        job_iterator = iter(jobs)
+
+        async def next_job():
+            try:
+                return next(job_iterator)
+            except StopIteration:
+                raise StopAsyncIteration
+
+    started: list[tuple[Any, asyncio.Task]] = []
+    results = []
+    exhausted = False
+
+    def in_flight() -> list[asyncio.Task]:
+        return [task for _, task in started[len(results) :] if not task.done()]
+
+    def failed() -> bool:
+        return any(
+            task.done() and not task.cancelled() and task.exception()
+            for _, task in started[len(results) :]
+        )
+
+    async def commit_finished():
+        while len(results) < len(started) and started[len(results)][1].done():
+            job, task = started[len(results)]
+            result = task.result()
+            if commit:
+                await commit(job, result)
+            results.append(result)
+
+    try:
+        while True:
+            while not exhausted and not failed() and len(in_flight()) < concurrency:
+                try:
+                    job = await next_job()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                except Exception:
+                    # keep what has finished so far
+                    await commit_finished()
+                    raise
+                started.append((job, asyncio.create_task(run(job))))
+
+            if len(results) == len(started):
+                break
+
+            pending = in_flight()
+            if pending:
+                await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+            await commit_finished()
+    finally:
+        remaining = [task for _, task in started[len(results) :]]
+        for task in remaining:
+            task.cancel()
+        if remaining:
+            await asyncio.gather(*remaining, return_exceptions=True)
+
+    return results
@@ -1,13 +1,20 @@
+import numpy as np
 from nltk.tokenize import sent_tokenize
+from rapidfuzz import fuzz as rapidfuzz_fuzz, process
 from thefuzz import fuzz
 import structlog
 import pydantic
+import bisect
+import functools
+import itertools
+import math
 import re  # Add import for regex
 from typing import Callable
 
 __all__ = [
     "similarity_score",
     "similarity_matches",
+    "batch_similarity_matches",
     "dedupe_sentences",
     "dedupe_sentences_from_matches",
     "dedupe_string",
@@ -77,6 +84,16 @@ def compile_text_to_sentences(text: str) -> list[tuple[str, str]]:
     Returns a list of tuples were the first element is the original sentence and the second element is the prepared sentence that will be used for similarity comparison.
     """
 
+    return list(_compile_text_to_sentences(text))
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_text_to_sentences(text: str) -> tuple[tuple[str, str], ...]:
+    """
+    Memoized sentence tokenization, the same history messages are
+    compared against every new message.
+    """
+
     sentences = sent_tokenize(text)
 
     results = []
@@ -84,7 +101,7 @@ def compile_text_to_sentences(text: str) -> list[tuple[str, str]]:
     for sentence in sentences:
         results.append((sentence, sentence.strip("".join(SPECIAL_MARKERS))))
 
-    return results
+    return tuple(results)
 
 
 def split_sentences_on_comma(sentences: list[str]) -> list[str]:
@@ -121,58 +138,189 @@ def similarity_matches(
         list: A list of similarity matches.
     """
 
+    return batch_similarity_matches(
+        text_a,
+        [text_b],
+        similarity_threshold=similarity_threshold,
+        min_length=min_length,
+        split_on_comma=split_on_comma,
+    )
+
+
+def _ratio_matrix(queries: list[str], choices: list[str]) -> np.ndarray:
+    """
+    `fuzz.ratio` of every query against every choice.
+    """
+    scores = process.cdist(
+        queries,
+        choices,
+        scorer=rapidfuzz_fuzz.ratio,
+        dtype=np.float64,
+        workers=-1,
+    )
+
+    # fuzz.ratio rounds half to even, same as np.rint
+    return np.rint(scores)
+
+
+def batch_similarity_matches(
+    text_a: str,
+    texts_b: list[str],
+    similarity_threshold: int = 95,
+    min_length: int | None = None,
+    split_on_comma: bool = False,
+) -> list[SimilarityMatch]:
+    """
+    Returns a list of similarity matches between a text and a list of texts
+    to compare against.
+
+    The result is the same as calling `similarity_matches` for each text in
+    `texts_b` and concatenating the results, but every text is split into
+    sentences only once and all sentence pairs are scored in one
+    (multi-threaded) rapidfuzz call.
+
+    Arguments:
+        text_a (str): The text to find repetition in.
+        texts_b (list[str]): The texts to compare against.
+        similarity_threshold (int): The similarity threshold to use when comparing sentences.
+        min_length (int): The minimum length of a sentence to be considered for deduplication.
+            Shorter sentences are skipped. If None, all sentences are considered.
+        split_on_comma (bool): Whether to split sentences on commas. When true if the whole sentence does NOT trigger a similarity match,
+            the sentence will be split on commas and each comma will be checked for similarity.
+
+    Returns:
+        list: A list of similarity matches.
+    """
+
+    def eligible(text: str) -> bool:
+        return not min_length or len(text) >= min_length
+
     sentences_a = compile_text_to_sentences(text_a)
-    sentences_b = compile_text_to_sentences(text_b)
+
+    sentences_b = []
+    ranges_b = []
+    for text_b in texts_b:
+        start = len(sentences_b)
+        sentences_b.extend(compile_text_to_sentences(text_b))
+        ranges_b.append((start, len(sentences_b)))
+
+    if not sentences_a or not sentences_b:
+        return []
+
+    # scores are based on the prepared sentence, eligibility on the original
+    # one, pairs with an ineligible sentence are set to -1
+    scores = _ratio_matrix(
+        [prepared for _, prepared in sentences_a],
+        [prepared for _, prepared in sentences_b],
+    )
+    ineligible_a = np.array([not eligible(sentence) for sentence, _ in sentences_a])
+    ineligible_b = np.array([not eligible(sentence) for sentence, _ in sentences_b])
+    scores[ineligible_a, :] = -1
+    scores[:, ineligible_b] = -1
+
+    if split_on_comma:
+        parts_a = [sentence.split(",") for sentence, _ in sentences_a]
+        parts_b = [sentence.split(",") for sentence, _ in sentences_b]
+
+        # offsets of each sentence's parts in the flattened part lists
+        offsets_a = np.cumsum([0] + [len(parts) for parts in parts_a])
+        offsets_b = np.cumsum([0] + [len(parts) for parts in parts_b])
+
+        flat_parts_a = [part for parts in parts_a for part in parts]
+        flat_parts_b = [part for parts in parts_b for part in parts]
+
+        comma_scores = _ratio_matrix(
+            [part.strip() for part in flat_parts_a],
+            [part.strip() for part in flat_parts_b],
+        )
+        comma_scores[[not eligible(part) for part in flat_parts_a], :] = -1
+        comma_scores[:, [not eligible(part) for part in flat_parts_b]] = -1
+        comma_hits = comma_scores >= similarity_threshold
+
+        # whether any part of sentence a matches any part of sentence b
+        comma_any = np.logical_or.reduceat(
+            np.logical_or.reduceat(comma_hits, offsets_a[:-1], axis=0),
+            offsets_b[:-1],
+            axis=1,
+        )
+        comma_any[ineligible_a, :] = False
+        comma_any[:, ineligible_b] = False
 
     matches = []
-    left_neighbor = None
-    right_neighbor = None
-    for idx, (sentence_a, sentence_a_prepared) in enumerate(sentences_a):
-        left_neighbor = sentences_a[idx - 1][0] if idx > 0 else None
-        right_neighbor = sentences_a[idx + 1][0] if idx < len(sentences_a) - 1 else None
-        if min_length and len(sentence_a) < min_length:
+
+    for start, end in ranges_b:
+        if start == end:
             continue
-        for sentence_b, sentence_b_prepared in sentences_b:
-            if min_length and len(sentence_b) < min_length:
-                continue
-            similarity = fuzz.ratio(sentence_a_prepared, sentence_b_prepared)
-            if similarity >= similarity_threshold:
+
+        hits = scores[:, start:end] >= similarity_threshold
+        has_hit = hits.any(axis=1)
+        first_hits = start + hits.argmax(axis=1)
+
+        candidates = has_hit
+        if split_on_comma:
+            candidates = candidates | comma_any[:, start:end].any(axis=1)
+
+        for idx in np.flatnonzero(candidates):
+            sentence_a = sentences_a[idx][0]
+            first_hit = first_hits[idx] if has_hit[idx] else None
+
+            if split_on_comma:
+                # comma parts are checked against every sentence before the
+                # first full sentence match
+                stop = first_hit if first_hit is not None else end
+                for idx_b in start + np.flatnonzero(comma_any[idx, start:stop]):
+                    matches.extend(
+                        _comma_matches(
+                            parts_a[idx],
+                            parts_b[idx_b],
+                            comma_scores[
+                                offsets_a[idx] : offsets_a[idx + 1],
+                                offsets_b[idx_b] : offsets_b[idx_b + 1],
+                            ],
+                            similarity_threshold,
+                        )
+                    )
+
+            if first_hit is not None:
                 matches.append(
                     SimilarityMatch(
                         original=sentence_a,
-                        matched=sentence_b,
-                        similarity=similarity,
-                        left_neighbor=left_neighbor,
-                        right_neighbor=right_neighbor,
+                        matched=sentences_b[first_hit][0],
+                        similarity=int(scores[idx, first_hit]),
+                        left_neighbor=sentences_a[idx - 1][0] if idx > 0 else None,
+                        right_neighbor=sentences_a[idx + 1][0]
+                        if idx < len(sentences_a) - 1
+                        else None,
                     )
                 )
-                break
 
-            if split_on_comma:
-                prev_comma_a = None
-                parts_a = sentence_a.split(",")
-                parts_b = sentence_b.split(",")
-                for idx_a, comma_a in enumerate(parts_a):
-                    if min_length and len(comma_a) < min_length:
-                        continue
-                    for comma_b in parts_b:
-                        if min_length and len(comma_b) < min_length:
-                            continue
-                        similarity = fuzz.ratio(comma_a.strip(), comma_b.strip())
-                        if similarity >= similarity_threshold:
-                            matches.append(
-                                SimilarityMatch(
-                                    original=comma_a,
-                                    matched=comma_b,
-                                    similarity=similarity,
-                                    left_neighbor=prev_comma_a,
-                                    right_neighbor=parts_a[idx_a + 1]
-                                    if idx_a < len(parts_a) - 1
-                                    else None,
-                                )
-                            )
-                            break
+    return matches
+
 
+def _comma_matches(
+    parts_a: list[str],
+    parts_b: list[str],
+    scores: np.ndarray,
+    similarity_threshold: int,
+) -> list[SimilarityMatch]:
+    """
+    Matches between the comma separated parts of two sentences, each part
+    of the first sentence matches at most once
+    """
+    matches = []
+    for idx_a, comma_a in enumerate(parts_a):
+        hits = np.flatnonzero(scores[idx_a] >= similarity_threshold)
+        if not len(hits):
+            continue
+        matches.append(
+            SimilarityMatch(
+                original=comma_a,
+                matched=parts_b[hits[0]],
+                similarity=int(scores[idx_a, hits[0]]),
+                left_neighbor=None,
+                right_neighbor=parts_a[idx_a + 1] if idx_a < len(parts_a) - 1 else None,
+            )
+        )
     return matches
 
 
@@ -324,6 +472,97 @@ def dedupe_sentences_from_matches(
     return text_a.strip()
 
 
+class LineIndex:
+    """
+    Index of lines that candidate lines are fuzzy matched against.
+
+    Finds whether any indexed line has a `fuzz.ratio` of at least
+    `similarity_threshold` with a candidate without comparing the candidate
+    against every indexed line:
+
+    - exact matches are found by hash lookup
+    - lines are bucketed by length and only lengths close enough to the
+      candidate's length to possibly reach the threshold are scored
+    - the remaining lines are scored in one batch by rapidfuzz with a score
+      cutoff, which skips the full computation for lines that cannot reach it
+
+    The result is the same as comparing against every line.
+    """
+
+    def __init__(self, similarity_threshold: int):
+        self.similarity_threshold = similarity_threshold
+
+        # `fuzz.ratio` rounds, so anything from half a point below the
+        # threshold can still match
+        self.score_cutoff = max(0, similarity_threshold - 0.5 - 1e-9)
+
+        # the largest indel distance, as a fraction of the combined length
+        # of two lines, that can still reach the threshold
+        self.max_distance_ratio = 1 - self.score_cutoff / 100
+
+        self.exact: set[str] = set()
+        self.buckets: dict[int, list[str]] = {}
+        self.lengths: list[int] = []
+
+    def add(self, line: str):
+        self.exact.add(line)
+
+        length = len(line)
+        if length not in self.buckets:
+            self.buckets[length] = []
+            bisect.insort(self.lengths, length)
+        self.buckets[length].append(line)
+
+    def length_range(self, length: int) -> tuple[int, float]:
+        f = self.max_distance_ratio
+        if f >= 1:
+            return 0, math.inf
+        # indel distance is at least the length difference
+        return (
+            math.ceil(length * (1 - f) / (1 + f)),
+            math.floor(length * (1 + f) / (1 - f)),
+        )
+
+    def find(self, line: str) -> tuple[int, str] | None:
+        """
+        Returns (similarity, line) for an indexed line that is similar
+        to `line` or None
+        """
+        if self.similarity_threshold > 100:
+            return None
+
+        if line in self.exact:
+            return 100, line
+
+        low, high = self.length_range(len(line))
+        start = bisect.bisect_left(self.lengths, low)
+        stop = bisect.bisect_right(self.lengths, high)
+        if start == stop:
+            return None
+
+        candidates = list(
+            itertools.chain.from_iterable(
+                self.buckets[length] for length in self.lengths[start:stop]
+            )
+        )
+
+        best = process.extractOne(
+            line,
+            candidates,
+            scorer=rapidfuzz_fuzz.ratio,
+            processor=None,
+            score_cutoff=self.score_cutoff,
+        )
+        if not best:
+            return None
+
+        similarity = int(round(best[1]))
+        if similarity < self.similarity_threshold:
+            return None
+
+        return similarity, best[0]
+
+
 def dedupe_string(
     s: str, min_length: int = 32, similarity_threshold: int = 95, debug: bool = False
 ) -> str:
@@ -343,7 +582,10 @@ def dedupe_string(
     lines = s.split("\n")
     deduped = []
     current_in_codeblock = False
-    existing_in_codeblock = False
+
+    # lines kept so far that are outside of code blocks, these are
+    # the lines candidates are compared against
+    index = LineIndex(similarity_threshold)
 
     for line in reversed(lines):
         stripped_line = line.strip()
@@ -360,33 +602,18 @@ def dedupe_string(
             continue
 
         if len(stripped_line) > min_length:
-            similar_found = False
-            existing_in_codeblock = False
-
-            for existing_line in deduped:
-                # Track code block state for existing lines
-                if existing_line.strip().startswith("```"):
-                    existing_in_codeblock = not existing_in_codeblock
-                    continue
-
-                # Skip comparing if either line is in a code block
-                if existing_in_codeblock:
-                    continue
-
-                similarity = fuzz.ratio(stripped_line, existing_line.strip())
-                if similarity >= similarity_threshold:
-                    similar_found = True
-                    if debug:
-                        log.debug(
-                            "DEDUPE",
-                            similarity=similarity,
-                            line=line,
-                            existing_line=existing_line,
-                        )
-                    break
-            if not similar_found:
-                deduped.append(line)
-        else:
-            deduped.append(line)
+            match = index.find(stripped_line)
+            if match:
+                if debug:
+                    log.debug(
+                        "DEDUPE",
+                        similarity=match[0],
+                        line=line,
+                        existing_line=match[1],
+                    )
+                continue
+
+        deduped.append(line)
+        index.add(stripped_line)
 
     return "\n".join(reversed(deduped))
@@ -1,4 +1,5 @@
 import datetime
+import functools
 import isodate
 import structlog
 
@@ -6,6 +7,7 @@ __all__ = [
     "duration_to_timedelta",
     "timedelta_to_duration",
     "parse_duration_to_isodate_duration",
+    "iso8601_to_seconds",
     "iso8601_diff",
     "flatten_duration_components",
     "iso8601_duration_to_human",
@@ -34,6 +36,17 @@ UNIT_TO_ISO = {
 }
 
 
+@functools.lru_cache(maxsize=8192)
+def parse_duration(duration_str: str):
+    """
+    Memoized `isodate.parse_duration`
+
+    Archived and layered history timestamps are re-read every time a prompt
+    is built, parse each distinct string only once.
+    """
+    return isodate.parse_duration(duration_str)
+
+
 def duration_to_timedelta(duration):
     """Convert an isodate.Duration object or a datetime.timedelta object to a datetime.timedelta object."""
     # Check if the duration is already a timedelta object
@@ -75,12 +88,22 @@ def timedelta_to_duration(delta):
 
 def parse_duration_to_isodate_duration(duration_str):
     """Parse ISO 8601 duration string and ensure the result is an isodate.Duration."""
-    parsed_duration = isodate.parse_duration(duration_str)
+    parsed_duration = parse_duration(duration_str)
     if isinstance(parsed_duration, datetime.timedelta):
         return timedelta_to_duration(parsed_duration)
     return parsed_duration
 
 
+@functools.lru_cache(maxsize=8192)
+def iso8601_to_seconds(duration_str: str) -> int:
+    """
+    ISO 8601 duration as integer seconds, with the same 365 day year and
+    30 day month approximation `iso8601_diff` uses
+    """
+    delta = duration_to_timedelta(parse_duration_to_isodate_duration(duration_str))
+    return delta.days * 86400 + delta.seconds
+
+
 def iso8601_diff(duration_str1, duration_str2):
     # Parse the ISO 8601 duration strings ensuring they are isodate.Duration objects
     duration1 = parse_duration_to_isodate_duration(duration_str1)
@@ -182,7 +205,7 @@ def iso8601_duration_to_human(
 ):
     # Parse the ISO8601 duration string into an isodate duration object
     if not isinstance(iso_duration, isodate.Duration):
-        duration = isodate.parse_duration(iso_duration)
+        duration = parse_duration(iso_duration)
     else:
         duration = iso_duration
 
@@ -246,8 +269,14 @@ def iso8601_diff_to_human(start, end, flatten: bool = True):
     if not start or not end:
         return ""
 
-    diff = iso8601_diff(start, end)
+    seconds = abs(iso8601_to_seconds(start) - iso8601_to_seconds(end))
 
+    return _seconds_to_human(seconds, flatten)
+
+
+@functools.lru_cache(maxsize=8192)
+def _seconds_to_human(seconds: int, flatten: bool) -> str:
+    diff = timedelta_to_duration(datetime.timedelta(seconds=seconds))
     return iso8601_duration_to_human(diff, flatten=flatten)
 
 
@@ -267,9 +296,7 @@ def iso8601_add(date_a: str, date_b: str, *, clamp_non_negative: bool = False) -
     if not date_a or not date_b:
         return "PT0S"
 
-    result_duration = isodate.parse_duration(date_a.strip()) + isodate.parse_duration(
-        date_b.strip()
-    )
+    result_duration = parse_duration(date_a.strip()) + parse_duration(date_b.strip())
 
     result_iso = isodate.duration_isoformat(result_duration)
 
@@ -0,0 +1,255 @@
+import asyncio
+import types
+
+import httpx
+import pytest
+
+from talemate.agents.context import ActiveAgent
+from talemate.agents.visual import VisualAgent
+import talemate.client.base as client_base
+from talemate.client.base import ClientBase, PartialResponse, RequestInformation
+from talemate.client.http import HTTPPool
+from talemate.context import active_scene
+from talemate.emit.signals import handlers
+from talemate.util import count_tokens
+
+
+@pytest.mark.asyncio
+async def test_http_pool_reuses_client():
+    pool = HTTPPool()
+
+    client = pool.client("http://localhost:5001")
+    assert pool.client("http://localhost:5001") is client
+
+    # changing the url replaces the client and closes the old one
+    other = pool.client("http://localhost:5002")
+    assert other is not client
+    await asyncio.gather(*pool._closing)
+    assert client.is_closed
+
+    await pool.aclose()
+    assert other.is_closed
+
+    # a closed pool is recreated lazily
+    assert not pool.client("http://localhost:5002").is_closed
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_client_sse_stream():
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = "".join(
+            f'event: message\ndata: {{"token": "{token}"}}\n\n'
+            for token in ["The", " caravan", " moves", " on."]
+        )
+        return httpx.Response(200, text=body + "data: [DONE]\n\n")
+
+    client = ClientBase()
+    client.request_information = RequestInformation()
+    client._http_pool.client = lambda url: httpx.AsyncClient(
+        transport=httpx.MockTransport(handler)
+    )
+
+    events = client.sse_events("http://localhost:5001/stream", {})
+    response = await client.collect_stream(event["token"] async for event in events)
+
+    assert response == "The caravan moves on."
+    assert client.request_information.tokens == count_tokens(response)
+
+
+@pytest.mark.asyncio
+async def test_client_partial_response(monkeypatch):
+    frames = []
+
+    def receive(emission):
+        frames.append(emission.data)
+
+    handlers["partial_response"].connect(receive)
+
+    client = ClientBase()
+    client.request_information = RequestInformation()
+    client.partial_response = PartialResponse(client.name, "narrate", ["narrator"])
+
+    # everything within one frame interval is sent as a single frame
+    monkeypatch.setattr(client_base, "STREAM_FRAME_INTERVAL", 60)
+    for chunk in ["The", " caravan", " moves"]:
+        client.receive_chunk(chunk)
+    client.receive_chunk(" (thinking)", reasoning=True)
+
+    assert frames == []
+    assert client.request_information.time_to_first_token is not None
+
+    monkeypatch.setattr(client_base, "STREAM_FRAME_INTERVAL", 0)
+    client.receive_chunk(" on.")
+    client.partial_response.flush(done=True)
+
+    handlers["partial_response"].disconnect(receive)
+
+    assert [frame["text"] for frame in frames] == ["The caravan moves on.", ""]
+    assert [frame["done"] for frame in frames] == [False, True]
+    assert client.request_information.tokens == count_tokens(
+        ["The", " caravan", " moves", " (thinking)", " on."]
+    )
+
+
+@pytest.mark.asyncio
+async def test_client_partial_response_concurrent(monkeypatch):
+    frames = []
+
+    def receive(emission):
+        frames.append(emission.data)
+
+    handlers["partial_response"].connect(receive)
+    monkeypatch.setattr(client_base, "STREAM_FRAME_INTERVAL", 0)
+
+    client = ClientBase()
+    client.request_information = RequestInformation()
+
+    async def request(kind: str, chunks: list[str]):
+        client.partial_response = PartialResponse(client.name, kind, [])
+        for chunk in chunks:
+            client.receive_chunk(chunk)
+            await asyncio.sleep(0)
+        client.partial_response.flush(done=True)
+
+    # two requests through the same client, chunks arriving interleaved
+    await asyncio.gather(
+        request("narrate", ["The", " caravan"]),
+        request("summarize", ["A", " summary"]),
+    )
+
+    handlers["partial_response"].disconnect(receive)
+
+    for kind, text in (("narrate", "The caravan"), ("summarize", "A summary")):
+        received = [frame for frame in frames if frame["kind"] == kind]
+        assert len({frame["id"] for frame in received}) == 1
+        assert "".join(frame["text"] for frame in received) == text
+
+    assert client.partial_response is None
+
+
+class StreamingClient(ClientBase):
+    """
+    Streams `chunks` and then fails, or returns the text if `error` is None
+    """
+
+    enabled = True
+
+    def __init__(self, chunks: list[str], error: Exception | None = None):
+        super().__init__()
+        self.remote_model_name = "test-model"
+        self.chunks = chunks
+        self.error = error
+
+    async def get_model_name(self):
+        return self.remote_model_name
+
+    async def narrate(self, prompt: str, kind: str = "narrate") -> str:
+        agent = types.SimpleNamespace(
+            verbose_name="Narrator", inject_prompt_paramters=lambda *args: None
+        )
+        with ActiveAgent(agent, self.narrate):
+            return await self.send_prompt(prompt, kind=kind)
+
+    async def generate(self, prompt: str, parameters: dict, kind: str):
+        for chunk in self.chunks:
+            self.receive_chunk(chunk)
+            await asyncio.sleep(0)
+        if self.error:
+            raise self.error
+        return "".join(self.chunks)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "error, response",
+    [
+        (None, "The caravan moves on."),
+        (ValueError("connection lost"), ""),
+    ],
+)
+async def test_client_partial_response_done(monkeypatch, error, response):
+    frames = []
+
+    def receive(emission):
+        frames.append(emission.data)
+
+    handlers["partial_response"].connect(receive)
+    monkeypatch.setattr(client_base, "STREAM_FRAME_INTERVAL", 0)
+
+    client = StreamingClient(["The caravan", " moves on."], error=error)
+    monkeypatch.setattr(client.config.game.general, "stream_responses", True)
+
+    token = active_scene.set(types.SimpleNamespace(active=True, cancel_requested=False))
+    try:
+        assert await client.narrate("Continue the scene.") == response
+    finally:
+        active_scene.reset(token)
+        handlers["partial_response"].disconnect(receive)
+
+    # the stream is closed in the frontend whether or not generation failed
+    assert [frame["done"] for frame in frames] == [False, False, True]
+    assert "".join(frame["text"] for frame in frames) == "The caravan moves on."
+    assert client.partial_response is None
+
+
+class ReportingClient(StreamingClient):
+    """
+    Reports token counts and reasoning through the client the way the API
+    clients do, requests of the `summarize` kind take longer
+    """
+
+    async def generate(self, prompt: str, parameters: dict, kind: str):
+        self._returned_prompt_tokens = len(kind)
+        self.receive_chunk(kind)
+        await asyncio.sleep(0.05 if kind == "summarize" else 0.01)
+        self._returned_response_tokens = len(kind) * 10
+        self._reasoning_response = f"Reasoning for {kind}"
+        return f"Response for {kind}"
+
+
+@pytest.mark.asyncio
+async def test_client_concurrent_requests():
+    sent = []
+
+    def receive(emission):
+        sent.append(emission.data)
+
+    handlers["prompt_sent"].connect(receive)
+
+    client = ReportingClient([])
+
+    token = active_scene.set(types.SimpleNamespace(active=True, cancel_requested=False))
+    try:
+        slow = asyncio.create_task(client.narrate("Summarize.", kind="summarize"))
+        fast = asyncio.create_task(client.narrate("Continue.", kind="narrate"))
+
+        assert await fast == "Response for narrate"
+        # the client is busy until its last request is done
+        assert client.processing
+        assert client.requests_in_flight == 1
+
+        assert await slow == "Response for summarize"
+        assert not client.processing
+        assert client.requests_in_flight == 0
+    finally:
+        active_scene.reset(token)
+        handlers["prompt_sent"].disconnect(receive)
+
+    # each request reports its own token counts, timing and reasoning
+    for kind in ("narrate", "summarize"):
+        (data,) = [data for data in sent if data["kind"] == kind]
+        assert data["response"] == f"Response for {kind}"
+        assert data["prompt_tokens"] == len(kind)
+        assert data["response_tokens"] == len(kind) * 10
+        assert data["reasoning"] == f"Reasoning for {kind}"
+        assert data["time_to_first_token"] is not None
+
+
+@pytest.mark.asyncio
+async def test_visual_agent_closes_http_pool():
+    agent = VisualAgent()
+    client = agent.http_client
+
+    await agent.destroy()
+    assert client.is_closed
@@ -1,5 +1,16 @@
+import random
+
 import pytest
-from talemate.util.dedupe import dedupe_sentences, dedupe_string, similarity_matches
+from thefuzz import fuzz
+
+from talemate.util.dedupe import (
+    SimilarityMatch,
+    batch_similarity_matches,
+    compile_text_to_sentences,
+    dedupe_sentences,
+    dedupe_string,
+    similarity_matches,
+)
 
 
 # Test cases for dedupe_sentences
@@ -459,6 +470,85 @@ def test_dedupe_string(s, min_length, similarity_threshold, expected):
     )
 
 
+def dedupe_string_reference(
+    s: str, min_length: int = 32, similarity_threshold: int = 95
+) -> str:
+    """
+    Brute force version of dedupe_string comparing every line against every
+    previously kept line
+    """
+    deduped = []
+    current_in_codeblock = False
+    for line in reversed(s.split("\n")):
+        stripped_line = line.strip()
+        if stripped_line.startswith("```"):
+            current_in_codeblock = not current_in_codeblock
+            deduped.append(line)
+            continue
+        if current_in_codeblock or len(stripped_line) <= min_length:
+            deduped.append(line)
+            continue
+        existing_in_codeblock = False
+        similar_found = False
+        for existing_line in deduped:
+            if existing_line.strip().startswith("```"):
+                existing_in_codeblock = not existing_in_codeblock
+                continue
+            if existing_in_codeblock:
+                continue
+            if fuzz.ratio(stripped_line, existing_line.strip()) >= similarity_threshold:
+                similar_found = True
+                break
+        if not similar_found:
+            deduped.append(line)
+    return "\n".join(reversed(deduped))
+
+
+def mutate(line: str, rng: random.Random, edits: int) -> str:
+    chars = list(line)
+    for _ in range(edits):
+        op = rng.choice(["insert", "delete", "replace"])
+        pos = rng.randrange(len(chars) + 1)
+        if op == "insert" or not chars:
+            chars.insert(pos, rng.choice("abcdefghij .,*"))
+        elif op == "delete":
+            del chars[min(pos, len(chars) - 1)]
+        else:
+            chars[min(pos, len(chars) - 1)] = rng.choice("abcdefghij .,*")
+    return "".join(chars)
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("similarity_threshold", [80, 95, 100])
+def test_dedupe_string_matches_reference(seed, similarity_threshold):
+    rng = random.Random(seed)
+    words = "the caravan moves slowly across the frozen pass at dusk".split()
+    base = [
+        " ".join(rng.choice(words) for _ in range(rng.randint(4, 30)))
+        for _ in range(15)
+    ]
+    lines = []
+    for _ in range(120):
+        roll = rng.random()
+        if roll < 0.05:
+            lines.append("```")
+        elif roll < 0.15:
+            lines.append("")
+        else:
+            lines.append(
+                ("  " if rng.random() < 0.2 else "")
+                + mutate(rng.choice(base), rng, rng.randint(0, 6))
+            )
+    text = "\n".join(lines)
+
+    for min_length in (0, 10, 32):
+        assert dedupe_string(
+            text, min_length=min_length, similarity_threshold=similarity_threshold
+        ) == dedupe_string_reference(
+            text, min_length=min_length, similarity_threshold=similarity_threshold
+        )
+
+
 # Test cases for similarity_matches function
 @pytest.mark.parametrize(
     "text_a, text_b, similarity_threshold, min_length, split_on_comma, expected_count, check_properties",
@@ -715,3 +805,104 @@ def test_similarity_matches_min_length_with_comma_splitting():
         text_a, text_b, similarity_threshold=95, min_length=30, split_on_comma=True
     )
     assert len(matches) == 0
+
+
+def similarity_matches_reference(
+    text_a: str,
+    text_b: str,
+    similarity_threshold: int = 95,
+    min_length: int | None = None,
+    split_on_comma: bool = False,
+) -> list[SimilarityMatch]:
+    """
+    Pairwise version of similarity_matches scoring one sentence pair at a time
+    """
+    sentences_a = compile_text_to_sentences(text_a)
+    sentences_b = compile_text_to_sentences(text_b)
+
+    matches = []
+    for idx, (sentence_a, sentence_a_prepared) in enumerate(sentences_a):
+        left_neighbor = sentences_a[idx - 1][0] if idx > 0 else None
+        right_neighbor = sentences_a[idx + 1][0] if idx < len(sentences_a) - 1 else None
+        if min_length and len(sentence_a) < min_length:
+            continue
+        for sentence_b, sentence_b_prepared in sentences_b:
+            if min_length and len(sentence_b) < min_length:
+                continue
+            similarity = fuzz.ratio(sentence_a_prepared, sentence_b_prepared)
+            if similarity >= similarity_threshold:
+                matches.append(
+                    SimilarityMatch(
+                        original=sentence_a,
+                        matched=sentence_b,
+                        similarity=similarity,
+                        left_neighbor=left_neighbor,
+                        right_neighbor=right_neighbor,
+                    )
+                )
+                break
+
+            if split_on_comma:
+                parts_a = sentence_a.split(",")
+                parts_b = sentence_b.split(",")
+                for idx_a, comma_a in enumerate(parts_a):
+                    if min_length and len(comma_a) < min_length:
+                        continue
+                    for comma_b in parts_b:
+                        if min_length and len(comma_b) < min_length:
+                            continue
+                        similarity = fuzz.ratio(comma_a.strip(), comma_b.strip())
+                        if similarity >= similarity_threshold:
+                            matches.append(
+                                SimilarityMatch(
+                                    original=comma_a,
+                                    matched=comma_b,
+                                    similarity=similarity,
+                                    left_neighbor=None,
+                                    right_neighbor=parts_a[idx_a + 1]
+                                    if idx_a < len(parts_a) - 1
+                                    else None,
+                                )
+                            )
+                            break
+
+    return matches
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("similarity_threshold", [60, 80, 95])
+def test_batch_similarity_matches_matches_reference(seed, similarity_threshold):
+    rng = random.Random(seed)
+    words = "the caravan moves slowly across the frozen pass at dusk".split()
+
+    def sentence():
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(2, 12)))
+        if rng.random() < 0.5:
+            text += ", " + " ".join(rng.choice(words) for _ in range(rng.randint(1, 6)))
+        return text.capitalize() + rng.choice([".", "!", "?"])
+
+    base = [sentence() for _ in range(12)]
+
+    def text():
+        return " ".join(
+            mutate(rng.choice(base), rng, rng.randint(0, 4))
+            for _ in range(rng.randint(0, 8))
+        )
+
+    text_a = text()
+    texts_b = [text() for _ in range(5)]
+
+    for min_length in (None, 10, 24):
+        for split_on_comma in (False, True):
+            kwargs = dict(
+                similarity_threshold=similarity_threshold,
+                min_length=min_length,
+                split_on_comma=split_on_comma,
+            )
+            expected = [
+                match.model_dump()
+                for text_b in texts_b
+                for match in similarity_matches_reference(text_a, text_b, **kwargs)
+            ]
+            matches = batch_similarity_matches(text_a, texts_b, **kwargs)
+            assert [match.model_dump() for match in matches] == expected
@@ -4,6 +4,7 @@ from talemate.util import (
     iso8601_diff,
     iso8601_diff_to_human,
     iso8601_duration_to_human,
+    iso8601_to_seconds,
     parse_duration_to_isodate_duration,
     duration_to_timedelta,
     amount_unit_to_iso8601_duration,
@@ -134,6 +135,22 @@ def test_iso8601_diff_to_human_flattened(a, b, expected):
     assert iso8601_duration_to_human(iso8601_diff(a, b), flatten=True) == expected, (
         f"Failed for {a} vs {b}: Got {iso8601_duration_to_human(iso8601_diff(a, b), flatten=True)}"
     )
+    assert iso8601_diff_to_human(a, b) == expected
+
+
+@pytest.mark.parametrize(
+    "duration, expected",
+    [
+        ("PT0S", 0),
+        ("PT1H30M", 5400),
+        ("P2DT1S", 2 * 86400 + 1),
+        ("P1M", 30 * 86400),
+        ("P1Y", 365 * 86400),
+        ("P1W", 7 * 86400),
+    ],
+)
+def test_iso8601_to_seconds(duration, expected):
+    assert iso8601_to_seconds(duration) == expected
 
 
 @pytest.mark.parametrize(
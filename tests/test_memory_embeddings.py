@@ -0,0 +1,153 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from talemate.agents.memory.embeddings import (
+    EmbeddingCache,
+    EmbeddingModelRegistry,
+    EmbeddingWorker,
+    model_size,
+)
+
+MB = 1024 * 1024
+
+
+class FakeParameter:
+    def __init__(self, size: int):
+        self.size = size
+
+    def numel(self) -> int:
+        return self.size
+
+    def element_size(self) -> int:
+        return 1
+
+
+class FakeModel:
+    def __init__(self, size: int):
+        self.size = size
+
+    def parameters(self):
+        return [FakeParameter(self.size // 2), FakeParameter(self.size // 2)]
+
+
+class FakeEmbeddingFunction:
+    def __init__(self, size: int):
+        self._model = FakeModel(size)
+
+
+def test_model_size():
+    assert model_size(FakeEmbeddingFunction(100 * MB)) == 100 * MB
+    assert model_size(object()) == 0
+
+
+def test_embedding_model_registry():
+    registry = EmbeddingModelRegistry()
+    loads = []
+
+    def loader(name: str, size: int):
+        def load():
+            loads.append(name)
+            return FakeEmbeddingFunction(size)
+
+        return load
+
+    a = registry.get(("st", "a", "cpu", False), loader("a", 100 * MB), 250 * MB)
+    b = registry.get(("st", "b", "cpu", False), loader("b", 100 * MB), 250 * MB)
+
+    # loaded models are kept warm
+    assert registry.get(("st", "a", "cpu", False), loader("a", 100 * MB), 250 * MB) is a
+    assert loads == ["a", "b"]
+
+    # the same model on another device is a separate entry
+    registry.get(("st", "a", "cuda", False), loader("a-cuda", 100 * MB), 250 * MB)
+    assert loads == ["a", "b", "a-cuda"]
+
+    # b was the least recently used and got evicted to fit the cap
+    assert list(registry.models) == [
+        ("st", "a", "cpu", False),
+        ("st", "a", "cuda", False),
+    ]
+    assert registry.size == 200 * MB
+
+    # a model larger than the cap is still kept while in use
+    registry.get(("st", "xl", "cpu", False), loader("xl", 500 * MB), 250 * MB)
+    assert list(registry.models) == [("st", "xl", "cpu", False)]
+    assert (
+        registry.get(("st", "b", "cpu", False), loader("b", 100 * MB), 250 * MB)
+        is not b
+    )
+
+
+def test_embedding_cache(tmp_path):
+    path = str(tmp_path / "embedding_cache.sqlite3")
+    calls = []
+
+    def embed_fn(texts: list[str]) -> list[list[float]]:
+        calls.append(list(texts))
+        return [[len(text), 1.0] for text in texts]
+
+    cache = EmbeddingCache(path)
+    texts = ["The caravan moves on.", "Elara looks back.", "The caravan moves on."]
+
+    vectors = cache.embed("st-minilm", texts, embed_fn)
+    assert calls == [["The caravan moves on.", "Elara looks back."]]
+    assert [v.tolist() for v in vectors] == [[21, 1], [17, 1], [21, 1]]
+    assert vectors[0].dtype == np.float32
+    assert (cache.hits, cache.misses) == (0, 3)
+
+    # only the new text is embedded
+    cache.embed("st-minilm", ["Elara looks back.", "Night falls."], embed_fn)
+    assert calls[-1] == ["Night falls."]
+    assert (cache.hits, cache.misses) == (1, 4)
+
+    # embeddings are keyed by fingerprint
+    cache.embed("openai-small", ["Night falls."], embed_fn)
+    assert calls[-1] == ["Night falls."]
+
+    # and persisted
+    reopened = EmbeddingCache(path)
+    vectors = reopened.embed("st-minilm", texts, embed_fn)
+    assert len(calls) == 3
+    assert reopened.hit_rate == 1.0
+    assert [v.tolist() for v in vectors] == [[21, 1], [17, 1], [21, 1]]
+
+
+@pytest.mark.asyncio
+async def test_embedding_worker(tmp_path):
+    calls = []
+    threads = set()
+
+    def embed_fn(texts: list[str]) -> list[list[float]]:
+        calls.append(list(texts))
+        threads.add(threading.current_thread().name)
+        return [[len(text), 1.0] for text in texts]
+
+    worker = EmbeddingWorker(EmbeddingCache(str(tmp_path / "cache.sqlite3")))
+
+    # concurrent requests are coalesced into a single embedding call
+    a, b, c = await asyncio.gather(
+        worker.embed("st-minilm", ["Elara looks back."], embed_fn),
+        worker.embed("st-minilm", ["Night falls.", "Elara looks back."], embed_fn),
+        worker.embed("st-minilm", ["The caravan moves on."], embed_fn),
+    )
+    assert calls == [["Elara looks back.", "Night falls.", "The caravan moves on."]]
+    assert worker.coalesced == 2
+    assert [v.tolist() for v in a] == [[17, 1]]
+    assert [v.tolist() for v in b] == [[12, 1], [17, 1]]
+    assert [v.tolist() for v in c] == [[21, 1]]
+
+    # the blocking variant runs on the same worker thread
+    vectors = worker.embed_sync("st-minilm", ["Dawn breaks."], embed_fn)
+    assert [v.tolist() for v in vectors] == [[12, 1]]
+    assert len(threads) == 1
+    assert threads.pop().startswith("talemate-embeddings")
+
+    # errors are raised to the caller
+    def broken(texts: list[str]):
+        raise RuntimeError("model not loaded")
+
+    with pytest.raises(RuntimeError):
+        await worker.embed("st-minilm", ["Dusk."], broken)
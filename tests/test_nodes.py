@@ -7,6 +7,15 @@ from talemate.game.engine.nodes.core import (
     Router,
     GraphContext,
 )
+from talemate.game.engine.nodes.run import (
+    CallForEach,
+    Function,
+    FunctionArgument,
+    FunctionReturn,
+    FunctionWrapper,
+)
+import asyncio
+import random
 import networkx as nx
 import structlog
 import pytest
@@ -293,6 +302,76 @@ async def test_simple_loop():
     await graph.execute()
 
 
+@pytest.mark.asyncio
+async def test_execution_plan_cache():
+    node_a = Node(title="A")
+    node_b = Node(title="B")
+    node_c = Node(title="C")
+
+    out_a = node_a.add_output("out")
+    in_b = node_b.add_input("in")
+    out_b = node_b.add_output("out")
+    in_c = node_c.add_input("in")
+
+    graph = Graph()
+    graph.add_node(node_a)
+    graph.add_node(node_b)
+    graph.add_node(node_c)
+    graph.connect(out_a, in_b)
+
+    plan = graph.execution_plan()
+    assert [[graph.node(n).title for n in chain] for chain in plan.chains] == [
+        ["A", "B"]
+    ]
+    assert list(plan.predecessors[node_b.id]) == [node_a.id]
+
+    # executing resets the graph but keeps the plan
+    await graph.execute()
+    assert graph.execution_plan() is plan
+
+    # re-connecting an existing edge keeps the plan
+    graph.connect(out_a, in_b)
+    assert graph.execution_plan() is plan
+
+    graph.connect(out_b, in_c)
+    assert graph.execution_plan() is not plan
+    assert [
+        [graph.node(n).title for n in chain] for chain in graph.execution_plan().chains
+    ] == [["A", "B", "C"]]
+
+    subplan = graph.execution_plan().subplan(node_b.id)
+    assert subplan.chains == [[node_a.id, node_b.id]]
+    assert graph.execution_plan().subplan(node_b.id) is subplan
+
+    plan = graph.execution_plan()
+    graph.reinitialize()
+    assert graph.execution_plan() is not plan
+
+
+def test_input_sources_index():
+    node_a = Node(title="A")
+    node_b = Node(title="B")
+
+    out_a = node_a.add_output("out")
+    in_b = node_b.add_input("in", id=f"{node_b.id}.in")
+
+    graph = Graph()
+    graph.add_node(node_a)
+    graph.add_node(node_b)
+    graph.edges = {out_a.full_id: [in_b.full_id]}
+    graph.reinitialize()
+
+    assert graph.input_sources() == {in_b.full_id: out_a.full_id}
+    assert in_b.source is out_a
+
+    node_c = Node(title="C")
+    in_c = node_c.add_input("in")
+    graph.add_node(node_c)
+    graph.connect(out_a, in_c)
+
+    assert graph.input_sources()[in_c.full_id] == out_a.full_id
+
+
 @pytest.mark.asyncio
 async def test_simple_fork():
     entry = Entry(title="Entry")
@@ -396,3 +475,108 @@ async def test_visited_paths():
         )
 
     await cleanup_pending_tasks()
+
+
+def test_socket_ids_ignore_global_seed():
+    random.seed(42)
+    first = Node(title="A").add_output("out").id
+    random.seed(42)
+    second = Node(title="B").add_output("out").id
+
+    assert first != second
+
+
+IN_FLIGHT = {"now": 0, "max": 0}
+
+
+class SlowDouble(Node):
+    """
+    Async stub node that doubles its input, items with a lower value take
+    longer so calls finish out of order
+    """
+
+    def __init__(self, title="Slow Double", **kwargs):
+        super().__init__(title=title, **kwargs)
+
+    def setup(self):
+        self.add_input("value")
+        self.add_output("value")
+        self.set_property("fail_on", None)
+
+    async def run(self, state: GraphState):
+        value = self.get_input_value("value")
+        IN_FLIGHT["now"] += 1
+        IN_FLIGHT["max"] = max(IN_FLIGHT["max"], IN_FLIGHT["now"])
+        try:
+            await asyncio.sleep(0.002 * (10 - value % 10))
+        finally:
+            IN_FLIGHT["now"] -= 1
+        if value == self.get_property("fail_on"):
+            raise ValueError(f"failed on {value}")
+        # calls running at the same time do not see each other's values
+        assert self.get_input_value("value") == value
+        self.set_output_values({"value": value * 2})
+
+
+def make_double_function(fail_on: int = None) -> Function:
+    fn_graph = Function(title="Double")
+    argument = FunctionArgument(title="Argument")
+    argument.set_property("name", "item")
+    double = SlowDouble()
+    double.set_property("fail_on", fail_on)
+    result = FunctionReturn(title="Return")
+
+    fn_graph.add_node(argument)
+    fn_graph.add_node(double)
+    fn_graph.add_node(result)
+    fn_graph.connect(argument.outputs[0], double.inputs[0])
+    fn_graph.connect(double.outputs[0], result.inputs[0])
+    return fn_graph
+
+
+async def call_for_each(fn_graph: Function, items: list, concurrency: int):
+    node = CallForEach()
+    node.set_property("concurrency", concurrency)
+
+    with GraphContext() as state:
+        node.set_property("fn", FunctionWrapper(fn_graph, fn_graph, state))
+        node.set_property("items", items)
+        await node.run(state)
+        return node.get_output_socket("results").value
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("concurrency", [1, 4])
+async def test_call_for_each(concurrency):
+    IN_FLIGHT["max"] = 0
+    results = await call_for_each(make_double_function(), list(range(12)), concurrency)
+
+    assert results == [item * 2 for item in range(12)]
+    assert IN_FLIGHT["max"] == concurrency
+    assert IN_FLIGHT["now"] == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("concurrency", [1, 4])
+async def test_call_for_each_error(concurrency):
+    with pytest.raises(ValueError, match="failed on 5"):
+        await call_for_each(
+            make_double_function(fail_on=5), list(range(12)), concurrency
+        )
+
+    # calls still running when the error was raised have been cancelled
+    assert IN_FLIGHT["now"] == 0
+
+
+@pytest.mark.asyncio
+async def test_call_for_each_cancelled():
+    task = asyncio.create_task(
+        call_for_each(make_double_function(), list(range(12)), concurrency=4)
+    )
+    await asyncio.sleep(0.005)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert IN_FLIGHT["now"] == 0
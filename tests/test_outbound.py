@@ -0,0 +1,99 @@
+import asyncio
+import dataclasses
+import datetime
+import json
+
+import pytest
+
+from talemate.scene_message import CharacterMessage, Flags
+from talemate.server.outbound import OutboundPipeline, coalesce, encode
+from talemate.util.data import JSONEncoder
+from talemate.world_state.templates.base import Priority
+
+
+class FakeWebsocket:
+    def __init__(self):
+        self.frames = []
+
+    async def send(self, data: str):
+        self.frames.append(json.loads(data))
+
+
+@dataclasses.dataclass
+class Point:
+    x: int
+    y: int
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"type": "status", "data": Point(1, 2)},
+        {"type": "system", "message": CharacterMessage("Elara: Hello.")},
+        {"type": "status", "ts": datetime.datetime(2024, 5, 1, 12, 30)},
+        {"type": "status", "date": datetime.date(2024, 5, 1)},
+        {"type": "status", "priority": Priority.high},
+        {"type": "status", "flags": Flags.HIDDEN},
+        {"type": "status", "data": {1: "one", None: "none"}},
+    ],
+)
+def test_encode_matches_json_encoder(payload):
+    assert json.loads(encode(payload)) == json.loads(
+        json.dumps(payload, cls=JSONEncoder)
+    )
+
+
+def test_coalesce():
+    messages = [
+        {"type": "agent_status", "name": "narrator", "status": "busy"},
+        {"type": "narrator", "message": "The caravan moves on."},
+        {"type": "agent_status", "name": "director", "status": "idle"},
+        {"type": "agent_status", "name": "narrator", "status": "idle"},
+        {"type": "client_status", "name": "koboldcpp", "status": "busy"},
+        {"type": "client_status", "name": "koboldcpp", "status": "idle"},
+        {"type": "status", "message": "Saved scene"},
+        {"type": "status", "message": "Saved scene"},
+    ]
+
+    assert coalesce(messages) == [
+        {"type": "narrator", "message": "The caravan moves on."},
+        {"type": "agent_status", "name": "director", "status": "idle"},
+        {"type": "agent_status", "name": "narrator", "status": "idle"},
+        {"type": "client_status", "name": "koboldcpp", "status": "idle"},
+        {"type": "status", "message": "Saved scene"},
+        {"type": "status", "message": "Saved scene"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_outbound_pipeline_batches_per_tick():
+    websocket = FakeWebsocket()
+    queue = asyncio.Queue()
+    pipeline = OutboundPipeline(websocket, queue)
+    task = asyncio.create_task(pipeline.run())
+
+    # a burst of emissions ends up in one frame
+    loop = asyncio.get_running_loop()
+    for i in range(50):
+        loop.call_soon(queue.put_nowait, {"type": "narrator", "id": i})
+    loop.call_soon(queue.put_nowait, {"type": "agent_status", "name": "a"})
+    loop.call_soon(queue.put_nowait, {"type": "agent_status", "name": "a"})
+
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+    # a lone message is sent as is
+    queue.put_nowait({"type": "ping"})
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+    task.cancel()
+
+    assert len(websocket.frames) == 2
+    assert [m["id"] for m in websocket.frames[0][:50]] == list(range(50))
+    assert websocket.frames[0][50:] == [{"type": "agent_status", "name": "a"}]
+    assert websocket.frames[1] == {"type": "ping"}
+
+    stats = pipeline.stats()
+    assert (stats["frames"], stats["messages"], stats["dropped"]) == (2, 52, 1)
+    assert stats["bytes"] > 0
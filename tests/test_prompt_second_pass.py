@@ -0,0 +1,48 @@
+import jinja2
+import pytest
+
+from talemate.prompts.base import Prompt
+
+
+def legacy_second_pass(prompt: Prompt, prompt_text: str) -> str:
+    """
+    The second pass as it was before only marker fragments were rendered
+    """
+    prompt_text = prompt_text.replace("{{", "__").replace("}}", "__")
+    prompt_text = prompt_text.replace("{!{", "{{").replace("}!}", "}}")
+    return (
+        jinja2.Environment()
+        .from_string(prompt_text)
+        .render({"random": prompt.random, **prompt.vars})
+    )
+
+
+@pytest.fixture
+def prompt():
+    prompt = Prompt.from_text("", vars={"name": "Elara", "items": ["a", "b"]})
+    prompt.dedupe_enabled = False
+    return prompt
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "No markers at all.",
+        "Trailing newline\n",
+        "Windows\r\nline endings\r\n",
+        "Scene content with {{ braces }} that is not rendered.",
+        "Hello {!{ name }!}, you carry {!{ items|join(', ') }!}.",
+        "{!{ name }!}\n\n{!{ name|upper }!}\n",
+        "Multi\n{!{\nname\n}!}\nline",
+        "Mixed {{ user }} and {!{ name }!}",
+    ],
+)
+def test_second_pass_matches_full_render(prompt, text):
+    assert prompt.render_second_pass(text) == legacy_second_pass(prompt, text)
+
+
+def test_second_pass_leaves_content_outside_markers(prompt):
+    text = "Notes {% not a tag %} and {# not a comment #} for {!{ name }!}"
+    assert prompt.render_second_pass(text) == (
+        "Notes {% not a tag %} and {# not a comment #} for Elara"
+    )
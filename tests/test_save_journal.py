@@ -0,0 +1,155 @@
+import json
+import os
+
+import pytest
+
+from talemate.save import SceneJournal, journal_path, read_scene_file
+from talemate.scene_message import (
+    CharacterMessage,
+    DirectorMessage,
+    NarratorMessage,
+    TimePassageMessage,
+)
+
+
+def scene_data(history, archived=None, layered=None, **kwargs) -> dict:
+    return {
+        "name": "Caravan",
+        "history": history,
+        "archived_history": archived or [],
+        "layered_history": layered or [],
+        "agent_state": {},
+        "ts": "PT1H",
+        **kwargs,
+    }
+
+
+def expected(data: dict) -> dict:
+    return json.loads(
+        json.dumps(
+            {
+                **data,
+                "history": [m.__dict__() for m in data["history"]],
+            }
+        )
+    )
+
+
+def without_journal_id(data: dict) -> dict:
+    return {k: v for k, v in data.items() if k != "journal_id"}
+
+
+@pytest.mark.asyncio
+async def test_scene_journal_appends(tmp_path):
+    path = str(tmp_path / "caravan.json")
+    journal = SceneJournal()
+
+    history = [NarratorMessage("The caravan leaves at dawn.", id=1)]
+    archived = [{"text": "The caravan was hired.", "ts": "PT0S", "id": "a1"}]
+    data = scene_data(history, archived)
+
+    await journal.write(path, data)
+    assert not os.path.exists(journal_path(path))
+    snapshot = open(path).read()
+
+    # only appended entries go to the journal, the snapshot is untouched
+    history.append(CharacterMessage("Elara: We should hurry.", id=2))
+    archived.append({"text": "They crossed the river.", "ts": "PT1H", "id": "a2"})
+    data["layered_history"] = [[{"text": "A journey begins.", "id": "l1"}]]
+    await journal.write(path, data)
+
+    history.append(NarratorMessage("Night falls.", id=3))
+    data["ts"] = "PT2H"
+    await journal.write(path, data)
+
+    assert open(path).read() == snapshot
+    records = open(journal_path(path)).read().splitlines()
+    assert len(records) == 2
+    assert "scene" not in json.loads(records[0])
+    assert json.loads(records[1])["scene"]["ts"] == "PT2H"
+
+    assert without_journal_id(read_scene_file(path)) == expected(data)
+
+
+@pytest.mark.asyncio
+async def test_scene_journal_snapshots_on_edit(tmp_path):
+    path = str(tmp_path / "caravan.json")
+    journal = SceneJournal()
+
+    history = [NarratorMessage("The caravan leaves at dawn.", id=1)]
+    data = scene_data(history)
+    await journal.write(path, data)
+
+    history.append(NarratorMessage("Night falls.", id=2))
+    await journal.write(path, data)
+    assert os.path.exists(journal_path(path))
+
+    # editing an existing message can't be journaled
+    history[0].message = "The caravan leaves at noon."
+    await journal.write(path, data)
+    assert not os.path.exists(journal_path(path))
+    assert without_journal_id(read_scene_file(path)) == expected(data)
+
+    # neither can saving to a different file
+    history.append(NarratorMessage("Dawn breaks.", id=3))
+    await journal.write(str(tmp_path / "copy.json"), data)
+    assert not os.path.exists(journal_path(str(tmp_path / "copy.json")))
+
+
+@pytest.mark.asyncio
+async def test_scene_journal_snapshots_on_subclass_field_edit(tmp_path):
+    path = str(tmp_path / "caravan.json")
+    journal = SceneJournal()
+
+    history = [
+        DirectorMessage("Keep moving.", id=1, source="Elara"),
+        TimePassageMessage(ts="PT1H", message="1 hour later", id=2),
+        CharacterMessage("Elara: We should hurry.", id=3),
+    ]
+    data = scene_data(history)
+    await journal.write(path, data)
+
+    edits = [
+        (history[0], "action", "narrative"),
+        (history[0], "subtype", "scene_direction"),
+        (history[1], "ts", "PT2H"),
+        (history[2], "from_choice", "Hurry"),
+    ]
+
+    for message, field, value in edits:
+        setattr(message, field, value)
+        await journal.write(path, data)
+        assert without_journal_id(read_scene_file(path)) == expected(data)
+
+    # a changed token count alone is not an edit
+    history.append(NarratorMessage("Night falls.", id=4))
+    await journal.write(path, data)
+    history[0].tokens = ["digest", 3]
+    await journal.write(path, data)
+    assert os.path.exists(journal_path(path))
+
+
+@pytest.mark.asyncio
+async def test_scene_journal_replay_stops_at_bad_records(tmp_path):
+    path = str(tmp_path / "caravan.json")
+    journal = SceneJournal()
+
+    history = [NarratorMessage("The caravan leaves at dawn.", id=1)]
+    data = scene_data(history)
+    await journal.write(path, data)
+
+    history.append(NarratorMessage("Night falls.", id=2))
+    await journal.write(path, data)
+    saved = expected(data)
+
+    # interrupted write
+    with open(journal_path(path), "a") as f:
+        f.write('{"journal_id": "')
+
+    assert without_journal_id(read_scene_file(path)) == saved
+
+    # journal left behind by another snapshot
+    with open(journal_path(path), "w") as f:
+        f.write(json.dumps({"journal_id": "other", "base": {}, "append": {}}))
+
+    assert len(read_scene_file(path)["history"]) == 1
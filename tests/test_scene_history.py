@@ -0,0 +1,166 @@
+import asyncio
+import copy
+import random
+import types
+
+import pytest
+
+import talemate.load as load
+from talemate.scene_message import (
+    CharacterMessage,
+    DirectorMessage,
+    NarratorMessage,
+    SceneHistory,
+    TimePassageMessage,
+    reset_message_id,
+)
+from talemate.tale_mate import Scene
+
+
+def make_message(i: int):
+    kind = i % 4
+    if kind == 0:
+        return CharacterMessage(f"Elara: Line {i}", source="player" if i % 8 else "ai")
+    if kind == 1:
+        return NarratorMessage(f"Narration {i}")
+    if kind == 2:
+        return DirectorMessage(f"Direction {i}", source="Elara")
+    return TimePassageMessage(ts="PT1H", message="1 hour later")
+
+
+def make_scene(num: int) -> Scene:
+    scene = Scene.__new__(Scene)
+    scene.history = [make_message(i) for i in range(num)]
+    return scene
+
+
+def assert_consistent(history: SceneHistory):
+    for position, message in enumerate(history):
+        assert history.index_of(message.id) == position
+
+    for typ in ("character", "narrator", "director", "time"):
+        expected = [
+            idx for idx in range(len(history) - 1, -1, -1) if history[idx].typ == typ
+        ]
+        assert list(history.positions_of(typ)) == expected
+
+    expected = [
+        idx
+        for idx in range(len(history) - 1, -1, -1)
+        if history[idx].typ in ("character", "narrator")
+    ]
+    assert list(history.positions_of(["character", "narrator"])) == expected
+
+
+def test_scene_history_indexes_follow_mutations():
+    rng = random.Random(7)
+    history = SceneHistory(make_message(i) for i in range(50))
+    assert_consistent(history)
+
+    for i in range(200):
+        op = rng.randrange(9)
+        if op == 0:
+            history.append(make_message(i))
+        elif op == 1:
+            history.extend([make_message(i), make_message(i + 1)])
+        elif op == 2 and history:
+            history.pop()
+        elif op == 3 and history:
+            history.pop(rng.randrange(len(history)))
+        elif op == 4:
+            history.insert(rng.randrange(len(history) + 1), make_message(i))
+        elif op == 5 and history:
+            history.remove(history[rng.randrange(len(history))])
+        elif op == 6 and history:
+            history[rng.randrange(len(history))] = make_message(i)
+        elif op == 7 and history:
+            del history[-rng.randrange(1, len(history) + 1)]
+        elif op == 8:
+            history.insert(-rng.randrange(1, 4), make_message(i))
+        assert_consistent(history)
+
+    assert_consistent(copy.copy(history))
+    assert history.index_of(-1) == -1
+
+
+def test_scene_history_assignment():
+    scene = make_scene(10)
+    assert isinstance(scene.history, SceneHistory)
+
+    # slicing returns a plain list, assigning it back re-wraps it
+    scene.history = scene.history[:5]
+    assert isinstance(scene.history, SceneHistory)
+    assert_consistent(scene.history)
+
+
+def test_scene_history_lookups():
+    scene = make_scene(100)
+    history = scene.history
+
+    assert scene.message_index(history[42].id) == 42
+    assert scene.get_message(history[42].id) is history[42]
+    assert scene.get_message(-1) is None
+
+    assert scene.last_message_of_type("narrator") is history[97]
+    assert scene.last_message_of_type(["character", "narrator"]) is history[97]
+    assert scene.last_message_of_type("character", source="ai") is history[96]
+    assert scene.last_message_of_type("narrator", max_iterations=2) is None
+    assert scene.last_message_of_type("director", max_iterations=2) is history[98]
+    assert scene.last_message_of_type("narrator", stop_on_time_passage=True) is None
+
+    assert scene.find_message("director") is history[98]
+    assert scene.find_message("narrator", max_iterations=4) is history[97]
+    assert scene.find_message("character", max_iterations=4) is None
+
+    assert scene.collect_messages("narrator", max_iterations=10) == [
+        history[97],
+        history[93],
+    ]
+    assert scene.collect_messages(max_iterations=3, start_idx=50) == list(
+        reversed(history[48:51])
+    )
+    assert scene.collect_messages(
+        ["narrator", "time"], stop_on_time_passage=True, start_idx=97
+    ) == [history[97], history[95]]
+
+
+def test_scene_history_pop():
+    scene = make_scene(100)
+    history = scene.history
+    last_director = history[98]
+
+    scene.pop_history("director")
+    assert last_director not in history
+    assert_consistent(history)
+
+    # the narrator message closest to the start
+    first_narrator = history[1]
+    scene.pop_history("narrator", reverse=True)
+    assert history[1] is not first_narrator
+    assert_consistent(history)
+
+    scene.pop_history("character", source="player", all=True)
+    assert not [m for m in history if m.typ == "character" and m.source == "player"]
+    assert_consistent(history)
+
+
+@pytest.mark.asyncio
+async def test_backscroll_load_message_ids(monkeypatch):
+    monkeypatch.setattr(load, "HISTORY_CHUNK_SIZE", 10)
+    scene = types.SimpleNamespace(max_backscroll=10)
+    data = [{"typ": "character", "message": f"Elara: Line {i}"} for i in range(50)]
+    created = []
+
+    async def create_messages():
+        for _ in range(5):
+            created.append(NarratorMessage("Meanwhile"))
+            await asyncio.sleep(0)
+
+    reset_message_id()
+    history, _ = await asyncio.gather(
+        load._load_history_backscroll_first(scene, data, []), create_messages()
+    )
+
+    assert [message.id for message in history] == list(range(1, 51))
+    # messages created while the history loads come after it
+    assert [message.id for message in created] == list(range(51, 56))
@@ -0,0 +1,340 @@
+import asyncio
+import random
+import re
+import time
+import types
+
+import pytest
+
+import talemate.agents as agents
+import talemate.agents.tts.voice_library as voice_library
+import talemate.instance as instance
+from talemate.agents.summarize.layered_history import LayeredHistoryMixin
+from talemate.client.base import ClientBase
+from talemate.context import active_scene
+from talemate.exceptions import GenerationCancelled
+from talemate.history import rebuild_history
+from talemate.scene_message import CharacterMessage, TimePassageMessage
+from talemate.tale_mate import Scene
+from talemate.util.async_tools import run_ordered
+
+LINE = re.compile(r"Elara: Line (\d+)\b")
+
+
+class StubClient:
+    """
+    Local stand-in for an LLM client that takes `latency` seconds per
+    request and records how many requests were in flight at once
+    """
+
+    def __init__(self, latency: float = 0.02, max_concurrent_requests: int = 1):
+        self.latency = latency
+        self.max_concurrent_requests = max_concurrent_requests
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self.fail_on = None
+
+    async def summarize(self, text: str) -> str:
+        self.requests += 1
+        if self.fail_on is not None and self.requests == self.fail_on:
+            raise GenerationCancelled("cancelled")
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+
+        # keep the first line, so the summary is always shorter
+        return text.split("\n")[0]
+
+
+class StubSummarizer(LayeredHistoryMixin):
+    agent_type = "summarizer"
+    verbose_name = "Summarizer"
+    layered_history_threshold = 100
+    layered_history_max_layers = 3
+    layered_history_max_process_tokens = 10000
+    layered_history_response_length = 256
+    layered_history_analyze_chunks = False
+    layered_history_chunk_size = 512
+
+    def __init__(self, client: StubClient, scene):
+        self.client = client
+        self.scene = scene
+
+    async def emit_status(self, processing: bool = None):
+        pass
+
+    async def summarize_events(self, text: str, extra_context: str = None, **kwargs):
+        return await self.client.summarize(text)
+
+
+def make_scene(num: int):
+    return types.SimpleNamespace(
+        archived_history=[
+            {
+                "text": f"Entry {i}: " + "the caravan moves on " * 8,
+                "ts": f"PT{i}M",
+                "start": i,
+                "end": i,
+            }
+            for i in range(num)
+        ],
+        layered_history=[],
+    )
+
+
+def layers(scene) -> list[list[dict]]:
+    """
+    Layered history without the random entry ids and cached token counts
+    """
+    return [
+        [
+            {key: value for key, value in entry.items() if key not in ("id", "tokens")}
+            for entry in layer
+        ]
+        for layer in scene.layered_history
+    ]
+
+
+@pytest.mark.asyncio
+async def test_run_ordered_commits_in_order():
+    rng = random.Random(3)
+    latencies = [rng.uniform(0.001, 0.02) for _ in range(20)]
+    in_flight = 0
+    max_in_flight = 0
+    committed = []
+
+    async def run(job):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(latencies[job])
+        in_flight -= 1
+        return job * 2
+
+    async def commit(job, result):
+        committed.append((job, result))
+
+    results = await run_ordered(range(20), run, commit, concurrency=4)
+
+    assert results == [job * 2 for job in range(20)]
+    assert committed == [(job, job * 2) for job in range(20)]
+    assert max_in_flight == 4
+
+
+@pytest.mark.asyncio
+async def test_run_ordered_failure_keeps_prefix():
+    committed = []
+
+    async def run(job):
+        await asyncio.sleep(0.01 if job != 5 else 0)
+        if job == 5:
+            raise ValueError(job)
+        return job
+
+    async def commit(job, result):
+        committed.append(job)
+
+    with pytest.raises(ValueError):
+        await run_ordered(range(20), run, commit, concurrency=3)
+
+    assert committed == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_run_ordered_async_jobs():
+    async def jobs():
+        for job in range(5):
+            await asyncio.sleep(0)
+            yield job
+
+    async def run(job):
+        return job
+
+    assert await run_ordered(jobs(), run, concurrency=2) == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_layered_history_parallel_matches_sequential():
+    sequential = StubSummarizer(StubClient(), make_scene(40))
+    t0 = time.perf_counter()
+    await sequential.summarize_to_layered_history()
+    sequential_time = time.perf_counter() - t0
+
+    parallel = StubSummarizer(StubClient(max_concurrent_requests=4), make_scene(40))
+    t0 = time.perf_counter()
+    await parallel.summarize_to_layered_history()
+    parallel_time = time.perf_counter() - t0
+
+    assert sequential.scene.layered_history[0]
+    assert layers(parallel.scene) == layers(sequential.scene)
+    assert sequential.client.max_in_flight == 1
+    assert parallel.client.max_in_flight == 4
+    assert parallel_time < sequential_time
+
+
+@pytest.mark.asyncio
+async def test_layered_history_resumes_after_interruption():
+    expected = StubSummarizer(StubClient(), make_scene(40))
+    await expected.summarize_to_layered_history()
+
+    client = StubClient(max_concurrent_requests=4)
+    client.fail_on = 6
+    summarizer = StubSummarizer(client, make_scene(40))
+    await summarizer.summarize_to_layered_history()
+
+    # only the chunks before the cancelled one have been committed
+    committed = layers(summarizer.scene)[0]
+    assert 0 < len(committed) < len(expected.scene.layered_history[0])
+    assert committed == layers(expected.scene)[0][: len(committed)]
+
+    client.fail_on = None
+    await summarizer.summarize_to_layered_history()
+
+    assert layers(summarizer.scene) == layers(expected.scene)
+
+
+class StubLLMClient(ClientBase):
+    """
+    Client answering summarization requests with the range of lines in the
+    dialogue after a random delay, records how many were in flight at once
+    """
+
+    client_type = "stub"
+    max_token_length = 8192
+    max_concurrent_requests = 1
+
+    def __init__(self, max_concurrent_requests: int = 1, **kwargs):
+        super().__init__(**kwargs)
+        self.max_concurrent_requests = max_concurrent_requests
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self.fail_on = None
+        self.rng = random.Random(5)
+
+    async def send_prompt(self, prompt: str, kind: str = "conversation", **kwargs):
+        if not kind.startswith("summarize"):
+            # no natural termination point in the dialogue
+            return ""
+
+        self.requests += 1
+        if self.fail_on is not None and self.requests == self.fail_on:
+            raise GenerationCancelled("cancelled")
+
+        # the last line of the dialogue block, previous summaries come first
+        dialogue = prompt.rsplit("<|SECTION:DIALOGUE|>", 1)[-1]
+        lines = [int(line) for line in LINE.findall(dialogue)]
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # longer than the rebuild waits between planning entries
+            await asyncio.sleep(self.rng.uniform(0.2, 0.4))
+        finally:
+            self.in_flight -= 1
+
+        return f"SUMMARY: Lines {min(lines)} to {max(lines)}."
+
+
+class StubMemory:
+    def drop_db(self):
+        pass
+
+    async def set_db(self):
+        pass
+
+    async def add_many(self, *args, **kwargs):
+        pass
+
+    async def delete(self, *args, **kwargs):
+        pass
+
+
+def make_archive_scene(max_concurrent_requests: int = 1):
+    voice_library.VOICE_LIBRARY = voice_library.VoiceLibrary(voices={})
+    scene = Scene()
+    scene.active = True
+    for agent_type, agent_cls in agents.AGENT_CLASSES.items():
+        agent = agent_cls()
+        agent.scene = scene
+        instance.AGENTS[agent_type] = agent
+    instance.AGENTS["memory"] = StubMemory()
+
+    for i in range(80):
+        if i % 25 == 24:
+            scene.history.append(TimePassageMessage(ts="PT1H", message="1 hour later"))
+        else:
+            scene.history.append(
+                CharacterMessage(f"Elara: Line {i} " + "of the caravan " * 6)
+            )
+
+    summarizer = instance.get_agent("summarizer")
+    summarizer.client = StubLLMClient(max_concurrent_requests=max_concurrent_requests)
+    summarizer.actions["archive"].config["threshold"].value = 200
+    summarizer.actions["layered_history"].enabled = False
+    return scene, summarizer
+
+
+def archive(scene) -> list[dict]:
+    """
+    Archived history without the random entry ids
+    """
+    return [
+        {key: value for key, value in entry.items() if key != "id"}
+        for entry in scene.archived_history
+    ]
+
+
+async def rebuild(scene):
+    token = active_scene.set(scene)
+    try:
+        await rebuild_history(scene)
+    finally:
+        active_scene.reset(token)
+
+
+@pytest.mark.asyncio
+async def test_rebuild_history_parallel_matches_sequential():
+    sequential, _ = make_archive_scene()
+    await rebuild(sequential)
+
+    parallel, summarizer = make_archive_scene(max_concurrent_requests=4)
+    await rebuild(parallel)
+
+    expected = archive(sequential)
+    assert len(expected) > 4
+    # time passages move the timestamps of the following entries
+    assert len({entry["ts"] for entry in expected}) > 1
+    assert archive(parallel) == expected
+    assert summarizer.client.max_in_flight > 1
+
+
+@pytest.mark.asyncio
+async def test_rebuild_history_resumes_after_interruption():
+    expected, _ = make_archive_scene()
+    await rebuild(expected)
+
+    scene, summarizer = make_archive_scene(max_concurrent_requests=4)
+    summarizer.client.fail_on = 4
+    await rebuild(scene)
+
+    # only the entries before the cancelled one have been committed
+    committed = archive(scene)
+    assert 0 < len(committed) < len(expected.archived_history)
+    assert committed == archive(expected)[: len(committed)]
+
+    # archiving continues where the committed entries end
+    summarizer.client.fail_on = None
+    token = active_scene.set(scene)
+    try:
+        while await summarizer.build_archive(scene):
+            pass
+    finally:
+        active_scene.reset(token)
+
+    assert archive(scene) == archive(expected)
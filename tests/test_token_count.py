@@ -0,0 +1,80 @@
+import json
+
+from talemate.load import _load_history
+from talemate.save import SceneEncoder
+from talemate.scene_message import CharacterMessage, ReinforcementMessage
+from talemate.util import (
+    TokenBudget,
+    count_entry_tokens,
+    count_tokens,
+)
+
+
+def test_token_budget():
+    budget = TokenBudget(10)
+
+    assert budget.fits(10)
+    assert not budget.fits(11)
+
+    budget.add(6)
+    assert budget.remaining == 4
+    assert not budget.exhausted
+
+    budget.add(6)
+    assert budget.exceeded
+
+    budget.remove(2)
+    assert budget.exhausted
+    assert not budget.exceeded
+
+    assert budget.consume("hello world") == count_tokens("hello world")
+
+
+def test_message_token_count_is_cached():
+    message = CharacterMessage("Elara: The caravan will not wait for us.")
+    expected = count_tokens(str(message))
+
+    assert message.tokens is None
+    assert count_tokens(message) == expected
+    assert message.tokens[1] == expected
+
+    # a stale cache entry is ignored when the message changes
+    message.message = "Elara: Hurry."
+    assert count_tokens(message) == count_tokens("Elara: Hurry.")
+
+
+def test_message_token_count_follows_str():
+    message = ReinforcementMessage("Tired.")
+    message.set_source(
+        "world_state", "update_reinforcement", character="Elara", question="Mood?"
+    )
+    assert count_tokens(message) == count_tokens(str(message))
+
+    message.set_source(
+        "world_state",
+        "update_reinforcement",
+        character="Elara",
+        question="How is Elara feeling right now?",
+    )
+    assert count_tokens(message) == count_tokens(str(message))
+
+
+def test_message_token_count_persists():
+    message = CharacterMessage("Elara: The caravan will not wait for us.")
+    count_tokens(message)
+
+    data = json.loads(json.dumps([message], cls=SceneEncoder))
+    assert data[0]["tokens"] == message.tokens
+
+    loaded = _load_history(data)[0]
+    assert loaded.tokens == message.tokens
+
+
+def test_entry_token_count_is_cached():
+    entry = {"text": "The party crossed the pass before nightfall."}
+
+    assert count_entry_tokens(entry) == count_tokens(entry["text"])
+    assert entry["tokens"][1] == count_tokens(entry["text"])
+
+    entry["text"] = "The party turned back."
+    assert count_entry_tokens(entry) == count_tokens("The party turned back.")
@@ -0,0 +1,220 @@
+import asyncio
+import json
+import random
+import re
+
+import pytest
+
+import talemate.agents as agents
+import talemate.agents.tts.voice_library as voice_library
+import talemate.instance as instance
+from talemate.character import Character
+from talemate.client.base import ClientBase
+from talemate.context import active_scene
+from talemate.scene_message import CharacterMessage, ReinforcementMessage
+from talemate.tale_mate import Scene
+from talemate.world_state import Reinforcement
+
+QUESTION = re.compile(r"Question: Q(\d+):")
+
+
+class StubClient(ClientBase):
+    """
+    Local stand-in for an LLM client
+
+    Batched requests are answered with `batch_response`, individual requests
+    with an answer derived from the question number after a random delay.
+    Records the requests and how many were in flight at once.
+    """
+
+    client_type = "stub"
+    data_format = "json"
+    max_token_length = 8192
+    max_concurrent_requests = 1
+
+    def __init__(self, max_concurrent_requests: int = 1, **kwargs):
+        super().__init__(**kwargs)
+        self.max_concurrent_requests = max_concurrent_requests
+        self.batch_response = "{}"
+        self.batch_requests = 0
+        self.requested = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.rng = random.Random(7)
+
+    async def send_prompt(self, prompt: str, kind: str = "conversation", **kwargs):
+        if kind == "analyze_long":
+            self.batch_requests += 1
+            return self.batch_response
+
+        number = int(QUESTION.search(prompt).group(1))
+        self.requested.append(number)
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.rng.uniform(0.001, 0.02))
+        finally:
+            self.in_flight -= 1
+
+        return f"Answer {number}."
+
+
+class StubMemory:
+    async def query(self, *args, **kwargs):
+        return []
+
+    async def multi_query(self, *args, **kwargs):
+        return {}
+
+    async def add_many(self, *args, **kwargs):
+        pass
+
+    async def delete(self, *args, **kwargs):
+        pass
+
+
+@pytest.fixture
+def scene():
+    voice_library.VOICE_LIBRARY = voice_library.VoiceLibrary(voices={})
+    scene = Scene()
+    scene.active = True
+    for agent_type, agent_cls in agents.AGENT_CLASSES.items():
+        agent = agent_cls()
+        agent.scene = scene
+        instance.AGENTS[agent_type] = agent
+    instance.AGENTS["memory"] = StubMemory()
+
+    elara = Character(name="Elara", description="A caravan guard.")
+    scene.get_character = lambda name: elara if name == "Elara" else None
+
+    for i in range(10):
+        scene.history.append(CharacterMessage(f"Elara: Line {i} of the scene."))
+
+    token = active_scene.set(scene)
+    yield scene
+    active_scene.reset(token)
+
+
+def make_agent(
+    scene,
+    num: int,
+    batch: bool,
+    max_concurrent_requests: int = 1,
+    data_format: str = "json",
+) -> tuple:
+    scene.world_state.reinforce = [
+        Reinforcement(
+            question=f"Q{i}: What is Elara thinking about?", character="Elara"
+        )
+        for i in range(1, num + 1)
+    ]
+
+    agent = instance.get_agent("world_state")
+    agent.client = StubClient(max_concurrent_requests=max_concurrent_requests)
+    agent.client.data_format = data_format
+    agent.actions["update_reinforcements"].config["batch"].value = batch
+    agent.actions["update_reinforcements"].config["batch_size"].value = 5
+    return agent, scene.world_state.reinforce
+
+
+def reinforcement_messages(scene) -> list[str]:
+    return [
+        message.message
+        for message in scene.history
+        if isinstance(message, ReinforcementMessage)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_request_reinforcements_parses_by_item_number(scene):
+    agent, reinforcements = make_agent(scene, 6, batch=True)
+    agent.client.batch_response = json.dumps(
+        {
+            "1": "Answer 1.\nA second line.",
+            "2": 42,
+            "3": "  ",
+            "5": {"answer": "Answer 5."},
+            "6": ["Answer 6."],
+            "7": "Answer 7.",
+        }
+    )
+
+    answers = await agent.request_reinforcements(reinforcements)
+
+    # missing, empty, non-scalar and out of range items are left out
+    assert answers == {0: "Answer 1.", 1: "42"}
+
+
+@pytest.mark.asyncio
+async def test_request_reinforcements_yaml(scene):
+    agent, reinforcements = make_agent(scene, 3, batch=True, data_format="yaml")
+    agent.client.batch_response = "1: Answer 1.\n2: ''\n3: Answer 3.\n"
+
+    # yaml parses the item numbers as int keys
+    answers = await agent.request_reinforcements(reinforcements)
+
+    assert answers == {0: "Answer 1.", 2: "Answer 3."}
+
+
+@pytest.mark.asyncio
+async def test_request_reinforcements_invalid_response(scene):
+    agent, reinforcements = make_agent(scene, 3, batch=True)
+    agent.client.batch_response = json.dumps(["Answer 1.", "Answer 2."])
+
+    assert await agent.request_reinforcements(reinforcements) == {}
+
+
+@pytest.mark.asyncio
+async def test_update_reinforcements_batched(scene):
+    agent, reinforcements = make_agent(scene, 5, batch=True)
+    agent.client.batch_response = json.dumps(
+        {str(i): f"Batched {i}." for i in range(1, 6)}
+    )
+
+    await agent.update_reinforcements(force=True)
+
+    assert agent.client.batch_requests == 1
+    assert agent.client.requested == []
+    assert [r.answer for r in reinforcements] == [f"Batched {i}." for i in range(1, 6)]
+    assert reinforcement_messages(scene) == [f"Batched {i}." for i in range(1, 6)]
+
+
+@pytest.mark.asyncio
+async def test_update_reinforcements_falls_back_to_individual_requests(scene):
+    agent, reinforcements = make_agent(scene, 6, batch=True)
+    agent.client.batch_response = json.dumps(
+        {"1": "Batched 1.", "3": "", "4": "Batched 4."}
+    )
+
+    await agent.update_reinforcements(force=True)
+
+    # 1-5 are batched, 6 is left over and requested on its own
+    assert agent.client.batch_requests == 1
+    assert sorted(agent.client.requested) == [2, 3, 5, 6]
+    expected = [
+        "Batched 1.",
+        "Answer 2.",
+        "Answer 3.",
+        "Batched 4.",
+        "Answer 5.",
+        "Answer 6.",
+    ]
+    assert [r.answer for r in reinforcements] == expected
+    assert reinforcement_messages(scene) == expected
+    assert all(r.due == r.interval for r in reinforcements)
+
+
+@pytest.mark.asyncio
+async def test_update_reinforcements_applies_in_order_under_concurrency(scene):
+    agent, reinforcements = make_agent(
+        scene, 12, batch=False, max_concurrent_requests=4
+    )
+
+    await agent.update_reinforcements(force=True)
+
+    expected = [f"Answer {i}." for i in range(1, 13)]
+    assert agent.client.batch_requests == 0
+    assert agent.client.max_in_flight == 4
+    assert [r.answer for r in reinforcements] == expected
+    assert reinforcement_messages(scene) == expected